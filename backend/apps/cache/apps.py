@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+class CacheConfig(AppConfig):
+    name = 'apps.cache'
+    
+    def ready(self):
+        # Registrar los receptores que invalidan las respuestas guardadas
+        from . import receptores  # noqa: F401
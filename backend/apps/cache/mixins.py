@@ -0,0 +1,124 @@
+"""
+Caché de respuestas de las acciones de lectura de un viewset.
+
+El viewset declara en cache_dependencias los modelos de los que depende cada acción
+y en alcance_cache() qué parte de la identidad del usuario cambia su contenido. La
+clave de una entrada combina el viewset, la acción, el alcance, la URL completa (con
+sus parámetros) y las versiones de los modelos (ver versiones.py), por lo que una
+escritura en cualquiera de ellos hace que la siguiente petición genere la respuesta
+de nuevo. Se guardan los datos ya serializados, antes del renderer.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date
+from rest_framework.response import Response
+
+from . import versiones
+
+# Encabezados de validación que se guardan con la respuesta (ver ConsultaCondicionalMixin)
+ENCABEZADOS = ('ETag', 'Last-Modified')
+
+
+class CacheRespuestasMixin:
+    """
+    Va antes de los mixins que generan la respuesta (ConsultaCondicionalMixin,
+    ListadoPaginadoMixin) para que un acierto no los ejecute.
+    """
+    # acción -> modelos cuyas escrituras cambian su respuesta
+    cache_dependencias = {}
+
+    def alcance_cache(self):
+        """
+        Parte de la clave que depende del usuario. Por defecto cada usuario tiene sus
+        propias entradas; los viewsets cuyo contenido depende solo del rol lo reducen.
+        """
+        return f'usuario:{self.request.user.pk}'
+
+    def list(self, request, *args, **kwargs):
+        return self._respuesta_en_cache(lambda: super(CacheRespuestasMixin, self).list(request, *args, **kwargs))
+
+    def listar_paginado(self, queryset):
+        generar = lambda: super(CacheRespuestasMixin, self).listar_paginado(queryset)
+        if getattr(self, 'lectura_asincrona', False):
+            return self._arespuesta_en_cache(generar)
+        return self._respuesta_en_cache(generar)
+
+    def _dependencias(self):
+        # Solo GET, y una vez por petición (list puede pasar por listar_paginado). Los
+        # listados en flujo (ListadoPaginadoMixin) no se guardan
+        if self.request.method != 'GET' or getattr(self, '_cache_consultada', False):
+            return None
+        if getattr(self, 'en_flujo', lambda: False)():
+            return None
+        self._cache_consultada = True
+        return self.cache_dependencias.get(self.action)
+
+    def _clave_cache(self, version):
+        partes = (
+            type(self).__name__, self.action, self.alcance_cache(),
+            self.request.build_absolute_uri(), *version
+        )
+        return 'respuesta:' + hashlib.sha1('|'.join(str(parte) for parte in partes).encode()).hexdigest()
+
+    def _respuesta_en_cache(self, generar):
+        modelos = self._dependencias()
+        if not modelos:
+            return generar()
+
+        clave = self._clave_cache(versiones.versiones(modelos))
+        guardada = versiones.backend().get(clave)
+        if guardada is not None:
+            return self._desde_cache(guardada)
+
+        respuesta = generar()
+        guardada = self._para_cache(respuesta)
+        if guardada is not None:
+            versiones.backend().set(clave, guardada)
+        return respuesta
+
+    async def _arespuesta_en_cache(self, generar):
+        modelos = self._dependencias()
+        if not modelos:
+            return await generar()
+
+        clave = self._clave_cache(await versiones.aversiones(modelos))
+        guardada = await versiones.backend().aget(clave)
+        if guardada is not None:
+            return self._desde_cache(guardada)
+
+        respuesta = await generar()
+        guardada = self._para_cache(respuesta)
+        if guardada is not None:
+            await versiones.backend().aset(clave, guardada)
+        return respuesta
+
+    def _endpoint(self):
+        return f'{type(self).__name__}.{self.action}'
+
+    def _para_cache(self, respuesta):
+        versiones.registrar(self._endpoint(), acierto=False)
+        respuesta['X-Cache'] = 'MISS'
+        # Los 304 y los errores no se guardan
+        if respuesta.status_code != 200 or not isinstance(respuesta, Response):
+            return None
+        encabezados = {nombre: respuesta[nombre] for nombre in ENCABEZADOS if respuesta.has_header(nombre)}
+        return {'datos': respuesta.data, 'encabezados': encabezados}
+
+    def _desde_cache(self, guardada):
+        versiones.registrar(self._endpoint(), acierto=True)
+        encabezados = guardada['encabezados']
+
+        respuesta = None
+        if encabezados:
+            ultima = encabezados.get('Last-Modified')
+            respuesta = get_conditional_response(
+                self.request, etag=encabezados.get('ETag'),
+                last_modified=parse_http_date(ultima) if ultima else None
+            )
+        if respuesta is None:
+            respuesta = Response(guardada['datos'])
+        for nombre, valor in encabezados.items():
+            respuesta[nombre] = valor
+        respuesta['X-Cache'] = 'HIT'
+        return respuesta
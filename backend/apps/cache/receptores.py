@@ -0,0 +1,22 @@
+"""
+Invalidación de la caché de respuestas a partir de save() y delete() de los modelos de
+los que dependen las respuestas guardadas (cache_dependencias de los viewsets). Al
+agregar un modelo a cache_dependencias hay que agregarlo también aquí.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.entregas.models import Producto
+from apps.solicitudes.models import Solicitud
+from apps.users.models import User
+from . import versiones
+
+
+@receiver(post_save, sender=Solicitud)
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Solicitud)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Producto)
+def invalidar_modelo(sender, using, **kwargs):
+    versiones.invalidar(sender, using=using)
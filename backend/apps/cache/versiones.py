@@ -0,0 +1,119 @@
+"""
+Contadores de versión por modelo y métricas de la caché de respuestas.
+
+Cada modelo tiene un contador en el backend de settings.CACHE_RESPUESTAS_ALIAS que
+aumenta al confirmarse cualquier escritura sobre su tabla. La clave de una respuesta
+guardada incluye los contadores de los modelos de los que depende, así que tras una
+escritura se deja de leer la entrada anterior (expira sola) sin tener que buscarla.
+
+Las señales cubren save() y delete(); update(), bulk_create() y el SQL directo no las
+emiten, por lo que quien los usa llama a invalidar() con los modelos afectados.
+"""
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+def backend():
+    return caches[settings.CACHE_RESPUESTAS_ALIAS]
+
+
+def _clave(modelo):
+    return f'version:{modelo._meta.label_lower}'
+
+
+def _inicial():
+    # Si el contador se perdió (expulsión, reinicio del backend) no debe volver a un
+    # valor ya usado, o se leerían respuestas guardadas antes de la pérdida
+    return time.time_ns()
+
+
+def _incrementar(modelo):
+    try:
+        backend().incr(_clave(modelo))
+    except ValueError:
+        backend().add(_clave(modelo), _inicial(), timeout=None)
+    _metricas.invalidacion(modelo._meta.label_lower)
+
+
+def invalidar(*modelos, using=None):
+    """
+    Invalida las respuestas que dependen de los modelos al confirmarse la transacción
+    actual (de inmediato fuera de una transacción).
+    """
+    for modelo in modelos:
+        transaction.on_commit(lambda modelo=modelo: _incrementar(modelo), using=using)
+
+
+def versiones(modelos):
+    claves = [_clave(modelo) for modelo in modelos]
+    valores = backend().get_many(claves)
+    for clave in claves:
+        if clave not in valores:
+            backend().add(clave, _inicial(), timeout=None)
+            valores[clave] = backend().get(clave)
+    return [valores[clave] for clave in claves]
+
+
+async def aversiones(modelos):
+    claves = [_clave(modelo) for modelo in modelos]
+    valores = await backend().aget_many(claves)
+    for clave in claves:
+        if clave not in valores:
+            await backend().aadd(clave, _inicial(), timeout=None)
+            valores[clave] = await backend().aget(clave)
+    return [valores[clave] for clave in claves]
+
+
+class Metricas:
+    """
+    Aciertos y fallos por endpoint, e invalidaciones por modelo, del proceso actual.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = defaultdict(lambda: {'aciertos': 0, 'fallos': 0})
+        self._invalidaciones = defaultdict(int)
+
+    def registrar(self, endpoint, acierto):
+        with self._lock:
+            self._endpoints[endpoint]['aciertos' if acierto else 'fallos'] += 1
+
+    def invalidacion(self, modelo):
+        with self._lock:
+            self._invalidaciones[modelo] += 1
+
+    def resumen(self):
+        with self._lock:
+            endpoints = {
+                endpoint: {
+                    **conteo,
+                    'tasa_aciertos': round(conteo['aciertos'] / (conteo['aciertos'] + conteo['fallos']), 3),
+                }
+                for endpoint, conteo in self._endpoints.items()
+            }
+            total = {
+                'aciertos': sum(conteo['aciertos'] for conteo in endpoints.values()),
+                'fallos': sum(conteo['fallos'] for conteo in endpoints.values()),
+            }
+            return {
+                'backend': settings.CACHES[settings.CACHE_RESPUESTAS_ALIAS]['BACKEND'],
+                'total': total,
+                'endpoints': endpoints,
+                'invalidaciones': dict(self._invalidaciones),
+            }
+
+
+_metricas = Metricas()
+
+
+def registrar(endpoint, acierto):
+    _metricas.registrar(endpoint, acierto)
+
+
+def metricas():
+    return _metricas.resumen()
@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import Contador
+
+@admin.register(Contador)
+class ContadorAdmin(admin.ModelAdmin):
+    list_display = ('clave', 'usuario', 'valor')
+    search_fields = ('clave',)
+    readonly_fields = ('clave', 'usuario', 'valor')
@@ -0,0 +1,125 @@
+"""
+Contadores del dashboard.
+
+Cada fila de solicitudes, inspecciones, entregas y productos aporta +1 a un conjunto
+de claves (globales o de un usuario) calculado por las funciones dashboard_claves_*
+de la base de datos. Los triggers por sentencia suman la diferencia entre las claves
+de las filas nuevas y las anteriores, así que leer un conteo es leer una fila.
+"""
+from django.db import connection
+
+from apps.solicitudes.models import Solicitud
+from .models import Contador
+
+ESTADOS = [estado for estado, _ in Solicitud.ESTADO_CHOICES]
+
+# Estados de solicitud visibles por rol (mismo alcance que SolicitudViewSet.get_queryset)
+ESTADOS_POR_ROL = {
+    'trabajo_social': ['aprobado_representante', 'en_inspeccion'],
+    'almacen': ['aprobado_social', 'en_entrega', 'entregado'],
+}
+
+# (tabla, JOIN adicional, función de claves, argumentos) de cada fuente de conteos
+FUENTES = [
+    ('solicitudes_solicitud', '', 'dashboard_claves_solicitud',
+     'f.estado, f.ciudadano_id, f.representante_id'),
+    ('inspecciones_inspeccion', 'JOIN solicitudes_solicitud s ON s.id = f.solicitud_id',
+     'dashboard_claves_inspeccion', 'f.resultado, f.inspector_id, s.estado'),
+    ('entregas_entrega', 'JOIN solicitudes_solicitud s ON s.id = f.solicitud_id',
+     'dashboard_claves_entrega', 'f.completada, f.fecha_programada, s.ciudadano_id'),
+    ('entregas_producto', '', 'dashboard_claves_producto',
+     'f.stock_actual, f.stock_reservado, f.stock_minimo'),
+]
+
+
+def estadisticas(user):
+    """
+    Conteos del dashboard con el mismo alcance que los listados de cada rol.
+    """
+    valores = {
+        (clave, usuario): valor
+        for clave, usuario, valor in Contador.objects.filter(usuario__in=[0, user.pk])
+        .values_list('clave', 'usuario', 'valor')
+    }
+    
+    def valor(clave, usuario=0):
+        return valores.get((clave, usuario), 0)
+    
+    if user.is_superuser or user.rol == 'recepcion':
+        solicitudes = {estado: valor(f'solicitudes:{estado}') for estado in ESTADOS}
+    elif user.rol == 'ciudadano':
+        solicitudes = {estado: valor(f'solicitudes_ciudadano:{estado}', user.pk) for estado in ESTADOS}
+    elif user.rol == 'representante':
+        # Pendientes de todos más las que el representante ya revisó
+        solicitudes = {
+            estado: valor('solicitudes:pendiente') if estado == 'pendiente'
+            else valor(f'solicitudes_representante:{estado}', user.pk)
+            for estado in ESTADOS
+        }
+    else:
+        solicitudes = {estado: valor(f'solicitudes:{estado}') for estado in ESTADOS_POR_ROL.get(user.rol, [])}
+    
+    if user.is_superuser or user.rol in ['representante', 'almacen', 'recepcion']:
+        inspecciones = valor('inspecciones_pendientes')
+    elif user.rol == 'trabajo_social':
+        # Propias o de solicitudes aprobadas por representante, sin contar dos veces las que cumplen ambas
+        inspecciones = (
+            valor('inspecciones_pendientes', user.pk)
+            + valor('inspecciones_pendientes_aprobado_representante')
+            - valor('inspecciones_pendientes_aprobado_representante', user.pk)
+        )
+    else:
+        inspecciones = 0
+    
+    if user.is_superuser or user.rol in ['almacen', 'recepcion', 'representante', 'trabajo_social']:
+        entregas_pendientes = valor('entregas_pendientes')
+        entregas_programadas = valor('entregas_programadas')
+    elif user.rol == 'ciudadano':
+        entregas_pendientes = valor('entregas_pendientes', user.pk)
+        entregas_programadas = valor('entregas_programadas', user.pk)
+    else:
+        entregas_pendientes = entregas_programadas = 0
+    
+    return {
+        'solicitudes': {'total': sum(solicitudes.values()), 'por_estado': solicitudes},
+        'inspecciones_pendientes': inspecciones,
+        'entregas_pendientes': entregas_pendientes,
+        'entregas_programadas': entregas_programadas,
+        'productos_stock_bajo': valor('productos_stock_bajo'),
+    }
+
+
+def reconstruir():
+    """
+    Recalcula todos los contadores desde las tablas de origen y devuelve las
+    diferencias encontradas como {(clave, usuario): (anterior, correcto)}.
+    Debe llamarse dentro de transaction.atomic().
+    """
+    tabla = Contador._meta.db_table
+    consultas = ' UNION ALL '.join(
+        f'SELECT k.clave, k.usuario FROM {origen} f {join}, LATERAL {funcion}({argumentos}) k'
+        for origen, join, funcion, argumentos in FUENTES
+    )
+    
+    with connection.cursor() as cursor:
+        # Bloquear escrituras en las tablas de origen mientras se recalcula
+        cursor.execute(f'LOCK TABLE {", ".join(origen for origen, _, _, _ in FUENTES)} IN SHARE MODE')
+        cursor.execute(f'LOCK TABLE {tabla} IN EXCLUSIVE MODE')
+        
+        cursor.execute(f'SELECT clave, usuario, valor FROM {tabla}')
+        anteriores = {(clave, usuario): valor for clave, usuario, valor in cursor.fetchall()}
+        
+        cursor.execute(f'DELETE FROM {tabla}')
+        cursor.execute(
+            f'INSERT INTO {tabla} (clave, usuario, valor) '
+            f'SELECT clave, usuario, count(*) FROM ({consultas}) k GROUP BY clave, usuario'
+        )
+        
+        cursor.execute(f'SELECT clave, usuario, valor FROM {tabla}')
+        correctos = {(clave, usuario): valor for clave, usuario, valor in cursor.fetchall()}
+    
+    return {
+        clave: (anteriores.get(clave, 0), correctos.get(clave, 0))
+        for clave in anteriores.keys() | correctos.keys()
+        if anteriores.get(clave, 0) != correctos.get(clave, 0)
+    }
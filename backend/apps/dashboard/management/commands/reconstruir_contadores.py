@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.dashboard import contadores
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los contadores del dashboard desde cero y reporta los que estaban desfasados.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            diferencias = contadores.reconstruir()
+        
+        for (clave, usuario), (anterior, correcto) in sorted(diferencias.items()):
+            self.stdout.write(f'{clave} (usuario {usuario}): {anterior} -> {correcto}')
+        self.stdout.write(self.style.SUCCESS(f'Contadores reconstruidos: {len(diferencias)} corregidos'))
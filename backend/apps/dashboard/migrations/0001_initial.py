@@ -0,0 +1,179 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:17
+
+from django.db import migrations, models
+
+# Claves a las que aporta cada fila: (clave, usuario), con usuario 0 para los globales
+CLAVES_SQL = """
+CREATE FUNCTION dashboard_claves_solicitud(estado text, ciudadano bigint, representante bigint)
+RETURNS TABLE (clave text, usuario bigint) AS $$
+    SELECT 'solicitudes:' || estado, 0::bigint
+    UNION ALL SELECT 'solicitudes_ciudadano:' || estado, ciudadano
+    UNION ALL SELECT 'solicitudes_representante:' || estado, representante WHERE representante IS NOT NULL
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE FUNCTION dashboard_claves_inspeccion(resultado text, inspector bigint, estado_solicitud text)
+RETURNS TABLE (clave text, usuario bigint) AS $$
+    SELECT c.clave, c.usuario FROM (VALUES
+        ('inspecciones_pendientes', 0::bigint, true),
+        ('inspecciones_pendientes', inspector, true),
+        ('inspecciones_pendientes_aprobado_representante', 0::bigint, estado_solicitud = 'aprobado_representante'),
+        ('inspecciones_pendientes_aprobado_representante', inspector, estado_solicitud = 'aprobado_representante')
+    ) AS c(clave, usuario, aplica)
+    WHERE resultado = 'pendiente' AND c.aplica
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE FUNCTION dashboard_claves_entrega(completada boolean, fecha_programada date, ciudadano bigint)
+RETURNS TABLE (clave text, usuario bigint) AS $$
+    SELECT c.clave, c.usuario FROM (VALUES
+        ('entregas_pendientes', 0::bigint, NOT completada),
+        ('entregas_pendientes', ciudadano, NOT completada),
+        ('entregas_programadas', 0::bigint, fecha_programada IS NOT NULL),
+        ('entregas_programadas', ciudadano, fecha_programada IS NOT NULL)
+    ) AS c(clave, usuario, aplica)
+    WHERE c.aplica
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE FUNCTION dashboard_claves_producto(stock_actual integer, stock_reservado integer, stock_minimo integer)
+RETURNS TABLE (clave text, usuario bigint) AS $$
+    SELECT 'productos_stock_bajo', 0::bigint WHERE stock_actual - stock_reservado <= stock_minimo
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Trigger por sentencia: argumentos (función de claves, columnas, JOIN opcional).
+-- Suma +1 por las claves de las filas nuevas y -1 por las de las anteriores, de
+-- modo que un INSERT o UPDATE masivo hace un solo upsert por contador afectado.
+CREATE FUNCTION dashboard_contar() RETURNS trigger AS $$
+DECLARE
+    partes text[] := '{}';
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        partes := partes || format('SELECT k.clave, k.usuario, 1 AS delta FROM nuevas f %s, LATERAL %s(%s) k',
+                                   TG_ARGV[2], TG_ARGV[0], TG_ARGV[1]);
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        partes := partes || format('SELECT k.clave, k.usuario, -1 AS delta FROM viejas f %s, LATERAL %s(%s) k',
+                                   TG_ARGV[2], TG_ARGV[0], TG_ARGV[1]);
+    END IF;
+
+    -- Orden fijo de claves para que dos transacciones no se bloqueen mutuamente
+    EXECUTE format(
+        'INSERT INTO dashboard_contador (clave, usuario, valor) '
+        'SELECT clave, usuario, sum(delta) FROM (%s) d GROUP BY clave, usuario '
+        'HAVING sum(delta) <> 0 ORDER BY clave, usuario '
+        'ON CONFLICT (clave, usuario) DO UPDATE SET valor = dashboard_contador.valor + EXCLUDED.valor',
+        array_to_string(partes, ' UNION ALL '));
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+CLAVES_REVERSE_SQL = """
+DROP FUNCTION IF EXISTS dashboard_contar();
+DROP FUNCTION IF EXISTS dashboard_claves_producto(integer, integer, integer);
+DROP FUNCTION IF EXISTS dashboard_claves_entrega(boolean, date, bigint);
+DROP FUNCTION IF EXISTS dashboard_claves_inspeccion(text, bigint, text);
+DROP FUNCTION IF EXISTS dashboard_claves_solicitud(text, bigint, bigint);
+"""
+
+# Referencias de las tablas de transición; solo se admite un evento por trigger
+EVENTOS = {
+    'INSERT': 'NEW TABLE AS nuevas',
+    'UPDATE': 'OLD TABLE AS viejas NEW TABLE AS nuevas',
+    'DELETE': 'OLD TABLE AS viejas',
+}
+
+# (nombre, tabla, eventos, función de claves, columnas, JOIN). Los dos triggers de
+# solicitudes que usan claves de inspecciones y entregas las recalculan cuando
+# cambia el estado o el ciudadano de la solicitud, que forman parte de esas claves.
+TRIGGERS = [
+    ('solicitud_contadores', 'solicitudes_solicitud', ['INSERT', 'UPDATE', 'DELETE'],
+     'dashboard_claves_solicitud', 'f.estado, f.ciudadano_id, f.representante_id', ''),
+    ('solicitud_contadores_inspecciones', 'solicitudes_solicitud', ['UPDATE'],
+     'dashboard_claves_inspeccion', 'i.resultado, i.inspector_id, f.estado',
+     'JOIN inspecciones_inspeccion i ON i.solicitud_id = f.id'),
+    ('solicitud_contadores_entregas', 'solicitudes_solicitud', ['UPDATE'],
+     'dashboard_claves_entrega', 'e.completada, e.fecha_programada, f.ciudadano_id',
+     'JOIN entregas_entrega e ON e.solicitud_id = f.id'),
+    ('inspeccion_contadores', 'inspecciones_inspeccion', ['INSERT', 'UPDATE', 'DELETE'],
+     'dashboard_claves_inspeccion', 'f.resultado, f.inspector_id, s.estado',
+     'JOIN solicitudes_solicitud s ON s.id = f.solicitud_id'),
+    ('entrega_contadores', 'entregas_entrega', ['INSERT', 'UPDATE', 'DELETE'],
+     'dashboard_claves_entrega', 'f.completada, f.fecha_programada, s.ciudadano_id',
+     'JOIN solicitudes_solicitud s ON s.id = f.solicitud_id'),
+    ('producto_contadores', 'entregas_producto', ['INSERT', 'UPDATE', 'DELETE'],
+     'dashboard_claves_producto', 'f.stock_actual, f.stock_reservado, f.stock_minimo', ''),
+]
+
+
+def _triggers_sql():
+    sentencias = []
+    for nombre, tabla, eventos, funcion, columnas, join in TRIGGERS:
+        argumentos = ', '.join(f"'{argumento}'" for argumento in [funcion, columnas, join])
+        for evento in eventos:
+            sentencias.append(
+                f'CREATE TRIGGER {nombre}_{evento.lower()} AFTER {evento} ON {tabla} '
+                f'REFERENCING {EVENTOS[evento]} FOR EACH STATEMENT EXECUTE FUNCTION dashboard_contar({argumentos});'
+            )
+    return '\n'.join(sentencias)
+
+
+def _triggers_reverse_sql():
+    return '\n'.join(
+        f'DROP TRIGGER IF EXISTS {nombre}_{evento.lower()} ON {tabla};'
+        for nombre, tabla, eventos, _, _, _ in TRIGGERS
+        for evento in eventos
+    )
+
+
+# Carga inicial con los datos existentes
+CARGA_SQL = """
+INSERT INTO dashboard_contador (clave, usuario, valor)
+SELECT clave, usuario, count(*) FROM (
+    SELECT k.clave, k.usuario FROM solicitudes_solicitud f,
+        LATERAL dashboard_claves_solicitud(f.estado, f.ciudadano_id, f.representante_id) k
+    UNION ALL
+    SELECT k.clave, k.usuario FROM inspecciones_inspeccion f JOIN solicitudes_solicitud s ON s.id = f.solicitud_id,
+        LATERAL dashboard_claves_inspeccion(f.resultado, f.inspector_id, s.estado) k
+    UNION ALL
+    SELECT k.clave, k.usuario FROM entregas_entrega f JOIN solicitudes_solicitud s ON s.id = f.solicitud_id,
+        LATERAL dashboard_claves_entrega(f.completada, f.fecha_programada, s.ciudadano_id) k
+    UNION ALL
+    SELECT k.clave, k.usuario FROM entregas_producto f,
+        LATERAL dashboard_claves_producto(f.stock_actual, f.stock_reservado, f.stock_minimo) k
+) k
+GROUP BY clave, usuario;
+"""
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('solicitudes', '0003_busqueda_texto_completo'),
+        ('inspecciones', '0003_busqueda_texto_completo'),
+        ('entregas', '0006_stock_minimo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Contador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=60)),
+                ('usuario', models.BigIntegerField(default=0)),
+                ('valor', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Contador',
+                'verbose_name_plural': 'Contadores',
+                'ordering': ['clave', 'usuario'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='contador',
+            constraint=models.UniqueConstraint(fields=('clave', 'usuario'), name='contador_clave_usuario_unico'),
+        ),
+        migrations.RunSQL(CLAVES_SQL, reverse_sql=CLAVES_REVERSE_SQL),
+        migrations.RunSQL(_triggers_sql(), reverse_sql=_triggers_reverse_sql()),
+        migrations.RunSQL(CARGA_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
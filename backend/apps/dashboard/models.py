@@ -0,0 +1,22 @@
+from django.db import models
+
+class Contador(models.Model):
+    """
+    Conteo precalculado para el dashboard. Lo mantienen triggers de la base de datos
+    en la misma transacción que el cambio que lo origina (ver migración 0001).
+    """
+    clave = models.CharField(max_length=60)
+    # 0 para los contadores globales; si no, el id del usuario al que corresponde
+    usuario = models.BigIntegerField(default=0)
+    valor = models.BigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Contador'
+        verbose_name_plural = 'Contadores'
+        ordering = ['clave', 'usuario']
+        constraints = [
+            models.UniqueConstraint(fields=['clave', 'usuario'], name='contador_clave_usuario_unico'),
+        ]
+    
+    def __str__(self):
+        return f"{self.clave} ({self.usuario}): {self.valor}"
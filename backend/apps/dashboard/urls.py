@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import EstadisticasView
+
+urlpatterns = [
+    path('stats/', EstadisticasView.as_view(), name='dashboard-stats'),
+]
@@ -0,0 +1,14 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import contadores
+
+class EstadisticasView(APIView):
+    """
+    Conteos del dashboard según el rol del usuario, leídos de los contadores precalculados.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        return Response(contadores.estadisticas(request.user))
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Entrega, Producto
+from .models import Entrega, Producto, ReservaStock, StockMovimiento
 
 @admin.register(Entrega)
 class EntregaAdmin(admin.ModelAdmin):
@@ -10,7 +10,20 @@ class EntregaAdmin(admin.ModelAdmin):
 
 @admin.register(Producto)
 class ProductoAdmin(admin.ModelAdmin):
-    list_display = ('id', 'nombre', 'codigo', 'unidad_medida', 'stock_actual')
+    list_display = ('id', 'nombre', 'codigo', 'unidad_medida', 'stock_actual', 'stock_minimo')
     list_filter = ('unidad_medida',)
     search_fields = ('nombre', 'descripcion', 'codigo')
-    ordering = ('nombre',) 
\ No newline at end of file
+    ordering = ('nombre',)
+
+@admin.register(ReservaStock)
+class ReservaStockAdmin(admin.ModelAdmin):
+    list_display = ('id', 'entrega', 'producto', 'cantidad', 'estado', 'fecha_creacion')
+    list_filter = ('estado',)
+    search_fields = ('producto__nombre', 'producto__codigo')
+
+@admin.register(StockMovimiento)
+class StockMovimientoAdmin(admin.ModelAdmin):
+    list_display = ('id', 'producto', 'tipo', 'cantidad', 'fecha', 'entrega', 'usuario')
+    list_filter = ('tipo', 'fecha')
+    search_fields = ('producto__nombre', 'producto__codigo', 'nota')
+    date_hierarchy = 'fecha'
\ No newline at end of file
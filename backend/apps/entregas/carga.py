@@ -0,0 +1,160 @@
+"""
+Plan de carga de las entregas programadas.
+
+Las cantidades de cada entrega pendiente están en sus reservas activas (reservas.py),
+la copia por producto del JSON productos, así que el plan se arma con una sola
+consulta sobre esa tabla, unida al producto, en lugar de leer el JSON de cada
+entrega. La lista de carga suma cada producto y lo compara con lo que el plan puede
+llevarse sin bajar del stock_minimo: el stock_actual menos lo reservado por entregas
+fuera del plan y menos el mínimo. Las reservas del plan siempre caben en el
+stock_actual (inventario.py no deja que quede por debajo de lo reservado), así que el
+faltante es lo que el plan toma del stock mínimo, y se señala el primer día en que lo
+programado acumulado empieza a tomarlo.
+
+Las entregas de cada día se reparten en vehículos con una capacidad en unidades de
+producto (una entrega no se divide) con Best Fit Decreasing: de la más grande a la
+más chica, cada entrega va al vehículo en que deja menos espacio libre, o a uno
+nuevo si no cabe en ninguno; usa a lo sumo 11/9 de los vehículos del reparto óptimo
+más uno.
+"""
+import bisect
+from collections import defaultdict
+
+from .models import ReservaStock
+
+
+def lineas(entregas):
+    """
+    Una fila por producto de cada entrega, en orden de fecha: (entrega_id,
+    fecha_programada, cantidad, producto_id, nombre, codigo, unidad, stock_actual,
+    stock_reservado, stock_minimo).
+    """
+    return list(
+        ReservaStock.objects.filter(estado='activa', entrega__in=entregas.values('pk'))
+        .values_list(
+            'entrega_id', 'entrega__fecha_programada', 'cantidad', 'producto_id', 'producto__nombre',
+            'producto__codigo', 'producto__unidad_medida', 'producto__stock_actual', 'producto__stock_reservado',
+            'producto__stock_minimo'
+        )
+        .order_by('entrega__fecha_programada', 'entrega_id', 'producto_id')
+    )
+
+
+def lista_de_carga(lineas):
+    """
+    Total por producto con su stock, lo disponible para el plan sin bajar del mínimo,
+    el faltante y el primer día en que lo programado acumulado supera lo disponible.
+    """
+    lista = {}
+    for entrega_id, fecha, cantidad, producto_id, nombre, codigo, unidad, actual, reservado, minimo in lineas:
+        fila = lista.get(producto_id)
+        if fila is None:
+            fila = lista[producto_id] = {
+                'producto': producto_id,
+                'nombre': nombre,
+                'codigo': codigo,
+                'unidad': unidad,
+                'requerido': 0,
+                'entregas': 0,
+                'stock_actual': actual,
+                'stock_reservado': reservado,
+                'stock_minimo': minimo,
+                'disponible': 0,
+                'faltante': 0,
+                'bajo_minimo_desde': None,
+            }
+        fila['requerido'] += cantidad
+        fila['entregas'] += 1
+
+    for fila in lista.values():
+        # stock_reservado incluye las reservas del plan; el resto son de otras entregas
+        fuera_del_plan = fila['stock_reservado'] - fila['requerido']
+        fila['disponible'] = fila['stock_actual'] - fuera_del_plan - fila['stock_minimo']
+        fila['faltante'] = max(fila['requerido'] - fila['disponible'], 0)
+
+    # El día se conoce una vez calculado lo disponible: segunda pasada en orden de fecha
+    acumulado = defaultdict(int)
+    for entrega_id, fecha, cantidad, producto_id, *_ in lineas:
+        fila = lista[producto_id]
+        acumulado[producto_id] += cantidad
+        if fila['bajo_minimo_desde'] is None and acumulado[producto_id] > fila['disponible']:
+            fila['bajo_minimo_desde'] = fecha
+    return sorted(lista.values(), key=lambda fila: (fila['nombre'], fila['producto']))
+
+
+def empacar(cargas, capacidad):
+    """
+    Reparte las cargas [(id, carga)] en vehículos de la capacidad dada. Devuelve
+    (vehiculos, excedidas): las listas de ids de cada vehículo y los ids de las
+    cargas que no caben en ninguno.
+    """
+    vehiculos, excedidas = [], []
+    # (espacio libre, vehículo) ordenado para encontrar el ajuste justo con bisect
+    libres = []
+    for identificador, carga in sorted(cargas, key=lambda c: (-c[1], c[0])):
+        if carga > capacidad:
+            excedidas.append(identificador)
+            continue
+        posicion = bisect.bisect_left(libres, (carga, -1))
+        if posicion < len(libres):
+            libre, numero = libres.pop(posicion)
+        else:
+            libre, numero = capacidad, len(vehiculos)
+            vehiculos.append([])
+        vehiculos[numero].append(identificador)
+        if libre > carga:
+            bisect.insort(libres, (libre - carga, numero))
+    return vehiculos, excedidas
+
+
+def planificar(entregas, capacidad=None):
+    """
+    (lista, dias): la lista de carga de las entregas y, por cada día, la carga total
+    y con una capacidad los vehículos en que se reparte. Lee todo en una consulta.
+    """
+    detalle = lineas(entregas)
+    lista = lista_de_carga(detalle)
+    nombres = {fila['producto']: fila['nombre'] for fila in lista}
+
+    # {fecha: {entrega_id: {producto_id: cantidad}}}, en orden de fecha
+    por_dia = {}
+    for entrega_id, fecha, cantidad, producto_id, *_ in detalle:
+        productos = por_dia.setdefault(fecha, {}).setdefault(entrega_id, {})
+        productos[producto_id] = productos.get(producto_id, 0) + cantidad
+
+    dias = []
+    for fecha, productos_por_entrega in por_dia.items():
+        cargas = {entrega_id: sum(productos.values()) for entrega_id, productos in productos_por_entrega.items()}
+        dia = {'fecha': fecha, 'entregas': len(cargas), 'carga': sum(cargas.values())}
+        if capacidad is not None:
+            vehiculos, excedidas = empacar(cargas.items(), capacidad)
+            caben = sum(cargas.values()) - sum(cargas[entrega_id] for entrega_id in excedidas)
+            # Cota inferior: ningún reparto usa menos vehículos que esto
+            dia['minimo_vehiculos'] = -(-caben // capacidad)
+            dia['vehiculos'] = [
+                _vehiculo(numero, sorted(ids), productos_por_entrega, cargas, capacidad, nombres)
+                for numero, ids in enumerate(vehiculos, start=1)
+            ]
+            dia['exceden_capacidad'] = [
+                {'entrega': entrega_id, 'carga': cargas[entrega_id]} for entrega_id in sorted(excedidas)
+            ]
+        dias.append(dia)
+    return lista, dias
+
+
+def _vehiculo(numero, ids, productos_por_entrega, cargas, capacidad, nombres):
+    totales = defaultdict(int)
+    for entrega_id in ids:
+        for producto_id, cantidad in productos_por_entrega[entrega_id].items():
+            totales[producto_id] += cantidad
+    carga = sum(cargas[entrega_id] for entrega_id in ids)
+    return {
+        'numero': numero,
+        'carga': carga,
+        'libre': capacidad - carga,
+        'entregas': ids,
+        'productos': [
+            {'producto': producto_id, 'nombre': nombres[producto_id], 'cantidad': totales[producto_id]}
+            for producto_id in sorted(totales, key=lambda producto_id: (nombres[producto_id], producto_id))
+        ],
+    }
@@ -0,0 +1,235 @@
+"""
+Importación masiva de catálogo y conteos de stock.
+
+Las filas se leen en streaming (CSV) o desde un arreglo JSON y se procesan por
+lotes dentro de una sola transacción: en cada lote se crean o actualizan los
+productos con un upsert, se bloquean sus filas y los cambios de stock se aplican
+con una sola sentencia. El reporte por fila se escribe en un
+archivo temporal para que la memoria no crezca con el tamaño del archivo.
+
+El arreglo JSON se carga completo en memoria, por lo que se limita a
+IMPORTACION_JSON_MAXIMO bytes; los archivos más grandes se envían como CSV.
+Ninguna fila deja el stock por debajo de lo reservado: esas filas se reportan
+como error, igual que las líneas del CSV que no se pueden leer.
+"""
+import codecs
+import csv
+import json
+import tempfile
+
+from django.conf import settings
+
+from apps.cache import versiones
+from .models import Producto, StockMovimiento
+from . import inventario
+
+TAMANO_LOTE = 1000
+
+
+def leer_filas(request):
+    """
+    Devuelve un iterador de filas (diccionarios) del cuerpo de la petición.
+    """
+    if request.content_type.startswith('text/csv'):
+        stream = request.stream
+        if stream is None:
+            return iter(())
+        return csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig'))
+
+    try:
+        largo = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        largo = 0
+    if largo > settings.IMPORTACION_JSON_MAXIMO:
+        raise ValueError(
+            f"El arreglo JSON supera {settings.IMPORTACION_JSON_MAXIMO} bytes; "
+            "envíe el archivo como CSV (Content-Type: text/csv)"
+        )
+
+    if not isinstance(request.data, list):
+        raise ValueError("Debe enviar un arreglo JSON o un archivo CSV (Content-Type: text/csv)")
+    return iter(request.data)
+
+
+def _entero(valor, campo):
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, bool):
+        raise ValueError(f"{campo} debe ser un número entero")
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"{campo} debe ser un número entero")
+
+
+def _texto(fila, campo):
+    valor = fila.get(campo)
+    if valor is None:
+        return None
+    return str(valor).strip() or None
+
+
+def normalizar_fila(fila):
+    """
+    Valida una fila y la convierte a {codigo, cantidad, conteo, nombre, unidad_medida, descripcion}.
+    """
+    if not isinstance(fila, dict):
+        raise ValueError("Cada fila debe ser un objeto")
+
+    codigo = _texto(fila, 'codigo')
+    if not codigo:
+        raise ValueError("Falta el código del producto")
+
+    cantidad = _entero(fila.get('cantidad'), 'cantidad')
+    conteo = _entero(fila.get('conteo'), 'conteo')
+
+    if (cantidad is None) == (conteo is None):
+        raise ValueError("Debe indicar cantidad (ajuste) o conteo (valor absoluto), pero no ambos")
+    if conteo is not None and conteo < 0:
+        raise ValueError("El conteo no puede ser negativo")
+
+    return {
+        'codigo': codigo,
+        'cantidad': cantidad,
+        'conteo': conteo,
+        'nombre': _texto(fila, 'nombre'),
+        'unidad_medida': _texto(fila, 'unidad_medida'),
+        'descripcion': _texto(fila, 'descripcion'),
+    }
+
+
+def _procesar_lote(lote, usuario, salida, resumen):
+    validas = [(numero, fila) for numero, fila in lote if isinstance(fila, dict)]
+    codigos = {fila['codigo'] for _, fila in validas}
+
+    descripciones = dict(Producto.objects.filter(codigo__in=codigos).values_list('codigo', 'descripcion'))
+    existentes = set(descripciones)
+
+    # Upsert de las filas que traen datos de catálogo; sin descripcion se conserva la actual
+    catalogo = {}
+    for _, fila in validas:
+        if fila['nombre'] and fila['unidad_medida']:
+            catalogo[fila['codigo']] = Producto(
+                codigo=fila['codigo'],
+                nombre=fila['nombre'],
+                unidad_medida=fila['unidad_medida'],
+                descripcion=fila['descripcion'] if fila['descripcion'] is not None else descripciones.get(fila['codigo'])
+            )
+    if catalogo:
+        Producto.objects.bulk_create(
+            list(catalogo.values()),
+            update_conflicts=True,
+            unique_fields=['codigo'],
+            update_fields=['nombre', 'unidad_medida', 'descripcion']
+        )
+        versiones.invalidar(Producto)
+
+    # Bloquear los productos del lote en orden de id para leer saldos exactos
+    saldos = {
+        codigo: [producto_id, stock, reservado]
+        for codigo, producto_id, stock, reservado in Producto.objects.select_for_update()
+        .filter(codigo__in=codigos).order_by('id').values_list('codigo', 'id', 'stock_actual', 'stock_reservado')
+    }
+
+    movimientos = []
+    for numero, fila in lote:
+        resultado = {'fila': numero}
+
+        if not isinstance(fila, dict):
+            resultado.update(estado='error', error=fila)
+        elif fila['codigo'] not in saldos:
+            resultado.update(
+                codigo=fila['codigo'], estado='error',
+                error="El producto no existe; incluya nombre y unidad_medida para crearlo"
+            )
+        else:
+            producto_id, anterior, reservado = saldos[fila['codigo']]
+            if fila['conteo'] is not None:
+                tipo, nuevo = 'correccion', fila['conteo']
+            else:
+                tipo, nuevo = 'ajuste', anterior + fila['cantidad']
+
+            if nuevo < reservado:
+                resultado.update(
+                    codigo=fila['codigo'], estado='error', stock_actual=anterior,
+                    error=f"El stock no puede quedar por debajo de lo reservado ({reservado})"
+                )
+            else:
+                movimientos.append(StockMovimiento(
+                    producto_id=producto_id, tipo=tipo, cantidad=nuevo - anterior,
+                    usuario=usuario, nota='Importación masiva'
+                ))
+                saldos[fila['codigo']][1] = nuevo
+
+                resultado.update(
+                    codigo=fila['codigo'],
+                    estado='creado' if fila['codigo'] not in existentes else 'actualizado',
+                    stock_anterior=anterior,
+                    stock_actual=nuevo
+                )
+                existentes.add(fila['codigo'])
+
+        resumen[resultado['estado']] += 1
+        salida.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+
+    inventario.aplicar_movimientos(movimientos)
+
+
+def _normalizadas(filas):
+    """
+    (número, fila normalizada) de cada fila, o (número, mensaje) si la fila no es
+    válida. Una línea del CSV que no se puede leer (mal formada o que no es UTF-8)
+    se reporta como error y termina la lectura.
+    """
+    filas = iter(filas)
+    numero = 0
+    while True:
+        numero += 1
+        try:
+            fila = next(filas)
+        except StopIteration:
+            return
+        except (csv.Error, UnicodeDecodeError) as error:
+            yield numero, f"No se pudo leer el archivo desde esta fila: {error}"
+            return
+
+        try:
+            yield numero, normalizar_fila(fila)
+        except ValueError as error:
+            yield numero, str(error)
+
+
+def importar(filas, usuario):
+    """
+    Procesa todas las filas y devuelve (resumen, archivo con una línea JSON por fila).
+    Debe llamarse dentro de transaction.atomic().
+    """
+    salida = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
+    resumen = {'creado': 0, 'actualizado': 0, 'error': 0}
+
+    lote = []
+    for numero, fila in _normalizadas(filas):
+        lote.append((numero, fila))
+
+        if len(lote) >= TAMANO_LOTE:
+            _procesar_lote(lote, usuario, salida, resumen)
+            lote = []
+
+    if lote:
+        _procesar_lote(lote, usuario, salida, resumen)
+
+    salida.seek(0)
+    return resumen, salida
+
+
+def reporte_json(resumen, salida):
+    """
+    Genera el reporte como JSON en partes, leyendo el archivo temporal línea a línea.
+    """
+    try:
+        yield '{"resumen": ' + json.dumps(resumen) + ', "resultados": ['
+        for indice, linea in enumerate(salida):
+            yield (',' if indice else '') + linea.rstrip('\n')
+        yield ']}'
+    finally:
+        salida.close()
@@ -0,0 +1,134 @@
+"""
+Registro de movimientos de inventario.
+
+stock_actual es el saldo de los movimientos de cada producto. Todo cambio inserta
+un StockMovimiento y actualiza el saldo con aritmética en la base de datos
+(stock_actual = stock_actual + n), sin leer y reescribir el valor desde Python.
+Ningún cambio deja stock_actual por debajo de stock_reservado: se rechaza con un
+error de validación (400).
+Estas funciones deben llamarse dentro de transaction.atomic().
+"""
+from django.db import connection
+from django.db.models import F, Max, Sum
+from rest_framework import serializers
+
+from apps.cache import versiones
+from .models import CorteStock, Producto, StockMovimiento
+
+
+def sumar_por_producto(cantidades, campos=('stock_actual',)):
+    """
+    Suma a cada producto su cantidad de {producto_id: cantidad} en los campos indicados,
+    con un único UPDATE ... FROM unnest() en lugar de una sentencia por producto.
+    """
+    if not cantidades:
+        return
+
+    asignaciones = ', '.join(f'{campo} = p.{campo} + d.cantidad' for campo in campos)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {Producto._meta.db_table} AS p SET {asignaciones} '
+            'FROM unnest(%s::bigint[], %s::integer[]) AS d(id, cantidad) WHERE p.id = d.id',
+            [list(cantidades), list(cantidades.values())]
+        )
+    # El SQL directo no emite señales
+    versiones.invalidar(Producto)
+
+
+def aplicar_movimientos(movimientos, descontar_reserva=False):
+    """
+    Registra los movimientos (instancias de StockMovimiento sin guardar) y aplica
+    el neto de cada producto con un único UPDATE. Con descontar_reserva el neto
+    también se aplica a stock_reservado (entregas que consumen su reserva).
+    """
+    movimientos = [movimiento for movimiento in movimientos if movimiento.cantidad]
+
+    netos = {}
+    for movimiento in movimientos:
+        netos[movimiento.producto_id] = netos.get(movimiento.producto_id, 0) + movimiento.cantidad
+    netos = {producto_id: neto for producto_id, neto in netos.items() if neto}
+
+    campos = ('stock_actual', 'stock_reservado') if descontar_reserva else ('stock_actual',)
+    sumar_por_producto(netos, campos)
+
+    return StockMovimiento.objects.bulk_create(movimientos)
+
+
+def ajustar(producto_id, cantidad, usuario=None, nota=None, tipo='ajuste'):
+    """
+    Suma la cantidad al stock. Rechaza el ajuste si deja el stock por debajo de lo reservado.
+    """
+    # Una sola sentencia condicional, sin bloquear la fila antes
+    actualizados = Producto.objects.filter(
+        pk=producto_id,
+        stock_actual__gte=F('stock_reservado') - cantidad
+    ).update(stock_actual=F('stock_actual') + cantidad)
+
+    if not actualizados:
+        _stock_insuficiente(producto_id)
+
+    versiones.invalidar(Producto)
+    if cantidad:
+        StockMovimiento.objects.create(
+            producto_id=producto_id, tipo=tipo, cantidad=cantidad, usuario=usuario, nota=nota)
+    return cantidad
+
+
+def fijar(producto_id, conteo, usuario=None, nota=None, tipo='correccion'):
+    """
+    Lleva el stock a un conteo absoluto registrando la diferencia como movimiento.
+    El conteo no puede ser menor que lo reservado.
+    """
+    actual, reservado = Producto.objects.select_for_update().values_list(
+        'stock_actual', 'stock_reservado').get(pk=producto_id)
+    if conteo < reservado:
+        _stock_insuficiente(producto_id)
+
+    aplicar_movimientos([StockMovimiento(
+        producto_id=producto_id, tipo=tipo, cantidad=conteo - actual, usuario=usuario, nota=nota)])
+    return conteo - actual
+
+
+def _stock_insuficiente(producto_id):
+    producto = Producto.objects.get(pk=producto_id)
+    raise serializers.ValidationError({
+        'error': f"El stock de {producto.nombre} no puede quedar por debajo de lo reservado "
+                 f"({producto.stock_reservado}). Stock actual: {producto.stock_actual}"
+    })
+
+
+def saldo_al(producto_id, fecha):
+    """
+    Saldo de un producto a una fecha: último corte anterior más los movimientos posteriores.
+    """
+    movimientos = StockMovimiento.objects.filter(producto_id=producto_id, fecha__lte=fecha)
+    saldo = 0
+
+    corte = CorteStock.objects.filter(producto_id=producto_id, fecha__lte=fecha).order_by('-fecha').first()
+    if corte is not None:
+        movimientos = movimientos.filter(fecha__gt=corte.fecha)
+        saldo = corte.saldo
+
+    return saldo + (movimientos.aggregate(total=Sum('cantidad'))['total'] or 0)
+
+
+def tomar_corte(fecha):
+    """
+    Guarda el saldo de todos los productos a la fecha indicada partiendo del corte anterior.
+    """
+    anterior = CorteStock.objects.filter(fecha__lt=fecha).aggregate(fecha=Max('fecha'))['fecha']
+
+    saldos = {}
+    movimientos = StockMovimiento.objects.filter(fecha__lte=fecha)
+    if anterior is not None:
+        saldos = dict(CorteStock.objects.filter(fecha=anterior).values_list('producto_id', 'saldo'))
+        movimientos = movimientos.filter(fecha__gt=anterior)
+
+    totales = movimientos.values('producto_id').annotate(total=Sum('cantidad')).values_list('producto_id', 'total')
+    for producto_id, total in totales:
+        saldos[producto_id] = saldos.get(producto_id, 0) + total
+
+    return CorteStock.objects.bulk_create([
+        CorteStock(producto_id=producto_id, fecha=fecha, saldo=saldo)
+        for producto_id, saldo in saldos.items()
+    ], batch_size=1000, ignore_conflicts=True)
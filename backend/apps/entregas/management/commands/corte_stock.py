@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.entregas import inventario
+
+
+class Command(BaseCommand):
+    help = 'Guarda el saldo de stock de todos los productos para acelerar las consultas de saldo histórico.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--margen',
+            type=int,
+            default=5,
+            help='Minutos hacia atrás en que se toma el corte, para no dejar fuera transacciones en curso.'
+        )
+
+    def handle(self, *args, **options):
+        fecha = timezone.now() - timedelta(minutes=options['margen'])
+        with transaction.atomic():
+            cortes = inventario.tomar_corte(fecha)
+        self.stdout.write(self.style.SUCCESS(f'Corte al {fecha:%Y-%m-%d %H:%M}: {len(cortes)} productos'))
@@ -0,0 +1,265 @@
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+from rest_framework import serializers
+
+from apps.entregas import inventario, reservas
+from apps.entregas.models import Entrega, Producto, ReservaStock, StockMovimiento
+from apps.solicitudes.models import Solicitud
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de concurrencia del inventario: varios hilos ajustan, corrigen, reservan, '
+        'liberan y consumen el stock de un producto temporal y al final se comprueban los '
+        'saldos. Después completa entregas en paralelo con el bucle anterior al registro '
+        'de movimientos y con reservas.consumir, y compara su ritmo y las actualizaciones '
+        'perdidas. Crea y borra sus propios datos; usar en una base de desarrollo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=16)
+        parser.add_argument('--operaciones', type=int, default=200, help='Operaciones por hilo.')
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--conservar', action='store_true', help='No borrar el producto de prueba.')
+        parser.add_argument(
+            '--completaciones', type=int, default=400,
+            help='Entregas completadas con cada método en la comparación (0 la omite).'
+        )
+        parser.add_argument('--lineas', type=int, default=5, help='Productos de cada entrega en la comparación.')
+
+    def handle(self, *args, **options):
+        solicitud = Solicitud.objects.first()
+        encargado = User.objects.filter(rol='almacen').first()
+        if solicitud is None or encargado is None:
+            raise CommandError('Se necesita al menos una solicitud y un usuario de almacén')
+
+        comprobaciones = self._concurrencia(options, solicitud, encargado)
+        if options['completaciones']:
+            comprobaciones += self._comparar(options, solicitud, encargado)
+
+        for descripcion, correcta in comprobaciones:
+            estilo = self.style.SUCCESS if correcta else self.style.ERROR
+            self.stdout.write(estilo(f'{"OK   " if correcta else "FALLA"} {descripcion}'))
+        if not all(correcta for _, correcta in comprobaciones):
+            raise CommandError('El inventario quedó inconsistente o el registro no mejora el bucle anterior')
+
+    def _concurrencia(self, options, solicitud, encargado):
+        with transaction.atomic():
+            producto = Producto.objects.create(
+                nombre='Prueba de concurrencia', codigo=f'estres-{uuid.uuid4().hex[:12]}', unidad_medida='u')
+            inventario.aplicar_movimientos([StockMovimiento(producto=producto, tipo='inicial', cantidad=50)])
+
+        resultados = Counter()
+        errores = []
+        candado = threading.Lock()
+
+        def trabajar(numero):
+            azar = random.Random(options['semilla'] * 1000 + numero)
+            propias = []
+            try:
+                for _ in range(options['operaciones']):
+                    operacion = azar.choice(['entrada', 'salida', 'conteo', 'reservar', 'liberar', 'consumir'])
+                    try:
+                        with transaction.atomic():
+                            self._operar(operacion, azar, producto, solicitud, encargado, propias)
+                        estado = 'aplicada'
+                    except serializers.ValidationError:
+                        estado = 'rechazada'
+                    except Exception as error:
+                        estado = 'error'
+                        with candado:
+                            errores.append(f'{operacion}: {error!r}')
+                    with candado:
+                        resultados[operacion, estado] += 1
+            finally:
+                connection.close()
+
+        comienzo = time.perf_counter()
+        hilos = [threading.Thread(target=trabajar, args=(numero,)) for numero in range(options['hilos'])]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - comienzo
+
+        for operacion in ['entrada', 'salida', 'conteo', 'reservar', 'liberar', 'consumir']:
+            self.stdout.write(
+                f'{operacion:9s} aplicadas {resultados[operacion, "aplicada"]:5d}, '
+                f'rechazadas {resultados[operacion, "rechazada"]:5d}, errores {resultados[operacion, "error"]:3d}'
+            )
+        for error in errores[:10]:
+            self.stdout.write(self.style.ERROR(error))
+
+        producto.refresh_from_db()
+        movimientos = producto.movimientos.aggregate(total=Sum('cantidad'))['total'] or 0
+        reservado = producto.reservas.filter(estado='activa').aggregate(total=Sum('cantidad'))['total'] or 0
+        comprobaciones = [
+            ('stock_actual = suma de movimientos', producto.stock_actual == movimientos),
+            ('stock_reservado = suma de reservas activas', producto.stock_reservado == reservado),
+            ('stock_actual >= stock_reservado', producto.stock_actual >= producto.stock_reservado),
+            ('sin errores', not errores),
+        ]
+        self.stdout.write(
+            f'{sum(resultados.values())} operaciones en {duracion:.1f} s; stock_actual {producto.stock_actual}, '
+            f'movimientos {movimientos}, stock_reservado {producto.stock_reservado}, reservas activas {reservado}'
+        )
+
+        if not options['conservar']:
+            self._borrar([producto])
+        return comprobaciones
+
+    def _comparar(self, options, solicitud, encargado):
+        """
+        Completa en paralelo las mismas entregas (los mismos productos y cantidades)
+        con el bucle anterior y con reservas.consumir, sobre productos compartidos por
+        todas las entregas, y compara entregas por segundo y unidades descontadas.
+        """
+        azar = random.Random(options['semilla'])
+        lineas = [
+            {producto: azar.randint(1, 5) for producto in range(options['lineas'])}
+            for _ in range(options['completaciones'])
+        ]
+        ritmos = {}
+        perdidas = {}
+        for metodo, completar, reservar in [
+            ('bucle anterior', self._completar_con_bucle, False),
+            ('registro', reservas.consumir, True),
+        ]:
+            with transaction.atomic():
+                productos = self._productos_de_prueba(options['lineas'])
+                entregas = self._entregas_de_prueba(lineas, productos, solicitud, encargado, reservar)
+            try:
+                antes = sum(Producto.objects.filter(pk__in=[p.pk for p in productos]).values_list('stock_actual', flat=True))
+                duracion, completadas, errores = self._en_paralelo(entregas, completar, options['hilos'])
+                despues = sum(Producto.objects.filter(pk__in=[p.pk for p in productos]).values_list('stock_actual', flat=True))
+            finally:
+                self._borrar(productos, entregas)
+
+            esperado = sum(item['cantidad'] for entrega in completadas for item in entrega.productos)
+            ritmos[metodo] = len(completadas) / duracion
+            perdidas[metodo] = esperado - (antes - despues)
+            self.stdout.write(
+                f'{metodo:14s} {len(completadas)} entregas de {options["lineas"]} productos con {options["hilos"]} hilos '
+                f'en {duracion:.2f} s ({ritmos[metodo]:.0f}/s); descontadas {antes - despues} de {esperado} '
+                f'unidades ({perdidas[metodo]} perdidas), errores {errores}'
+            )
+
+        self.stdout.write(f'registro / bucle anterior: {ritmos["registro"] / ritmos["bucle anterior"]:.2f}x')
+        return [
+            ('registro sin actualizaciones perdidas', perdidas['registro'] == 0),
+            ('registro con más entregas por segundo que el bucle anterior', ritmos['registro'] > ritmos['bucle anterior']),
+        ]
+
+    def _completar_con_bucle(self, entrega):
+        # Lo que hacía EntregaCompletarSerializer.update antes del registro de
+        # movimientos: leer cada producto, restar en Python y guardarlo
+        for producto_entregado in entrega.productos:
+            producto = Producto.objects.get(id=producto_entregado['id'])
+            producto.stock_actual -= producto_entregado['cantidad']
+            producto.save()
+
+    def _productos_de_prueba(self, cantidad):
+        marca = uuid.uuid4().hex[:12]
+        productos = Producto.objects.bulk_create([
+            Producto(nombre=f'Prueba de rendimiento {numero}', codigo=f'estres-{marca}-{numero}', unidad_medida='u')
+            for numero in range(cantidad)
+        ])
+        inventario.aplicar_movimientos([
+            StockMovimiento(producto=producto, tipo='inicial', cantidad=1000000) for producto in productos
+        ])
+        return productos
+
+    def _entregas_de_prueba(self, lineas, productos, solicitud, encargado, reservar):
+        entregas = Entrega.objects.bulk_create([
+            Entrega(
+                solicitud=solicitud, encargado=encargado,
+                productos=[{'id': productos[numero].pk, 'cantidad': cantidad} for numero, cantidad in cantidades.items()]
+            )
+            for cantidades in lineas
+        ])
+        if reservar:
+            ReservaStock.objects.bulk_create([
+                ReservaStock(entrega=entrega, producto_id=item['id'], cantidad=item['cantidad'])
+                for entrega in entregas for item in entrega.productos
+            ])
+            totales = Counter()
+            for entrega in entregas:
+                for item in entrega.productos:
+                    totales[item['id']] += item['cantidad']
+            inventario.sumar_por_producto(totales, campos=('stock_reservado',))
+        return entregas
+
+    def _en_paralelo(self, entregas, completar, hilos):
+        """
+        Completa las entregas repartidas entre los hilos, cada una en su transacción.
+        Devuelve (segundos, entregas completadas, errores).
+        """
+        pendientes = list(entregas)
+        completadas, errores = [], []
+        candado = threading.Lock()
+
+        def trabajar():
+            try:
+                while True:
+                    with candado:
+                        if not pendientes:
+                            return
+                        entrega = pendientes.pop()
+                    try:
+                        with transaction.atomic():
+                            completar(entrega)
+                        with candado:
+                            completadas.append(entrega)
+                    except Exception as error:
+                        with candado:
+                            errores.append(repr(error))
+            finally:
+                connection.close()
+
+        comienzo = time.perf_counter()
+        trabajadores = [threading.Thread(target=trabajar) for _ in range(hilos)]
+        for trabajador in trabajadores:
+            trabajador.start()
+        for trabajador in trabajadores:
+            trabajador.join()
+        for error in errores[:5]:
+            self.stdout.write(self.style.ERROR(error))
+        return time.perf_counter() - comienzo, completadas, len(errores)
+
+    def _borrar(self, productos, entregas=()):
+        with transaction.atomic():
+            Entrega.objects.filter(pk__in=[entrega.pk for entrega in entregas]).delete()
+            Entrega.objects.filter(reservas__producto__in=productos).delete()
+            StockMovimiento.objects.filter(producto__in=productos).delete()
+            Producto.objects.filter(pk__in=[producto.pk for producto in productos]).delete()
+
+    def _operar(self, operacion, azar, producto, solicitud, encargado, propias):
+        if operacion == 'entrada':
+            inventario.ajustar(producto.pk, azar.randint(1, 10))
+        elif operacion == 'salida':
+            inventario.ajustar(producto.pk, -azar.randint(1, 10))
+        elif operacion == 'conteo':
+            inventario.fijar(producto.pk, azar.randint(0, 60))
+        elif operacion == 'reservar':
+            cantidad = azar.randint(1, 8)
+            entrega = Entrega.objects.create(
+                solicitud=solicitud, encargado=encargado,
+                productos=[{'id': producto.pk, 'cantidad': cantidad}]
+            )
+            reservas.reservar(entrega, {producto.pk: cantidad}, {producto.pk: producto})
+            # Se agrega al salir del atomic para no usar una entrega revertida
+            transaction.on_commit(lambda: propias.append(entrega))
+        elif propias:
+            entrega = propias.pop(azar.randrange(len(propias)))
+            if operacion == 'liberar':
+                reservas.liberar(entrega)
+            else:
+                reservas.consumir(entrega)
@@ -0,0 +1,88 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:03
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# El vector se recalcula al insertar o al cambiar las columnas indexadas, y cuando
+# cambia la solicitud o su ciudadano se marcan sus entregas para recalcularlas.
+TRIGGERS_SQL = """
+CREATE FUNCTION entregas_entrega_vector_busqueda() RETURNS trigger AS $$
+BEGIN
+    NEW.vector_busqueda :=
+        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.comentarios, '')), 'A') ||
+        setweight(to_tsvector('spanish_unaccent', coalesce(
+            (SELECT s.titulo FROM solicitudes_solicitud s WHERE s.id = NEW.solicitud_id), '')), 'B') ||
+        setweight(to_tsvector('spanish_unaccent', coalesce(
+            (SELECT u.username FROM solicitudes_solicitud s
+             JOIN users_user u ON u.id = s.ciudadano_id
+             WHERE s.id = NEW.solicitud_id), '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER entrega_vector_busqueda
+    BEFORE INSERT OR UPDATE OF comentarios, solicitud_id ON entregas_entrega
+    FOR EACH ROW EXECUTE FUNCTION entregas_entrega_vector_busqueda();
+
+CREATE FUNCTION entregas_solicitud_vector_busqueda() RETURNS trigger AS $$
+BEGIN
+    UPDATE entregas_entrega SET comentarios = comentarios WHERE solicitud_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER solicitud_vector_busqueda_entrega
+    AFTER UPDATE OF titulo, ciudadano_id ON solicitudes_solicitud
+    FOR EACH ROW
+    WHEN (OLD.titulo IS DISTINCT FROM NEW.titulo
+          OR OLD.ciudadano_id IS DISTINCT FROM NEW.ciudadano_id)
+    EXECUTE FUNCTION entregas_solicitud_vector_busqueda();
+
+CREATE FUNCTION entregas_ciudadano_vector_busqueda() RETURNS trigger AS $$
+BEGIN
+    UPDATE entregas_entrega e SET comentarios = e.comentarios
+    FROM solicitudes_solicitud s
+    WHERE e.solicitud_id = s.id AND s.ciudadano_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER ciudadano_vector_busqueda_entrega
+    AFTER UPDATE OF username ON users_user
+    FOR EACH ROW
+    WHEN (OLD.username IS DISTINCT FROM NEW.username)
+    EXECUTE FUNCTION entregas_ciudadano_vector_busqueda();
+
+UPDATE entregas_entrega SET comentarios = comentarios;
+"""
+
+TRIGGERS_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS ciudadano_vector_busqueda_entrega ON users_user;
+DROP FUNCTION IF EXISTS entregas_ciudadano_vector_busqueda();
+DROP TRIGGER IF EXISTS solicitud_vector_busqueda_entrega ON solicitudes_solicitud;
+DROP FUNCTION IF EXISTS entregas_solicitud_vector_busqueda();
+DROP TRIGGER IF EXISTS entrega_vector_busqueda ON entregas_entrega;
+DROP FUNCTION IF EXISTS entregas_entrega_vector_busqueda();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entregas', '0002_initial'),
+        ('solicitudes', '0003_busqueda_texto_completo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entrega',
+            name='vector_busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='entrega',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['vector_busqueda'], name='entrega_busqueda_gin'),
+        ),
+        migrations.RunSQL(TRIGGERS_SQL, reverse_sql=TRIGGERS_REVERSE_SQL),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def reservar_entregas_pendientes(apps, schema_editor):
+    """
+    Crea las reservas de las entregas programadas antes de existir el sistema de reservas.
+    """
+    Entrega = apps.get_model('entregas', 'Entrega')
+    Producto = apps.get_model('entregas', 'Producto')
+    ReservaStock = apps.get_model('entregas', 'ReservaStock')
+    
+    existentes = set(Producto.objects.values_list('id', flat=True))
+    reservas = []
+    reservado = {}
+    
+    for entrega in Entrega.objects.filter(completada=False).iterator():
+        for item in entrega.productos:
+            if item.get('id') not in existentes:
+                continue
+            reservas.append(ReservaStock(
+                entrega_id=entrega.id, producto_id=item['id'], cantidad=item['cantidad']))
+            reservado[item['id']] = reservado.get(item['id'], 0) + item['cantidad']
+    
+    ReservaStock.objects.bulk_create(reservas, batch_size=1000)
+    for producto_id, cantidad in reservado.items():
+        Producto.objects.filter(id=producto_id).update(stock_reservado=cantidad)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entregas', '0003_busqueda_texto_completo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='stock_reservado',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ReservaStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.PositiveIntegerField()),
+                ('estado', models.CharField(choices=[('activa', 'Activa'), ('liberada', 'Liberada'), ('consumida', 'Consumida')], default='activa', max_length=20)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('entrega', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservas', to='entregas.entrega')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='reservas', to='entregas.producto')),
+            ],
+            options={
+                'verbose_name': 'Reserva de stock',
+                'verbose_name_plural': 'Reservas de stock',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+        migrations.RunPython(reservar_entregas_pendientes, migrations.RunPython.noop),
+    ]
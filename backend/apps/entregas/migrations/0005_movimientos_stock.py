@@ -0,0 +1,67 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def registrar_saldo_inicial(apps, schema_editor):
+    """
+    Registra el stock actual de cada producto como su saldo inicial en el registro de movimientos.
+    """
+    Producto = apps.get_model('entregas', 'Producto')
+    StockMovimiento = apps.get_model('entregas', 'StockMovimiento')
+    
+    StockMovimiento.objects.bulk_create([
+        StockMovimiento(producto_id=producto_id, tipo='inicial', cantidad=stock)
+        for producto_id, stock in Producto.objects.filter(stock_actual__gt=0).values_list('id', 'stock_actual')
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('entregas', '0004_reservas_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorteStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField()),
+                ('saldo', models.IntegerField()),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cortes', to='entregas.producto')),
+            ],
+            options={
+                'verbose_name': 'Corte de stock',
+                'verbose_name_plural': 'Cortes de stock',
+                'ordering': ['-fecha'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockMovimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('inicial', 'Saldo inicial'), ('ajuste', 'Ajuste manual'), ('entrega', 'Entrega'), ('correccion', 'Corrección de inventario')], max_length=20)),
+                ('cantidad', models.IntegerField()),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+                ('nota', models.TextField(blank=True, null=True)),
+                ('entrega', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimientos', to='entregas.entrega')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='movimientos', to='entregas.producto')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movimientos_stock', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Movimiento de stock',
+                'verbose_name_plural': 'Movimientos de stock',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['producto', 'fecha'], name='movimiento_producto_fecha')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cortestock',
+            constraint=models.UniqueConstraint(fields=('producto', 'fecha'), name='corte_producto_fecha_unico'),
+        ),
+        migrations.RunPython(registrar_saldo_inicial, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:19
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Los índices se crean sin bloquear las escrituras en tablas con datos
+    atomic = False
+
+    dependencies = [
+        ('entregas', '0006_stock_minimo'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='entrega',
+            index=models.Index(fields=['-fecha_entrega', '-id'], name='entrega_fecha'),
+        ),
+        AddIndexConcurrently(
+            model_name='entrega',
+            index=models.Index(condition=models.Q(('completada', False)), fields=['-fecha_entrega', '-id'], name='entrega_pendientes_fecha'),
+        ),
+        AddIndexConcurrently(
+            model_name='entrega',
+            index=models.Index(condition=models.Q(('fecha_programada__isnull', False)), fields=['-fecha_entrega', '-id'], name='entrega_programadas_fecha'),
+        ),
+    ]
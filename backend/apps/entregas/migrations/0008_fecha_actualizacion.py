@@ -0,0 +1,25 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('entregas', '0007_indices_listados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entrega',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        # Las filas existentes toman como última modificación su fecha de creación
+        migrations.RunSQL(
+            'UPDATE entregas_entrega SET fecha_actualizacion = fecha_entrega;',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:31
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Los índices se crean sin bloquear las escrituras en tablas con datos
+    atomic = False
+
+    dependencies = [
+        ('entregas', '0008_fecha_actualizacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entrega',
+            name='version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        AddIndexConcurrently(
+            model_name='entrega',
+            index=models.Index(fields=['version', 'id'], name='entrega_version'),
+        ),
+        AddIndexConcurrently(
+            model_name='producto',
+            index=models.Index(fields=['version', 'id'], name='producto_version'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 class Entrega(models.Model):
     solicitud = models.ForeignKey(
@@ -14,17 +16,38 @@ class Entrega(models.Model):
         limit_choices_to={'rol': 'almacen'}
     )
     fecha_entrega = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
     fecha_programada = models.DateField(null=True, blank=True)
     comentarios = models.TextField(blank=True, null=True)
     evidencia_fotos = models.JSONField(default=list, blank=True)  # Lista de URLs
     firma_receptor = models.TextField(blank=True, null=True)  # URL de la firma
     productos = models.JSONField(default=list)  # Lista de productos entregados con cantidades
     completada = models.BooleanField(default=False)
+    # Transacción que modificó la fila por última vez (trigger); cursor de la sincronización
+    version = models.BigIntegerField(default=0, editable=False)
+    # Mantenido por un trigger de la base de datos (comentarios, título de la solicitud y ciudadano)
+    vector_busqueda = SearchVectorField(null=True, editable=False)
     
     class Meta:
         verbose_name = 'Entrega'
         verbose_name_plural = 'Entregas'
         ordering = ['-fecha_entrega']
+        # Índices para los listados de EntregaViewSet en el orden de la paginación
+        indexes = [
+            GinIndex(fields=['vector_busqueda'], name='entrega_busqueda_gin'),
+            models.Index(fields=['-fecha_entrega', '-id'], name='entrega_fecha'),
+            models.Index(
+                fields=['-fecha_entrega', '-id'],
+                name='entrega_pendientes_fecha',
+                condition=models.Q(completada=False)
+            ),
+            models.Index(
+                fields=['-fecha_entrega', '-id'],
+                name='entrega_programadas_fecha',
+                condition=models.Q(fecha_programada__isnull=False)
+            ),
+            models.Index(fields=['version', 'id'], name='entrega_version'),
+        ]
     
     def __str__(self):
         estado = "Completada" if self.completada else "Pendiente"
@@ -36,11 +59,124 @@ class Producto(models.Model):
     unidad_medida = models.CharField(max_length=50)
     codigo = models.CharField(max_length=50, unique=True)
     stock_actual = models.PositiveIntegerField(default=0)
+    # Suma de las reservas activas; se mantiene con actualizaciones atómicas (ver reservas.py)
+    stock_reservado = models.PositiveIntegerField(default=0)
+    # Por debajo de este disponible el producto se reporta con stock bajo
+    stock_minimo = models.PositiveIntegerField(default=0)
+    # Transacción que modificó la fila por última vez (trigger); cursor de la sincronización
+    version = models.BigIntegerField(default=0, editable=False)
     
     class Meta:
         verbose_name = 'Producto'
         verbose_name_plural = 'Productos'
         ordering = ['nombre']
+        indexes = [
+            models.Index(fields=['version', 'id'], name='producto_version'),
+        ]
     
     def __str__(self):
-        return f"{self.nombre} - {self.stock_actual} {self.unidad_medida}" 
\ No newline at end of file
+        return f"{self.nombre} - {self.stock_actual} {self.unidad_medida}"
+    
+    @property
+    def stock_disponible(self):
+        return self.stock_actual - self.stock_reservado
+
+class ReservaStock(models.Model):
+    ESTADO_CHOICES = (
+        ('activa', 'Activa'),
+        ('liberada', 'Liberada'),
+        ('consumida', 'Consumida'),
+    )
+    
+    entrega = models.ForeignKey(
+        Entrega,
+        on_delete=models.CASCADE,
+        related_name='reservas'
+    )
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.PROTECT,
+        related_name='reservas'
+    )
+    cantidad = models.PositiveIntegerField()
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='activa')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Reserva de stock'
+        verbose_name_plural = 'Reservas de stock'
+        ordering = ['-fecha_creacion']
+    
+    def __str__(self):
+        return f"{self.cantidad} {self.producto.nombre} - entrega {self.entrega_id} - {self.get_estado_display()}"
+
+class StockMovimiento(models.Model):
+    """
+    Registro inmutable de cada cambio de stock de un producto. La suma de los
+    movimientos de un producto es igual a su stock_actual.
+    """
+    TIPO_CHOICES = (
+        ('inicial', 'Saldo inicial'),
+        ('ajuste', 'Ajuste manual'),
+        ('entrega', 'Entrega'),
+        ('correccion', 'Corrección de inventario'),
+    )
+    
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.PROTECT,
+        related_name='movimientos'
+    )
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    cantidad = models.IntegerField()  # Positiva para ingresos, negativa para salidas
+    fecha = models.DateTimeField(auto_now_add=True)
+    entrega = models.ForeignKey(
+        Entrega,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='movimientos'
+    )
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='movimientos_stock'
+    )
+    nota = models.TextField(blank=True, null=True)
+    
+    class Meta:
+        verbose_name = 'Movimiento de stock'
+        verbose_name_plural = 'Movimientos de stock'
+        ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['producto', 'fecha'], name='movimiento_producto_fecha'),
+        ]
+    
+    def __str__(self):
+        return f"{self.producto.nombre} {self.cantidad:+d} - {self.get_tipo_display()}"
+
+class CorteStock(models.Model):
+    """
+    Saldo de un producto a una fecha, calculado periódicamente a partir de los
+    movimientos para que las consultas de saldo histórico no sumen todo el registro.
+    """
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name='cortes'
+    )
+    fecha = models.DateTimeField()
+    saldo = models.IntegerField()
+    
+    class Meta:
+        verbose_name = 'Corte de stock'
+        verbose_name_plural = 'Cortes de stock'
+        ordering = ['-fecha']
+        constraints = [
+            models.UniqueConstraint(fields=['producto', 'fecha'], name='corte_producto_fecha_unico'),
+        ]
+    
+    def __str__(self):
+        return f"{self.producto.nombre} - {self.saldo} al {self.fecha:%Y-%m-%d %H:%M}"
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Reservas de stock para las entregas programadas.
+
+Cada producto lleva en stock_reservado la suma de sus reservas activas, por lo que
+el disponible es stock_actual - stock_reservado sin necesidad de agregaciones.
+Las reservas se toman con un UPDATE condicional por producto: solo se bloquean las
+filas de los productos involucrados y nunca se reserva más de lo que hay en stock.
+Estas funciones deben llamarse dentro de transaction.atomic().
+"""
+from django.db.models import F
+from rest_framework import serializers
+
+from apps.cache import versiones
+from .models import Producto, ReservaStock, StockMovimiento
+from . import inventario
+
+
+def reservar(entrega, cantidades, productos):
+    """
+    Reserva para la entrega las cantidades indicadas ({producto_id: cantidad}).
+    productos es el diccionario {id: Producto} ya cargado durante la validación.
+    """
+    # Orden fijo para que dos reservas concurrentes no se bloqueen mutuamente
+    for producto_id in sorted(cantidades):
+        cantidad = cantidades[producto_id]
+        reservado = Producto.objects.filter(
+            pk=producto_id,
+            stock_actual__gte=F('stock_reservado') + cantidad
+        ).update(stock_reservado=F('stock_reservado') + cantidad)
+
+        if not reservado:
+            producto = productos[producto_id]
+            producto.refresh_from_db(fields=['stock_actual', 'stock_reservado'])
+            raise serializers.ValidationError({
+                'productos': f"Stock insuficiente para {producto.nombre}. Disponible: {producto.stock_disponible}"
+            })
+
+    ReservaStock.objects.bulk_create([
+        ReservaStock(entrega=entrega, producto_id=producto_id, cantidad=cantidad)
+        for producto_id, cantidad in cantidades.items()
+    ])
+    # Los UPDATE de stock_reservado no emiten señales
+    versiones.invalidar(Producto)
+
+
+def _cerrar_reservas(entrega, estado):
+    # Bloquear las reservas evita liberarlas o consumirlas dos veces en paralelo
+    reservas = list(entrega.reservas.select_for_update().filter(estado='activa'))
+
+    cantidades = {}
+    for reserva in reservas:
+        cantidades[reserva.producto_id] = cantidades.get(reserva.producto_id, 0) + reserva.cantidad
+
+    ReservaStock.objects.filter(pk__in=[r.pk for r in reservas]).update(estado=estado)
+    return cantidades
+
+
+def liberar(entrega):
+    """
+    Libera las reservas activas de una entrega cancelada.
+    """
+    cantidades = _cerrar_reservas(entrega, 'liberada')
+    inventario.sumar_por_producto(
+        {producto_id: -cantidad for producto_id, cantidad in cantidades.items()},
+        campos=('stock_reservado',)
+    )
+
+
+def consumir(entrega, usuario=None):
+    """
+    Descuenta del stock las reservas activas de una entrega completada, registrando
+    la salida de cada producto en el registro de movimientos.
+    """
+    cantidades = _cerrar_reservas(entrega, 'consumida')
+    inventario.aplicar_movimientos([
+        StockMovimiento(
+            producto_id=producto_id, tipo='entrega', cantidad=-cantidad, usuario=usuario, entrega=entrega)
+        for producto_id, cantidad in cantidades.items()
+    ], descontar_reserva=True)
@@ -1,13 +1,42 @@
 from rest_framework import serializers
-from .models import Entrega, Producto
+from django.db import transaction
+from .models import Entrega, Producto, StockMovimiento
+from . import reservas
 from apps.solicitudes.models import Solicitud
 from apps.users.serializers import UserSerializer
 
 class ProductoSerializer(serializers.ModelSerializer):
+    stock_disponible = serializers.IntegerField(read_only=True)
+    
     class Meta:
         model = Producto
-        fields = ['id', 'nombre', 'descripcion', 'unidad_medida', 'codigo', 'stock_actual']
-        read_only_fields = ['id']
+        fields = ['id', 'nombre', 'descripcion', 'unidad_medida', 'codigo', 'stock_actual',
+                 'stock_reservado', 'stock_disponible', 'stock_minimo']
+        read_only_fields = ['id', 'stock_reservado']
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        # stock_actual solo se indica al crear (stock inicial); después cambia con
+        # movimientos (ajustar_stock, importar) que respetan lo reservado
+        if self.instance is not None:
+            fields['stock_actual'].read_only = True
+        return fields
+    
+    def update(self, instance, validated_data):
+        # Guardar solo los campos enviados para no pisar los saldos de stock,
+        # que se actualizan con aritmética en la base de datos
+        for campo, valor in validated_data.items():
+            setattr(instance, campo, valor)
+        instance.save(update_fields=list(validated_data))
+        return instance
+
+class StockMovimientoSerializer(serializers.ModelSerializer):
+    tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
+    
+    class Meta:
+        model = StockMovimiento
+        fields = ['id', 'producto', 'tipo', 'tipo_display', 'cantidad', 'fecha', 'entrega', 'usuario', 'nota']
+        read_only_fields = fields
 
 class EntregaSerializer(serializers.ModelSerializer):
     encargado_info = UserSerializer(source='encargado', read_only=True)
@@ -15,9 +44,11 @@ class EntregaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Entrega
         fields = ['id', 'solicitud', 'encargado', 'encargado_info', 'fecha_entrega', 
-                 'fecha_programada', 'comentarios', 'evidencia_fotos', 'firma_receptor',
-                 'productos', 'completada']
-        read_only_fields = ['id', 'fecha_entrega']
+                 'fecha_actualizacion', 'fecha_programada', 'comentarios', 'evidencia_fotos',
+                 'firma_receptor', 'productos', 'completada']
+        # productos y completada solo cambian al crear (reserva) y al completar
+        # (consumo): editarlos aparte dejaría las reservas de stock desfasadas
+        read_only_fields = ['id', 'fecha_entrega', 'fecha_actualizacion', 'productos', 'completada']
 
 class EntregaCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -39,7 +70,8 @@ class EntregaCreateSerializer(serializers.ModelSerializer):
         if len(value) == 0:
             raise serializers.ValidationError("Debe incluir al menos un producto")
         
-        # Validar formato de cada producto
+        # Validar formato de cada producto y acumular cantidades por producto
+        cantidades = {}
         for item in value:
             if not isinstance(item, dict):
                 raise serializers.ValidationError("Cada producto debe ser un objeto")
@@ -47,20 +79,35 @@ class EntregaCreateSerializer(serializers.ModelSerializer):
             if 'id' not in item or 'cantidad' not in item:
                 raise serializers.ValidationError("Cada producto debe tener id y cantidad")
             
-            # Verificar que el producto existe
             try:
-                producto = Producto.objects.get(id=item['id'])
-            except Producto.DoesNotExist:
+                producto_id = int(item['id'])
+            except (TypeError, ValueError):
                 raise serializers.ValidationError(f"El producto con id {item['id']} no existe")
             
-            # Verificar que hay suficiente stock
-            if producto.stock_actual < item['cantidad']:
+            if not isinstance(item['cantidad'], int) or item['cantidad'] <= 0:
+                raise serializers.ValidationError("La cantidad debe ser un número entero positivo")
+            
+            cantidades[producto_id] = cantidades.get(producto_id, 0) + item['cantidad']
+        
+        # Cargar todos los productos en una sola consulta
+        productos = Producto.objects.in_bulk(list(cantidades))
+        
+        for producto_id, cantidad in cantidades.items():
+            producto = productos.get(producto_id)
+            if producto is None:
+                raise serializers.ValidationError(f"El producto con id {producto_id} no existe")
+            
+            # Verificación previa; la reserva atómica en create() es la que garantiza el stock
+            if producto.stock_disponible < cantidad:
                 raise serializers.ValidationError(
-                    f"Stock insuficiente para {producto.nombre}. Disponible: {producto.stock_actual}"
+                    f"Stock insuficiente para {producto.nombre}. Disponible: {producto.stock_disponible}"
                 )
         
+        self._cantidades = cantidades
+        self._productos = productos
         return value
     
+    @transaction.atomic
     def create(self, validated_data):
         # Asignar el usuario que crea la entrega
         solicitud = validated_data.get('solicitud')
@@ -70,22 +117,26 @@ class EntregaCreateSerializer(serializers.ModelSerializer):
         validated_data['encargado'] = self.context['request'].user
         validated_data['completada'] = False
         
-        # Asignar datos adicionales para productos
-        productos = validated_data.get('productos', [])
+        # Asignar datos adicionales para productos con los ya cargados en la validación
         productos_completos = []
         
-        for item in productos:
-            producto = Producto.objects.get(id=item['id'])
+        for producto_id, cantidad in self._cantidades.items():
+            producto = self._productos[producto_id]
             productos_completos.append({
-                'id': item['id'],
+                'id': producto_id,
                 'nombre': producto.nombre,
-                'cantidad': item['cantidad'],
+                'cantidad': cantidad,
                 'unidad': producto.unidad_medida
             })
         
         validated_data['productos'] = productos_completos
         
-        return super().create(validated_data)
+        entrega = super().create(validated_data)
+        
+        # Reservar el stock; si otro usuario tomó las últimas unidades se revierte todo
+        reservas.reservar(entrega, self._cantidades, self._productos)
+        
+        return entrega
 
 class EntregaCompletarSerializer(serializers.ModelSerializer):
     class Meta:
@@ -108,6 +159,7 @@ class EntregaCompletarSerializer(serializers.ModelSerializer):
         
         return attrs
     
+    @transaction.atomic
     def update(self, instance, validated_data):
         # Actualizar entrega y marcar como completada
         validated_data['completada'] = True
@@ -117,13 +169,7 @@ class EntregaCompletarSerializer(serializers.ModelSerializer):
         solicitud.estado = 'entregado'
         solicitud.save()
         
-        # Actualizar stock de productos
-        for producto_entregado in instance.productos:
-            try:
-                producto = Producto.objects.get(id=producto_entregado['id'])
-                producto.stock_actual -= producto_entregado['cantidad']
-                producto.save()
-            except Producto.DoesNotExist:
-                pass
+        # Descontar del stock las cantidades reservadas al programar la entrega
+        reservas.consumir(instance, usuario=self.context['request'].user)
         
         return super().update(instance, validated_data) 
\ No newline at end of file
@@ -1,11 +1,17 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import EntregaViewSet, ProductoViewSet
+from core.asincrono import vista_asincrona
 
 router = DefaultRouter()
-router.register(r'', EntregaViewSet)
+# productos va primero para que la ruta de detalle de entregas no la capture
 router.register(r'productos', ProductoViewSet)
+router.register(r'', EntregaViewSet)
 
 urlpatterns = [
+    # GET atendidos por el camino asíncrono
+    path('pendientes/', vista_asincrona(EntregaViewSet, {'get': 'pendientes'})),
+    path('programadas/', vista_asincrona(EntregaViewSet, {'get': 'programadas'})),
+    path('productos/disponibles/', vista_asincrona(ProductoViewSet, {'get': 'disponibles'})),
     path('', include(router.urls)),
 ] 
\ No newline at end of file
@@ -1,45 +1,94 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from datetime import datetime, time
+from django.db import DatabaseError, transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.db.models import Q, F
 
-from .models import Entrega, Producto
+from .models import Entrega, Producto, StockMovimiento
 from .serializers import (
     EntregaSerializer, 
     EntregaCreateSerializer,
     EntregaCompletarSerializer,
-    ProductoSerializer
+    ProductoSerializer,
+    StockMovimientoSerializer
 )
+from . import carga, importacion, inventario, reservas
+from apps.cache.mixins import CacheRespuestasMixin
+from apps.sincronizacion.mixins import SincronizacionMixin
 from apps.solicitudes.permissions import EsAlmacen
+from core.campos import CamposParcialesMixin
+from core.condicional import ConsultaCondicionalMixin
+from core.exportacion import ExportacionMixin
+from core.filters import BusquedaTextoCompleto
+from core.pagination import ListadoPaginadoMixin
 
-class EntregaViewSet(viewsets.ModelViewSet):
+class EntregaViewSet(SincronizacionMixin, ConsultaCondicionalMixin, ExportacionMixin, CamposParcialesMixin, ListadoPaginadoMixin, viewsets.ModelViewSet):
     queryset = Entrega.objects.all()
     serializer_class = EntregaSerializer
     permission_classes = [permissions.IsAuthenticated, EsAlmacen]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['comentarios', 'solicitud__titulo', 'solicitud__ciudadano__username']
+    filter_backends = [BusquedaTextoCompleto, filters.OrderingFilter]
     ordering_fields = ['fecha_entrega', 'fecha_programada', 'completada']
+    # Listados serializados desde .values() (core.valores), con el encargado unido
+    acciones_valores = ['list', 'pendientes', 'programadas']
+    # Días que abarca como máximo un plan de carga
+    MAX_DIAS_PLAN = 62
+    columnas_exportacion = [
+        ('ID', 'id'),
+        ('Solicitud', 'solicitud_id'),
+        ('Título de la solicitud', 'solicitud__titulo'),
+        ('Ciudadano', 'solicitud__ciudadano__username'),
+        ('Encargado', 'encargado__username'),
+        ('Fecha programada', 'fecha_programada'),
+        ('Fecha de registro', 'fecha_entrega'),
+        ('Completada', 'completada'),
+        ('Comentarios', 'comentarios'),
+    ]
+    # Una línea por producto entregado
+    expandir_exportacion = ('productos', [
+        ('ID producto', 'id'),
+        ('Producto', 'nombre'),
+        ('Cantidad', 'cantidad'),
+        ('Unidad', 'unidad'),
+    ])
     
     def get_queryset(self):
         user = self.request.user
         
+        # Cargar el encargado en la misma consulta
+        queryset = Entrega.objects.select_related('encargado')
+        
         # Superusuarios ven todo
         if user.is_superuser:
-            return Entrega.objects.all()
+            return queryset
         
         # Personal de almacén ve todas las entregas
         if user.rol == 'almacen':
-            return Entrega.objects.all()
+            return queryset
         
         # Otros roles ven entregas asociadas a sus solicitudes
         if user.rol in ['recepcion', 'representante', 'trabajo_social']:
-            return Entrega.objects.all()
+            return queryset
         
         # Ciudadanos ven entregas de sus solicitudes
         if user.rol == 'ciudadano':
-            return Entrega.objects.filter(solicitud__ciudadano=user)
+            return queryset.filter(solicitud__ciudadano=user)
         
-        return Entrega.objects.none()
+        return queryset.none()
+    
+    def alcance_eliminaciones(self, eliminaciones):
+        """
+        Las mismas reglas de get_queryset sobre el ciudadano que tenía la entrega.
+        """
+        user = self.request.user
+        if user.is_superuser or user.rol in ['almacen', 'recepcion', 'representante', 'trabajo_social']:
+            return eliminaciones
+        if user.rol == 'ciudadano':
+            return eliminaciones.filter(ciudadano_id=user.pk)
+        return eliminaciones.none()
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -48,6 +97,35 @@ class EntregaViewSet(viewsets.ModelViewSet):
             return EntregaCompletarSerializer
         return EntregaSerializer
     
+    def destroy(self, request, *args, **kwargs):
+        """
+        Cancelar una entrega: libera el stock reservado y devuelve la solicitud
+        a aprobada por trabajo social para que pueda reprogramarse.
+        """
+        entrega = self.get_object()
+        
+        with transaction.atomic():
+            entrega = self._bloquear(entrega)
+            if entrega is None:
+                return Response(status=status.HTTP_404_NOT_FOUND)
+            
+            if entrega.completada:
+                return Response(
+                    {"error": "No se puede cancelar una entrega completada"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            reservas.liberar(entrega)
+            
+            solicitud = entrega.solicitud
+            if solicitud.estado == 'en_entrega':
+                solicitud.estado = 'aprobado_social'
+                solicitud.save()
+            
+            entrega.delete()
+        
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
     @action(detail=True, methods=['patch'])
     def completar(self, request, pk=None):
         """
@@ -55,26 +133,37 @@ class EntregaViewSet(viewsets.ModelViewSet):
         """
         entrega = self.get_object()
         
-        if entrega.completada:
-            return Response(
-                {"error": "Esta entrega ya está marcada como completada"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        serializer = self.get_serializer(entrega, data=request.data, partial=True)
-        serializer.is_valid(raise_exception=True)
-        serializer.save(completada=True)
+        with transaction.atomic():
+            entrega = self._bloquear(entrega)
+            if entrega is None:
+                return Response(status=status.HTTP_404_NOT_FOUND)
+            
+            if entrega.completada:
+                return Response(
+                    {"error": "Esta entrega ya está marcada como completada"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            serializer = self.get_serializer(entrega, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save(completada=True)
         
         return Response(serializer.data)
     
+    def _bloquear(self, entrega):
+        """
+        Vuelve a leer la entrega bloqueando su fila hasta el final de la transacción,
+        para que completarla y cancelarla no se crucen. None si ya se eliminó.
+        """
+        return Entrega.objects.select_for_update().filter(pk=entrega.pk).first()
+    
     @action(detail=False, methods=['get'])
     def pendientes(self, request):
         """
         Listar entregas pendientes.
         """
         queryset = self.get_queryset().filter(completada=False)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.listar_paginado(queryset)
     
     @action(detail=False, methods=['get'])
     def programadas(self, request):
@@ -82,47 +171,200 @@ class EntregaViewSet(viewsets.ModelViewSet):
         Listar entregas con fecha programada.
         """
         queryset = self.get_queryset().filter(fecha_programada__isnull=False)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.listar_paginado(queryset)
+    
+    @action(detail=False, methods=['get'])
+    def plan_carga(self, request):
+        """
+        Plan de carga de las entregas pendientes programadas entre desde y hasta
+        (AAAA-MM-DD, por defecto hoy y desde): la lista de carga por producto con lo que
+        el plan toma del stock mínimo y, si se indica capacidad (unidades de producto por
+        vehículo), el reparto de las entregas de cada día en vehículos.
+        """
+        parametros = request.query_params
+        
+        fechas = {}
+        for nombre in ('desde', 'hasta'):
+            valor = parametros.get(nombre)
+            try:
+                fechas[nombre] = parse_date(valor) if valor else fechas.get('desde', timezone.localdate())
+            except ValueError:
+                fechas[nombre] = None
+            if fechas[nombre] is None:
+                return Response(
+                    {"error": f"{nombre} debe tener formato AAAA-MM-DD"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        desde, hasta = fechas['desde'], fechas['hasta']
+        if not 0 <= (hasta - desde).days < self.MAX_DIAS_PLAN:
+            return Response(
+                {"error": f"hasta no puede ser anterior a desde ni estar a más de {self.MAX_DIAS_PLAN} días"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        capacidad = None
+        if 'capacidad' in parametros:
+            try:
+                capacidad = int(parametros['capacidad'])
+            except ValueError:
+                capacidad = 0
+            if capacidad <= 0:
+                return Response(
+                    {"error": "La capacidad debe ser un número entero positivo"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        entregas = self.filter_queryset(self.get_queryset()).filter(
+            completada=False,
+            fecha_programada__range=(desde, hasta)
+        )
+        lista, dias = carga.planificar(entregas, capacidad)
+        
+        return Response({
+            "desde": desde,
+            "hasta": hasta,
+            "capacidad": capacidad,
+            "faltantes": sum(1 for fila in lista if fila['faltante']),
+            "lista": lista,
+            "dias": dias,
+        })
 
-class ProductoViewSet(viewsets.ModelViewSet):
+class ProductoViewSet(SincronizacionMixin, CacheRespuestasMixin, CamposParcialesMixin, ListadoPaginadoMixin, viewsets.ModelViewSet):
     queryset = Producto.objects.all()
     serializer_class = ProductoSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'descripcion', 'codigo']
     ordering_fields = ['nombre', 'stock_actual']
+    cache_dependencias = {'list': [Producto], 'disponibles': [Producto]}
+    
+    def alcance_cache(self):
+        # El catálogo es el mismo para todos los usuarios
+        return 'todos'
     
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'importar']:
             return [permissions.IsAuthenticated(), EsAlmacen()]
         return [permissions.IsAuthenticated()]
     
+    @transaction.atomic
+    def perform_create(self, serializer):
+        producto = serializer.save(stock_actual=0)
+        # El stock inicial entra al inventario como movimiento
+        inventario.aplicar_movimientos([StockMovimiento(
+            producto=producto,
+            tipo='inicial',
+            cantidad=serializer.validated_data.get('stock_actual', 0),
+            usuario=self.request.user
+        )])
+        producto.refresh_from_db()
+    
     @action(detail=False, methods=['get'])
     def disponibles(self, request):
         """
-        Listar productos con stock disponible.
+        Listar productos con stock disponible (descontando las reservas activas).
         """
-        queryset = self.get_queryset().filter(stock_actual__gt=0)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.get_queryset().filter(stock_actual__gt=F('stock_reservado'))
+        return self.listar_paginado(queryset)
     
     @action(detail=True, methods=['post'])
     def ajustar_stock(self, request, pk=None):
         """
-        Ajustar el stock de un producto.
+        Ajustar el stock de un producto: suma la cantidad indicada o, con conteo,
+        corrige el stock a ese valor absoluto.
         """
         producto = self.get_object()
-        cantidad = request.data.get('cantidad', 0)
         
-        if not isinstance(cantidad, int):
+        if 'conteo' in request.data:
+            conteo = request.data.get('conteo')
+            if not isinstance(conteo, int) or conteo < 0:
+                return Response(
+                    {"error": "El conteo debe ser un número entero no negativo"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            with transaction.atomic():
+                inventario.fijar(producto.pk, conteo, usuario=request.user, nota=request.data.get('nota'))
+        else:
+            cantidad = request.data.get('cantidad', 0)
+            
+            if not isinstance(cantidad, int):
+                return Response(
+                    {"error": "La cantidad debe ser un número entero"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            with transaction.atomic():
+                inventario.ajustar(producto.pk, cantidad, usuario=request.user, nota=request.data.get('nota'))
+        
+        producto.refresh_from_db()
+        serializer = self.get_serializer(producto)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['post'])
+    def importar(self, request):
+        """
+        Importar conteos y ajustes de stock en bloque, creando los productos nuevos.
+        
+        Acepta un arreglo JSON o un CSV (Content-Type: text/csv) con las columnas
+        codigo y cantidad (ajuste) o conteo (valor absoluto); nombre, unidad_medida
+        y descripcion son opcionales y crean o actualizan el producto. Todo se aplica
+        en una sola transacción y se devuelve el resultado de cada fila.
+        """
+        try:
+            filas = importacion.leer_filas(request)
+            with transaction.atomic():
+                resumen, salida = importacion.importar(filas, request.user)
+        except ValueError as error:
+            return Response({"error": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        except DatabaseError as error:
             return Response(
-                {"error": "La cantidad debe ser un número entero"},
+                {"error": f"La importación se revirtió por un error de base de datos: {error}"},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        producto.stock_actual = max(0, producto.stock_actual + cantidad)
-        producto.save()
+        return StreamingHttpResponse(importacion.reporte_json(resumen, salida), content_type='application/json')
+    
+    @action(detail=True, methods=['get'])
+    def movimientos(self, request, pk=None):
+        """
+        Listar los movimientos de stock de un producto.
+        """
+        producto = self.get_object()
+        queryset = producto.movimientos.all()
         
-        serializer = self.get_serializer(producto)
-        return Response(serializer.data) 
\ No newline at end of file
+        # La paginación toma ?ordering= con los campos permitidos del viewset, que son
+        # de Producto; los movimientos tienen los suyos
+        self.ordering_fields = ['fecha', 'cantidad', 'tipo']
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = StockMovimientoSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = StockMovimientoSerializer(queryset, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def saldo(self, request, pk=None):
+        """
+        Consultar el saldo de un producto a una fecha (?fecha=AAAA-MM-DD o fecha y hora ISO).
+        """
+        producto = self.get_object()
+        fecha = request.query_params.get('fecha')
+        
+        if not fecha:
+            return Response({"producto": producto.pk, "fecha": timezone.now(), "saldo": producto.stock_actual})
+        
+        momento = parse_datetime(fecha)
+        if momento is None:
+            dia = parse_date(fecha)
+            if dia is None:
+                return Response(
+                    {"error": "La fecha debe tener formato AAAA-MM-DD o ISO 8601"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            # Un día completo incluye todos sus movimientos
+            momento = datetime.combine(dia, time.max)
+        if timezone.is_naive(momento):
+            momento = timezone.make_aware(momento)
+        
+        return Response({"producto": producto.pk, "fecha": momento, "saldo": inventario.saldo_al(producto.pk, momento)}) 
\ No newline at end of file
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+class EventosConfig(AppConfig):
+    name = 'apps.eventos'
+    
+    def ready(self):
+        # Registrar los receptores que publican los eventos
+        from . import receptores  # noqa: F401
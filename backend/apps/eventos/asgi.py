@@ -0,0 +1,188 @@
+"""
+Conexiones de eventos en vivo, atendidas directamente como aplicación ASGI.
+
+GET /api/eventos/ abre un flujo Server-Sent Events y /ws/eventos/ un WebSocket; el
+resto de rutas pasa a Django. Las conexiones no atraviesan el ciclo de petición de
+Django: cada una es una corrutina que espera en su cola del broker o la desconexión
+del cliente, y solo la autenticación se ejecuta en un hilo.
+
+El token de Supabase se envía en ?token= (EventSource y WebSocket del navegador no
+permiten encabezados) o en Authorization: Bearer. Un cliente SSE que reconecta envía
+Last-Event-ID y recibe los eventos que perdió si siguen en el historial del broker.
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework import exceptions
+
+from core.authentication import SupabaseJWTAuthentication
+from .broker import obtener_broker
+from .visibilidad import filtro_usuario
+
+RUTA_SSE = '/api/eventos/'
+RUTA_WEBSOCKET = '/ws/eventos/'
+
+
+def _usuario_del_token(token):
+    close_old_connections()
+    try:
+        return SupabaseJWTAuthentication().autenticar_token(token)[0]
+    except exceptions.AuthenticationFailed:
+        return None
+    finally:
+        close_old_connections()
+
+
+def _encabezados(scope):
+    return {nombre.decode('latin-1').lower(): valor.decode('latin-1') for nombre, valor in scope['headers']}
+
+
+async def autenticar(scope, encabezados):
+    token = parse_qs(scope.get('query_string', b'').decode()).get('token', [None])[0]
+    autorizacion = encabezados.get('authorization', '').split()
+    if token is None and len(autorizacion) == 2 and autorizacion[0].lower() == 'bearer':
+        token = autorizacion[1]
+    if not token:
+        return None
+    return await sync_to_async(_usuario_del_token)(token)
+
+
+def origen_permitido(encabezados):
+    origen = encabezados.get('origin')
+    if origen is None or settings.CORS_ALLOW_ALL_ORIGINS or origen in settings.CORS_ALLOWED_ORIGINS:
+        return origen
+    return False
+
+
+async def _esperar_desconexion(receive, tipo):
+    while (await receive())['type'] != tipo:
+        pass
+
+
+async def atender(suscripcion, enviar, receive, tipo_desconexion):
+    """
+    Envía los eventos de la suscripción hasta que el cliente se desconecta.
+    enviar(None) se llama tras settings.EVENTOS_LATIDO segundos sin eventos.
+    """
+    desconexion = asyncio.ensure_future(_esperar_desconexion(receive, tipo_desconexion))
+    try:
+        while True:
+            siguiente = asyncio.ensure_future(suscripcion.siguiente(settings.EVENTOS_LATIDO))
+            await asyncio.wait({siguiente, desconexion}, return_when=asyncio.FIRST_COMPLETED)
+            if desconexion.done():
+                siguiente.cancel()
+                return
+            await enviar(siguiente.result())
+    except ConnectionAbortedError:
+        # El cliente no consumía: se cierra y al reconectar recupera lo pendiente
+        return
+    finally:
+        desconexion.cancel()
+        obtener_broker().cancelar(suscripcion)
+
+
+def formato_sse(evento):
+    datos = json.dumps(evento['datos'], ensure_ascii=False)
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {datos}\n\n".encode()
+
+
+async def _responder_json(send, estado, datos, encabezados=()):
+    await send({
+        'type': 'http.response.start',
+        'status': estado,
+        'headers': [(b'content-type', b'application/json')] + list(encabezados),
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps(datos).encode()})
+
+
+async def suscribir(filtro, desde=None):
+    broker = obtener_broker()
+    # La primera suscripción del proceso abre la escucha del broker (conexión y
+    # consulta a la base de datos): en un hilo, sin detener las demás conexiones
+    if not broker.escuchando:
+        await sync_to_async(broker.iniciar, thread_sensitive=False)()
+    return broker.suscribir(filtro, desde)
+
+
+async def sse(scope, receive, send):
+    encabezados = _encabezados(scope)
+    origen = origen_permitido(encabezados)
+    cors = [(b'access-control-allow-origin', origen.encode()), (b'vary', b'Origin')] if origen else []
+
+    if scope['method'] != 'GET':
+        await _responder_json(send, 405, {"error": "Método no permitido"}, [(b'allow', b'GET')])
+        return
+    if origen is False:
+        await _responder_json(send, 403, {"error": "Origen no permitido"})
+        return
+
+    usuario = await autenticar(scope, encabezados)
+    if usuario is None:
+        await _responder_json(send, 401, {"error": "Token inválido o ausente"}, cors)
+        return
+
+    ultimo = encabezados.get('last-event-id') or parse_qs(scope['query_string'].decode()).get('ultimo', [''])[0]
+    desde = int(ultimo) if ultimo.isdigit() else None
+    suscripcion = await suscribir(filtro_usuario(usuario), desde)
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            # Evita que un proxy (nginx) acumule el flujo
+            (b'x-accel-buffering', b'no'),
+        ] + cors,
+    })
+    await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+
+    async def enviar(evento):
+        cuerpo = formato_sse(evento) if evento is not None else b': latido\n\n'
+        await send({'type': 'http.response.body', 'body': cuerpo, 'more_body': True})
+
+    await atender(suscripcion, enviar, receive, 'http.disconnect')
+
+
+async def websocket(scope, receive, send):
+    if (await receive())['type'] != 'websocket.connect':
+        return
+
+    encabezados = _encabezados(scope)
+    usuario = await autenticar(scope, encabezados) if origen_permitido(encabezados) is not False else None
+    if usuario is None:
+        await send({'type': 'websocket.close', 'code': 4401})
+        return
+
+    await send({'type': 'websocket.accept'})
+    suscripcion = await suscribir(filtro_usuario(usuario))
+
+    async def enviar(evento):
+        # El servidor ASGI mantiene la conexión con ping/pong; no hace falta latido propio
+        if evento is not None:
+            await send({'type': 'websocket.send', 'text': json.dumps(evento, ensure_ascii=False)})
+
+    await atender(suscripcion, enviar, receive, 'websocket.disconnect')
+
+
+class AplicacionEventos:
+    """
+    Atiende las rutas de eventos y delega el resto en la aplicación de Django.
+    """
+
+    def __init__(self, django):
+        self.django = django
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == RUTA_SSE:
+            return await sse(scope, receive, send)
+        if scope['type'] == 'websocket':
+            if scope['path'] == RUTA_WEBSOCKET:
+                return await websocket(scope, receive, send)
+            await send({'type': 'websocket.close', 'code': 4404})
+            return
+        return await self.django(scope, receive, send)
@@ -0,0 +1,300 @@
+"""
+Broker de eventos del flujo de trabajo.
+
+El broker en memoria reparte cada evento a las suscripciones del mismo proceso: cada
+conexión abierta (SSE o WebSocket) es una corrutina esperando en su propia cola, sin
+hilo asociado, por lo que un worker ASGI puede mantener miles de conexiones inactivas.
+
+Con varios procesos o nodos se usa BrokerPostgres (el predeterminado): cada evento se
+guarda en la tabla eventos_evento, cuyo id es la secuencia global de los eventos, y
+se anuncia con NOTIFY; cada proceso escucha con LISTEN en una conexión propia y lo
+reparte a sus suscripciones igual que el broker en memoria.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import select
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Suscripcion:
+    """
+    Cola de eventos de una conexión, leída desde su event loop.
+    """
+
+    def __init__(self, loop, filtro, maximo):
+        self.loop = loop
+        self.filtro = filtro
+        self.cola = asyncio.Queue(maxsize=maximo)
+        # Se marca cuando el cliente no consume y su cola se llenó
+        self.desbordada = False
+
+    def entregar(self, evento):
+        # Siempre se ejecuta en el loop de la suscripción. Si el cliente no consume se
+        # deja de encolar y la conexión se cierra; al reconectar retoma con Last-Event-ID.
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            self.desbordada = True
+
+    async def siguiente(self, espera):
+        """
+        Siguiente evento, o None si pasaron `espera` segundos sin eventos.
+        """
+        if self.desbordada:
+            raise ConnectionAbortedError('Cola de eventos desbordada')
+        # Con eventos en espera se evita la tarea que crea wait_for
+        if not self.cola.empty():
+            return self.cola.get_nowait()
+        try:
+            return await asyncio.wait_for(self.cola.get(), espera)
+        except asyncio.TimeoutError:
+            return None
+
+
+def _entregar(entregas):
+    for suscripcion, evento in entregas:
+        suscripcion.entregar(evento)
+
+
+class BrokerMemoria:
+    """
+    Broker dentro del proceso. publicar() puede llamarse desde cualquier hilo.
+    """
+
+    def __init__(self, historial=500, maximo_cola=100):
+        self.maximo_cola = maximo_cola
+        self._suscripciones = set()
+        self._lock = threading.Lock()
+        self._secuencia = itertools.count(1)
+        # Últimos eventos para reanudar con Last-Event-ID tras una reconexión
+        self._historial = deque(maxlen=historial)
+
+    def publicar(self, tipo, datos):
+        return self.publicar_lote([(tipo, datos)])[0]
+
+    def publicar_lote(self, eventos):
+        """
+        Publica en orden los eventos [(tipo, datos)] y los devuelve con su id.
+        """
+        with self._lock:
+            eventos = [{'id': next(self._secuencia), 'tipo': tipo, 'datos': datos} for tipo, datos in eventos]
+        self._repartir(eventos)
+        return eventos
+
+    def _repartir(self, eventos):
+        with self._lock:
+            self._historial.extend(eventos)
+            suscripciones = list(self._suscripciones)
+
+        # Un solo aviso a cada loop con todo lo que le corresponde, en lugar de uno por
+        # suscripción: despertar al loop desde otro hilo es lo que más cuesta
+        por_loop = {}
+        for evento in eventos:
+            for suscripcion in suscripciones:
+                if suscripcion.filtro(evento):
+                    por_loop.setdefault(suscripcion.loop, []).append((suscripcion, evento))
+        for loop, entregas in por_loop.items():
+            loop.call_soon_threadsafe(_entregar, entregas)
+
+    @property
+    def escuchando(self):
+        """
+        Si el broker ya puede repartir en este proceso; si no, hay que llamar a
+        iniciar(), que puede bloquear, fuera del event loop.
+        """
+        return True
+
+    def iniciar(self):
+        pass
+
+    def suscribir(self, filtro, desde=None):
+        """
+        Registra una suscripción en el loop actual. Con `desde` se encolan primero los
+        eventos del historial posteriores a ese id.
+        """
+        suscripcion = Suscripcion(asyncio.get_running_loop(), filtro, self.maximo_cola)
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+            if desde is None:
+                return suscripcion
+            historial = list(self._historial)
+
+        pendientes = [evento for evento in historial if evento['id'] > desde and filtro(evento)]
+        perdidos = bool(historial) and historial[0]['id'] > desde + 1
+
+        # Si el historial ya no cubre la desconexión, o lo perdido no cabe en la cola, el
+        # cliente debe sincronizar su copia (ver ?updated_since) y sigue desde el último id
+        if perdidos or len(pendientes) >= self.maximo_cola:
+            suscripcion.entregar({'id': historial[-1]['id'], 'tipo': 'resincronizar', 'datos': {}})
+        else:
+            for evento in pendientes:
+                suscripcion.entregar(evento)
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    @property
+    def conexiones(self):
+        return len(self._suscripciones)
+
+
+class BrokerPostgres(BrokerMemoria):
+    """
+    Broker entre procesos con LISTEN/NOTIFY de PostgreSQL.
+
+    publicar_lote() inserta los eventos y envía sus ids por el canal en la misma
+    transacción (los ids separados por comas, en avisos de menos de 8000 bytes, el
+    límite de NOTIFY); el hilo de escucha de cada proceso lee los eventos anunciados y los reparte. Al
+    iniciar la escucha el historial se carga de la tabla, así un worker nuevo también
+    puede reanudar una conexión con Last-Event-ID. Los ids se asignan al insertar y
+    dos publicaciones simultáneas pueden confirmarse en otro orden: un cliente que
+    reanuda justo en ese instante puede perder el de id menor.
+    """
+
+    def __init__(self, historial=500, maximo_cola=100, canal='eventos', alias='default'):
+        super().__init__(historial=historial, maximo_cola=maximo_cola)
+        self.canal = canal
+        self.alias = alias
+        self._pid = None
+        self._ultimo = 0
+
+    def publicar_lote(self, eventos):
+        from .models import Evento
+
+        if not eventos:
+            return []
+        with transaction.atomic(using=self.alias):
+            creados = Evento.objects.using(self.alias).bulk_create(
+                [Evento(tipo=tipo, datos=datos) for tipo, datos in eventos]
+            )
+            avisos, aviso = [], []
+            for evento in creados:
+                if len(aviso) == 500:
+                    avisos.append(','.join(aviso))
+                    aviso = []
+                aviso.append(str(evento.pk))
+            avisos.append(','.join(aviso))
+            with connections[self.alias].cursor() as cursor:
+                # Las notificaciones salen cuando la transacción confirma
+                cursor.execute('SELECT pg_notify(%s, aviso) FROM unnest(%s::text[]) AS aviso', [self.canal, avisos])
+
+        # Se conservan en la tabla los eventos que caben en el historial
+        ultimo = creados[-1].pk
+        if ultimo // 100 != (creados[0].pk - 1) // 100:
+            Evento.objects.using(self.alias).filter(pk__lte=ultimo - self._historial.maxlen).delete()
+        return [{'id': evento.pk, 'tipo': evento.tipo, 'datos': evento.datos} for evento in creados]
+
+    @property
+    def escuchando(self):
+        return self._pid == os.getpid()
+
+    def iniciar(self):
+        self._escuchar()
+
+    def suscribir(self, filtro, desde=None):
+        self._escuchar()
+        return super().suscribir(filtro, desde)
+
+    def _escuchar(self):
+        # Un hilo de escucha por proceso (los workers se crean con fork). Abre una
+        # conexión y carga el historial: desde el event loop, con iniciar() en un hilo
+        if self.escuchando:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            conexion = self._conectar()
+            with conexion.cursor() as cursor:
+                cursor.execute(
+                    'SELECT id, tipo, datos FROM eventos_evento ORDER BY id DESC LIMIT %s',
+                    [self._historial.maxlen]
+                )
+                recientes = cursor.fetchall()
+            self._historial.clear()
+            self._historial.extend(
+                {'id': id, 'tipo': tipo, 'datos': datos} for id, tipo, datos in reversed(recientes)
+            )
+            self._ultimo = recientes[0][0] if recientes else 0
+            self._pid = os.getpid()
+        threading.Thread(target=self._bucle, args=(conexion,), name='eventos-listen', daemon=True).start()
+
+    def _conectar(self):
+        # Conexión propia, fuera del pool: queda abierta esperando notificaciones
+        wrapper = connections[self.alias]
+        conexion = psycopg2.connect(**wrapper.get_connection_params())
+        conexion.autocommit = True
+        with conexion.cursor() as cursor:
+            cursor.execute(f'LISTEN {self.canal}')
+        return conexion
+
+    def _bucle(self, conexion):
+        espera = 1
+        while True:
+            try:
+                if conexion is None:
+                    conexion = self._conectar()
+                    # Lo publicado mientras no se escuchaba
+                    self._leer(conexion, desde=self._ultimo)
+                    espera = 1
+                if select.select([conexion], [], [], 30) == ([], [], []):
+                    continue
+                conexion.poll()
+                ids = [int(id) for aviso in conexion.notifies for id in aviso.payload.split(',')]
+                conexion.notifies.clear()
+                if ids:
+                    self._leer(conexion, ids=ids)
+            except (psycopg2.Error, OSError, ValueError):
+                logger.exception('Se perdió la escucha de eventos; reconectando en %s s', espera)
+                try:
+                    if conexion is not None:
+                        conexion.close()
+                except psycopg2.Error:
+                    pass
+                conexion = None
+                time.sleep(espera)
+                espera = min(espera * 2, 30)
+
+    def _leer(self, conexion, ids=None, desde=None):
+        with conexion.cursor() as cursor:
+            if ids is not None:
+                cursor.execute('SELECT id, tipo, datos FROM eventos_evento WHERE id = ANY(%s) ORDER BY id', [ids])
+            else:
+                cursor.execute('SELECT id, tipo, datos FROM eventos_evento WHERE id > %s ORDER BY id', [desde])
+            eventos = []
+            for id, tipo, datos in cursor.fetchall():
+                # Confirmado entre el LISTEN y la carga inicial: ya está en el historial
+                if id <= self._ultimo and any(evento['id'] == id for evento in self._historial):
+                    continue
+                self._ultimo = max(self._ultimo, id)
+                eventos.append({'id': id, 'tipo': tipo, 'datos': datos})
+        if eventos:
+            self._repartir(eventos)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def obtener_broker():
+    """
+    Instancia única del broker configurado en settings.EVENTOS_BROKER.
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.EVENTOS_BROKER)(**settings.EVENTOS_BROKER_OPCIONES)
+    return _broker
@@ -0,0 +1,131 @@
+import asyncio
+import multiprocessing
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from apps.eventos.models import Evento
+from core.db import pool
+
+TIPO = 'prueba.carga'
+
+
+def _crear_broker():
+    return import_string(settings.EVENTOS_BROKER)(**settings.EVENTOS_BROKER_OPCIONES)
+
+
+def _suscriptor(numero, conexiones, eventos, espera, listos, resultados):
+    """
+    Proceso que abre `conexiones` suscripciones con su propio broker, como un worker,
+    y devuelve lo que recibió cada una.
+    """
+
+    async def atender(suscripcion):
+        numeros, latencias = [], []
+        try:
+            while len(numeros) < eventos:
+                evento = await suscripcion.siguiente(espera)
+                if evento is None:
+                    break
+                latencias.append(time.time() - evento['datos']['enviado'])
+                numeros.append(evento['datos']['numero'])
+        except ConnectionAbortedError:
+            pass
+        return numeros, latencias, suscripcion.desbordada
+
+    async def principal():
+        broker = _crear_broker()
+        suscripciones = [broker.suscribir(lambda evento: evento['tipo'] == TIPO) for _ in range(conexiones)]
+        listos.put(numero)
+        respuestas = await asyncio.gather(*(atender(suscripcion) for suscripcion in suscripciones))
+        for suscripcion in suscripciones:
+            broker.cancelar(suscripcion)
+        return respuestas
+
+    respuestas = asyncio.run(principal())
+    recibidos = sum(len(numeros) for numeros, _, _ in respuestas)
+    desordenadas = sum(numeros != sorted(numeros) for numeros, _, _ in respuestas)
+    duplicados = sum(len(numeros) - len(set(numeros)) for numeros, _, _ in respuestas)
+    desbordadas = sum(desbordada for _, _, desbordada in respuestas)
+    latencias = [latencia for _, muestras, _ in respuestas for latencia in muestras]
+    resultados.put((numero, recibidos, desordenadas, duplicados, desbordadas, latencias))
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga del broker de eventos (settings.EVENTOS_BROKER): varios procesos, '
+        'como los workers de gunicorn, abren suscripciones y este proceso publica eventos; '
+        'se comprueba que cada suscripción los reciba todos y se mide la latencia. Los '
+        'eventos de prueba llegan a los superusuarios conectados; usar en una base de desarrollo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=4)
+        parser.add_argument('--conexiones', type=int, default=250, help='Suscripciones por proceso.')
+        parser.add_argument('--eventos', type=int, default=500)
+        parser.add_argument('--ritmo', type=float, default=200, help='Eventos por segundo (0: sin pausa).')
+        parser.add_argument('--espera', type=float, default=10, help='Segundos sin eventos tras los que una suscripción termina.')
+
+    def handle(self, *args, **options):
+        # Los procesos se crean con fork: no deben heredar conexiones abiertas
+        connections.close_all()
+        pool.cerrar_todos()
+
+        contexto = multiprocessing.get_context('fork')
+        listos, resultados = contexto.Queue(), contexto.Queue()
+        procesos = [
+            contexto.Process(
+                target=_suscriptor,
+                args=(numero, options['conexiones'], options['eventos'], options['espera'], listos, resultados),
+            )
+            for numero in range(options['procesos'])
+        ]
+        for proceso in procesos:
+            proceso.start()
+        for _ in procesos:
+            listos.get(timeout=60)
+
+        broker = _crear_broker()
+        pausa = 1 / options['ritmo'] if options['ritmo'] > 0 else 0
+        primero = None
+        comienzo = time.perf_counter()
+        for numero in range(options['eventos']):
+            evento = broker.publicar(TIPO, {'numero': numero, 'enviado': time.time()})
+            if primero is None:
+                primero = evento['id']
+            if pausa:
+                time.sleep(max(comienzo + (numero + 1) * pausa - time.perf_counter(), 0))
+        duracion = time.perf_counter() - comienzo
+
+        filas = sorted(resultados.get(timeout=options['espera'] + 120) for _ in procesos)
+        for proceso in procesos:
+            proceso.join()
+        if primero is not None:
+            Evento.objects.filter(pk__gte=primero, tipo=TIPO).delete()
+
+        esperados = options['conexiones'] * options['eventos']
+        self.stdout.write(
+            f"{options['eventos']} eventos publicados en {duracion:.1f} s "
+            f"({options['eventos'] / duracion:.0f}/s) a {options['procesos']} procesos "
+            f"de {options['conexiones']} suscripciones"
+        )
+        latencias = []
+        for numero, recibidos, desordenadas, duplicados, desbordadas, muestras in filas:
+            latencias.extend(muestras)
+            self.stdout.write(
+                f'proceso {numero}: recibidos {recibidos}/{esperados}, desordenadas {desordenadas}, '
+                f'duplicados {duplicados}, colas desbordadas {desbordadas}'
+            )
+        if latencias:
+            latencias.sort()
+            percentil = lambda p: 1000 * latencias[min(int(p * len(latencias)), len(latencias) - 1)]
+            self.stdout.write(
+                f'latencia: mediana {percentil(0.5):.1f} ms, p95 {percentil(0.95):.1f} ms, '
+                f'p99 {percentil(0.99):.1f} ms, máximo {1000 * latencias[-1]:.1f} ms'
+            )
+
+        if any(recibidos != esperados or duplicados for _, recibidos, _, duplicados, _, _ in filas):
+            raise CommandError(f'Hubo suscripciones que no recibieron todos los eventos ({settings.EVENTOS_BROKER})')
@@ -0,0 +1,18 @@
+from django.db import models
+
+class Evento(models.Model):
+    """
+    Evento publicado con BrokerPostgres. El id es la secuencia global que los clientes
+    envían en Last-Event-ID; se conservan los últimos para reanudar conexiones.
+    """
+    tipo = models.CharField(max_length=50)
+    datos = models.JSONField(default=dict)
+    fecha = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Evento'
+        verbose_name_plural = 'Eventos'
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"{self.id} {self.tipo}"
@@ -0,0 +1,73 @@
+"""
+Publicación de eventos del flujo de trabajo.
+
+Los eventos se entregan al broker cuando la transacción confirma, así una conexión
+nunca recibe un cambio que luego se revierte. Los de una misma transacción (las
+acciones por lote publican uno por fila) se entregan juntos con publicar_lote(): una
+sola escritura y un solo aviso en lugar de una transacción por evento.
+
+Cada savepoint tiene su lote, registrado con on_commit cuando recibe el primer
+evento: si el savepoint se revierte, Django descarta el registro y sus eventos no se
+publican. Los lotes se publican en el orden de su primer evento. Un fallo del broker
+se registra (robust) sin convertir en un error una escritura que ya se confirmó.
+"""
+from django.db import transaction
+
+from .broker import obtener_broker
+
+
+def _nuevo_lote(conexion):
+    eventos = []
+
+    def publicar_lote():
+        conexion.__dict__.pop('lotes_eventos', None)
+        obtener_broker().publicar_lote(eventos)
+
+    publicar_lote.eventos = eventos
+    return publicar_lote
+
+
+def publicar(tipo, datos):
+    conexion = transaction.get_connection()
+    if not conexion.in_atomic_block:
+        # Sin transacción on_commit publica de inmediato
+        transaction.on_commit(lambda: obtener_broker().publicar_lote([(tipo, datos)]), robust=True)
+        return
+
+    lotes = conexion.__dict__.setdefault('lotes_eventos', {})
+    clave = tuple(conexion.savepoint_ids)
+    lote = lotes.get(clave)
+    # Un lote que ya no espera la confirmación es de una transacción o un savepoint revertidos
+    if lote is None or not any(funcion is lote for _, funcion, _ in conexion.run_on_commit):
+        lote = lotes[clave] = _nuevo_lote(conexion)
+        transaction.on_commit(lote, robust=True)
+    lote.eventos.append((tipo, datos))
+
+
+def solicitud(tipo, solicitud_id, estado, anterior, ciudadano_id, representante_id):
+    publicar(tipo, {
+        'id': solicitud_id,
+        'estado': estado,
+        'estado_anterior': anterior,
+        'ciudadano_id': ciudadano_id,
+        'representante_id': representante_id,
+    })
+
+
+def inspeccion(tipo, inspeccion):
+    publicar(tipo, {
+        'id': inspeccion.pk,
+        'solicitud_id': inspeccion.solicitud_id,
+        'inspector_id': inspeccion.inspector_id,
+        'resultado': inspeccion.resultado,
+        'solicitud_estado': inspeccion.solicitud.estado,
+    })
+
+
+def entrega(tipo, entrega):
+    publicar(tipo, {
+        'id': entrega.pk,
+        'solicitud_id': entrega.solicitud_id,
+        'ciudadano_id': entrega.solicitud.ciudadano_id,
+        'completada': entrega.completada,
+    })
@@ -0,0 +1,56 @@
+"""
+Eventos a partir de los guardados de Solicitud, Inspeccion y Entrega.
+
+Se recuerda el valor del campo de estado al cargar la instancia y se publica un
+evento solo cuando cambia. Los update() masivos no emiten señales: quien los hace
+publica sus eventos (ver SolicitudViewSet.transicion_lote).
+"""
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+
+from apps.entregas.models import Entrega
+from apps.inspecciones.models import Inspeccion
+from apps.solicitudes.models import Solicitud
+from . import publicacion
+
+# Campo cuyo cambio genera un evento en cada modelo
+CAMPOS = {Solicitud: 'estado', Inspeccion: 'resultado', Entrega: 'completada'}
+
+
+@receiver(post_init, sender=Solicitud)
+@receiver(post_init, sender=Inspeccion)
+@receiver(post_init, sender=Entrega)
+def recordar_estado(sender, instance, **kwargs):
+    # Con campos diferidos el valor no está cargado y no se consulta
+    instance._estado_publicado = instance.__dict__.get(CAMPOS[sender])
+
+
+def _cambio(sender, instance, created):
+    anterior = None if created else instance._estado_publicado
+    actual = getattr(instance, CAMPOS[sender])
+    instance._estado_publicado = actual
+    return anterior, created or anterior != actual
+
+
+@receiver(post_save, sender=Solicitud)
+def publicar_solicitud(sender, instance, created, **kwargs):
+    anterior, cambio = _cambio(sender, instance, created)
+    if cambio:
+        publicacion.solicitud(
+            'solicitud.creada' if created else 'solicitud.estado',
+            instance.pk, instance.estado, anterior, instance.ciudadano_id, instance.representante_id
+        )
+
+
+@receiver(post_save, sender=Inspeccion)
+def publicar_inspeccion(sender, instance, created, **kwargs):
+    anterior, cambio = _cambio(sender, instance, created)
+    if cambio:
+        publicacion.inspeccion('inspeccion.creada' if created else 'inspeccion.resultado', instance)
+
+
+@receiver(post_save, sender=Entrega)
+def publicar_entrega(sender, instance, created, **kwargs):
+    anterior, cambio = _cambio(sender, instance, created)
+    if cambio:
+        publicacion.entrega('entrega.creada' if created else 'entrega.completada', instance)
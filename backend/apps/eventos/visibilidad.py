@@ -0,0 +1,60 @@
+"""
+Qué eventos recibe cada usuario.
+
+Las reglas repiten, sobre los datos del evento, el alcance de get_queryset en
+SolicitudViewSet, InspeccionViewSet y EntregaViewSet: un usuario solo recibe eventos
+de filas que vería en su listado. Un cambio de estado se envía también a quien veía
+la solicitud antes del cambio, para que la quite de su pantalla.
+"""
+from apps.dashboard.contadores import ESTADOS_POR_ROL
+
+
+def solicitud_visible(usuario, datos, estado):
+    if usuario['rol'] == 'ciudadano':
+        return datos['ciudadano_id'] == usuario['id']
+    if usuario['rol'] == 'recepcion':
+        return True
+    if usuario['rol'] == 'representante':
+        return estado == 'pendiente' or datos['representante_id'] == usuario['id']
+    if usuario['rol'] in ESTADOS_POR_ROL:
+        return estado in ESTADOS_POR_ROL[usuario['rol']]
+    return False
+
+
+def inspeccion_visible(usuario, datos):
+    if usuario['rol'] == 'trabajo_social':
+        return datos['inspector_id'] == usuario['id'] or datos['solicitud_estado'] == 'aprobado_representante'
+    return usuario['rol'] in ['representante', 'almacen', 'recepcion']
+
+
+def entrega_visible(usuario, datos):
+    if usuario['rol'] == 'ciudadano':
+        return datos['ciudadano_id'] == usuario['id']
+    return usuario['rol'] in ['almacen', 'recepcion', 'representante', 'trabajo_social']
+
+
+def filtro_usuario(user):
+    """
+    Devuelve la función que decide si un evento se envía al usuario.
+    """
+    # Se copian los datos para no depender de la instancia durante la conexión
+    usuario = {'id': user.pk, 'rol': user.rol, 'superusuario': user.is_superuser}
+
+    def filtro(evento):
+        if usuario['superusuario'] or evento['tipo'] == 'resincronizar':
+            return True
+
+        modelo = evento['tipo'].split('.')[0]
+        datos = evento['datos']
+        if modelo == 'solicitud':
+            return (
+                solicitud_visible(usuario, datos, datos['estado'])
+                or solicitud_visible(usuario, datos, datos.get('estado_anterior'))
+            )
+        if modelo == 'inspeccion':
+            return inspeccion_visible(usuario, datos)
+        if modelo == 'entrega':
+            return entrega_visible(usuario, datos)
+        return False
+
+    return filtro
@@ -0,0 +1,185 @@
+"""
+Consultas espaciales de las inspecciones sin PostGIS.
+
+La columna celda guarda un código de Morton (un geohash en binario): la longitud y la
+latitud se cuantizan en BITS bits cada una sobre 360 grados, de modo que las celdas
+son cuadradas en grados, y se intercalan sus bits. Una celda de la cuadrícula de
+nivel L (lado 360 / 2**L grados) es un intervalo contiguo de códigos, así que un
+rectángulo se cubre con pocos intervalos que el índice B-tree de celda recorre con
+BETWEEN, y el resultado se afina con las coordenadas exactas (o la distancia
+haversine en los radios). Las celdas de un nivel más grueso son los mismos códigos
+desplazados, y con eso se agrupa el mapa de calor.
+
+La columna la calcula un trigger de la base de datos (migración 0007) con la misma
+cuantización que celda().
+"""
+import math
+
+from django.db.models import Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+from .rutas import RADIO_TIERRA
+
+# Bits por coordenada: celdas de 360 / 2**26 grados (unos 60 cm) en el nivel más fino
+BITS = 26
+LADO = 1 << BITS
+# Intervalos de celdas con los que se cubre como máximo un rectángulo; los bordes se
+# cubren con celdas más grandes y el filtro exacto descarta lo que sobra
+MAX_INTERVALOS = 24
+# Radio inicial de la búsqueda de las más cercanas (km); se multiplica hasta encontrarlas
+RADIO_INICIAL = 2.0
+# Media circunferencia: a esta distancia el círculo cubre toda la Tierra
+RADIO_MAXIMO = math.pi * RADIO_TIERRA
+
+
+def _cuantizar(valor, minimo, limite):
+    return min(max(math.floor((valor - minimo) / 360 * LADO), 0), limite - 1)
+
+
+def celda(lat, lng):
+    """
+    Código de la celda más fina que contiene el punto (igual al del trigger).
+    """
+    return intercalar(_cuantizar(lng, -180, LADO), _cuantizar(lat, -90, LADO // 2))
+
+
+def intercalar(x, y):
+    codigo = 0
+    for bit in range(BITS):
+        codigo |= ((x >> bit) & 1) << (2 * bit) | ((y >> bit) & 1) << (2 * bit + 1)
+    return codigo
+
+
+def separar(codigo):
+    x = y = 0
+    for bit in range(BITS):
+        x |= ((codigo >> (2 * bit)) & 1) << bit
+        y |= ((codigo >> (2 * bit + 1)) & 1) << bit
+    return x, y
+
+
+def centro(grupo, nivel):
+    """
+    (lat, lng) del centro de la celda `grupo` del nivel dado (celda >> 2 * (BITS - nivel)).
+    """
+    x, y = separar(grupo)
+    lado = 360 / (1 << nivel)
+    return -90 + (y + 0.5) * lado, -180 + (x + 0.5) * lado
+
+
+def intervalos(sur, oeste, norte, este):
+    """
+    Intervalos (desde, hasta) de códigos que cubren el rectángulo, sin cruzar el
+    antimeridiano (oeste <= este).
+    """
+    x0, x1 = _cuantizar(oeste, -180, LADO), _cuantizar(este, -180, LADO)
+    y0, y1 = _cuantizar(sur, -90, LADO // 2), _cuantizar(norte, -90, LADO // 2)
+
+    # Se baja por el árbol de cuadrantes: las celdas dentro del rectángulo quedan
+    # como intervalos y las del borde se dividen mientras no se pase del máximo
+    cubiertos, bordes = [], [(0, 0)]
+    for nivel in range(BITS + 1):
+        lado = 1 << (BITS - nivel)
+        parciales = []
+        for i, j in bordes:
+            if x0 <= i * lado and (i + 1) * lado - 1 <= x1 and y0 <= j * lado and (j + 1) * lado - 1 <= y1:
+                cubiertos.append((i, j, nivel))
+            else:
+                parciales.append((i, j))
+        if not parciales:
+            break
+
+        mitad = lado // 2
+        hijos = [
+            (2 * i + di, 2 * j + dj)
+            for i, j in parciales
+            for di in (0, 1)
+            for dj in (0, 1)
+            if (2 * i + di) * mitad <= x1 and x0 <= (2 * i + di + 1) * mitad - 1
+            and (2 * j + dj) * mitad <= y1 and y0 <= (2 * j + dj + 1) * mitad - 1
+        ]
+        if nivel == BITS or len(cubiertos) + len(hijos) > MAX_INTERVALOS:
+            cubiertos.extend((i, j, nivel) for i, j in parciales)
+            break
+        bordes = hijos
+
+    rangos = []
+    for i, j, nivel in sorted(cubiertos, key=lambda c: intercalar(c[0], c[1]) << 2 * (BITS - c[2])):
+        desplazamiento = 2 * (BITS - nivel)
+        desde = intercalar(i, j) << desplazamiento
+        hasta = desde + (1 << desplazamiento) - 1
+        # Los intervalos contiguos se unen en uno
+        if rangos and rangos[-1][1] + 1 == desde:
+            rangos[-1] = (rangos[-1][0], hasta)
+        else:
+            rangos.append((desde, hasta))
+    return rangos
+
+
+def en_rectangulo(sur, oeste, norte, este):
+    """
+    Q con las inspecciones dentro del rectángulo. Si oeste > este el rectángulo
+    cruza el antimeridiano.
+    """
+    if oeste <= este:
+        partes = [(oeste, este)]
+        longitud = Q(lng__gte=oeste, lng__lte=este)
+    else:
+        partes = [(oeste, 180), (-180, este)]
+        longitud = Q(lng__gte=oeste) | Q(lng__lte=este)
+
+    celdas = Q()
+    for desde_lng, hasta_lng in partes:
+        for desde, hasta in intervalos(sur, desde_lng, norte, hasta_lng):
+            celdas |= Q(celda__range=(desde, hasta))
+    return celdas & Q(lat__gte=sur, lat__lte=norte) & longitud
+
+
+def rectangulo_radio(lat, lng, radio_km):
+    """
+    (sur, oeste, norte, este) del rectángulo que contiene el círculo.
+    """
+    angulo = radio_km / RADIO_TIERRA
+    sur = max(lat - math.degrees(angulo), -90)
+    norte = min(lat + math.degrees(angulo), 90)
+    # Si el círculo contiene un polo abarca todas las longitudes
+    if sur == -90 or norte == 90 or math.sin(angulo) >= math.cos(math.radians(lat)):
+        return sur, -180, norte, 180
+
+    # Mayor diferencia de longitud de los puntos del círculo
+    ancho = math.degrees(math.asin(math.sin(angulo) / math.cos(math.radians(lat))))
+    oeste, este = lng - ancho, lng + ancho
+    if oeste < -180:
+        oeste += 360
+    if este > 180:
+        este -= 360
+    return sur, oeste, norte, este
+
+
+def distancia_km(lat, lng):
+    """
+    Expresión con la distancia haversine en km de la inspección al punto.
+    """
+    lat0, lng0 = math.radians(lat), math.radians(lng)
+    a = (
+        Power(Sin((Radians('lat') - lat0) / 2), 2)
+        + math.cos(lat0) * Cos(Radians('lat')) * Power(Sin((Radians('lng') - lng0) / 2), 2)
+    )
+    return 2 * RADIO_TIERRA * ASin(Sqrt(Least(a, Value(1.0))))
+
+
+def cercanas(queryset, lat, lng, k):
+    """
+    Las k inspecciones más cercanas al punto, con distancia_km anotada. Se buscan en
+    círculos cada vez mayores hasta que uno contiene k: las k más cercanas de ese
+    círculo son las k más cercanas de todas.
+    """
+    radio = RADIO_INICIAL
+    while True:
+        candidatas = queryset.filter(en_rectangulo(*rectangulo_radio(lat, lng, radio))).annotate(
+            distancia_km=distancia_km(lat, lng)
+        ).filter(distancia_km__lte=radio).order_by('distancia_km', 'pk')
+        encontradas = list(candidatas[:k])
+        if len(encontradas) == k or radio >= RADIO_MAXIMO:
+            return encontradas
+        radio = min(radio * 4, RADIO_MAXIMO)
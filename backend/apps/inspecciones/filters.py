@@ -0,0 +1,62 @@
+from rest_framework import filters, serializers
+
+from . import espacial
+
+
+def _numeros(valor, cantidad, nombre):
+    try:
+        numeros = [float(parte) for parte in valor.split(',')]
+    except ValueError:
+        numeros = []
+    if len(numeros) != cantidad:
+        raise serializers.ValidationError({'error': f'{nombre} debe tener {cantidad} números separados por comas'})
+    return numeros
+
+
+def leer_punto(parametros):
+    """
+    (lat, lng) de los parámetros lat y lng.
+    """
+    if 'lat' not in parametros or 'lng' not in parametros:
+        raise serializers.ValidationError({'error': 'Se requieren lat y lng'})
+    lat, = _numeros(parametros['lat'], 1, 'lat')
+    lng, = _numeros(parametros['lng'], 1, 'lng')
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise serializers.ValidationError({'error': 'lat debe estar entre -90 y 90 y lng entre -180 y 180'})
+    return lat, lng
+
+
+class FiltroEspacial(filters.BaseFilterBackend):
+    """
+    Filtros por ubicación con el índice de celdas (apps.inspecciones.espacial).
+
+    ?bbox=oeste,sur,este,norte deja las inspecciones dentro del rectángulo (si oeste
+    es mayor que este cruza el antimeridiano) y ?lat=..&lng=..&radio=<km> las que
+    están a esa distancia en línea recta. Las inspecciones sin coordenadas no pasan
+    ninguno de los dos filtros.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        parametros = request.query_params
+
+        if 'bbox' in parametros:
+            oeste, sur, este, norte = _numeros(parametros['bbox'], 4, 'bbox')
+            if not (-90 <= sur <= norte <= 90 and -180 <= oeste <= 180 and -180 <= este <= 180):
+                raise serializers.ValidationError({
+                    'error': 'bbox debe ser oeste,sur,este,norte con sur <= norte'
+                })
+            queryset = queryset.filter(espacial.en_rectangulo(sur, oeste, norte, este))
+
+        if 'radio' in parametros:
+            lat, lng = leer_punto(parametros)
+            radio, = _numeros(parametros['radio'], 1, 'radio')
+            if not radio > 0:
+                raise serializers.ValidationError({'error': 'radio debe ser mayor que cero'})
+            radio = min(radio, espacial.RADIO_MAXIMO)
+            queryset = queryset.filter(
+                espacial.en_rectangulo(*espacial.rectangulo_radio(lat, lng, radio))
+            ).alias(
+                distancia_radio=espacial.distancia_km(lat, lng)
+            ).filter(distancia_radio__lte=radio)
+
+        return queryset
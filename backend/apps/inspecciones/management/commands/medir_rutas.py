@@ -0,0 +1,44 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.inspecciones import rutas
+
+
+class Command(BaseCommand):
+    help = 'Mide el planificador de rutas con paradas aleatorias alrededor de la Ciudad de Panamá.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paradas', type=int, nargs='+', default=[50, 100, 200, 500])
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--semilla', type=int, default=1)
+
+    def handle(self, *args, **options):
+        azar = random.Random(options['semilla'])
+        inicio = (8.98, -79.53)
+
+        for cantidad in options['paradas']:
+            tiempos, totales, iniciales = [], [], []
+            for _ in range(options['repeticiones']):
+                paradas = [
+                    (8.95 + azar.uniform(-0.12, 0.12), -79.52 + azar.uniform(-0.2, 0.2))
+                    for _ in range(cantidad)
+                ]
+                comienzo = time.perf_counter()
+                _, tramos = rutas.planificar(paradas, inicio)
+                tiempos.append(time.perf_counter() - comienzo)
+                totales.append(sum(tramos))
+
+                # Referencia: solo vecino más cercano, sin la mejora local
+                matriz = rutas.distancias(paradas + [inicio])
+                orden = rutas.vecino_mas_cercano(matriz, cantidad, cantidad, incluir_primero=False)
+                iniciales.append(rutas.longitud(matriz, [cantidad] + orden))
+
+            tiempos.sort()
+            self.stdout.write(
+                f'{cantidad:5d} paradas: mediana {1000 * tiempos[len(tiempos) // 2]:7.1f} ms, '
+                f'máximo {1000 * tiempos[-1]:7.1f} ms, '
+                f'{sum(totales) / len(totales):7.1f} km '
+                f'({100 * (1 - sum(totales) / sum(iniciales)):.1f}% menos que vecino más cercano)'
+            )
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:03
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# El vector se recalcula al insertar o al cambiar las columnas indexadas, y cuando
+# cambia el título de la solicitud se marcan sus inspecciones para recalcularlas.
+TRIGGERS_SQL = """
+CREATE FUNCTION inspecciones_inspeccion_vector_busqueda() RETURNS trigger AS $$
+BEGIN
+    NEW.vector_busqueda :=
+        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.direccion_visita, '')), 'A') ||
+        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.notas, '')), 'B') ||
+        setweight(to_tsvector('spanish_unaccent', coalesce(
+            (SELECT s.titulo FROM solicitudes_solicitud s WHERE s.id = NEW.solicitud_id), '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER inspeccion_vector_busqueda
+    BEFORE INSERT OR UPDATE OF notas, direccion_visita, solicitud_id ON inspecciones_inspeccion
+    FOR EACH ROW EXECUTE FUNCTION inspecciones_inspeccion_vector_busqueda();
+
+CREATE FUNCTION inspecciones_solicitud_vector_busqueda() RETURNS trigger AS $$
+BEGIN
+    UPDATE inspecciones_inspeccion SET notas = notas WHERE solicitud_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER solicitud_vector_busqueda_inspeccion
+    AFTER UPDATE OF titulo ON solicitudes_solicitud
+    FOR EACH ROW
+    WHEN (OLD.titulo IS DISTINCT FROM NEW.titulo)
+    EXECUTE FUNCTION inspecciones_solicitud_vector_busqueda();
+
+UPDATE inspecciones_inspeccion SET notas = notas;
+"""
+
+TRIGGERS_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS solicitud_vector_busqueda_inspeccion ON solicitudes_solicitud;
+DROP FUNCTION IF EXISTS inspecciones_solicitud_vector_busqueda();
+DROP TRIGGER IF EXISTS inspeccion_vector_busqueda ON inspecciones_inspeccion;
+DROP FUNCTION IF EXISTS inspecciones_inspeccion_vector_busqueda();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inspecciones', '0002_initial'),
+        ('solicitudes', '0003_busqueda_texto_completo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inspeccion',
+            name='vector_busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='inspeccion',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['vector_busqueda'], name='inspeccion_busqueda_gin'),
+        ),
+        migrations.RunSQL(TRIGGERS_SQL, reverse_sql=TRIGGERS_REVERSE_SQL),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:19
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Los índices se crean sin bloquear las escrituras en tablas con datos
+    atomic = False
+
+    dependencies = [
+        ('inspecciones', '0003_busqueda_texto_completo'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='inspeccion',
+            index=models.Index(fields=['-fecha_inspeccion', '-id'], name='inspeccion_fecha'),
+        ),
+        AddIndexConcurrently(
+            model_name='inspeccion',
+            index=models.Index(fields=['inspector', '-fecha_inspeccion', '-id'], name='inspeccion_inspector_fecha'),
+        ),
+        AddIndexConcurrently(
+            model_name='inspeccion',
+            index=models.Index(condition=models.Q(('resultado', 'pendiente')), fields=['-fecha_inspeccion', '-id'], name='inspeccion_pendientes_fecha'),
+        ),
+        AddIndexConcurrently(
+            model_name='inspeccion',
+            index=models.Index(condition=models.Q(('fecha_programada__isnull', False)), fields=['-fecha_inspeccion', '-id'], name='inspeccion_programadas_fecha'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:31
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # El índice se crea sin bloquear las escrituras en tablas con datos
+    atomic = False
+
+    dependencies = [
+        ('inspecciones', '0005_fecha_actualizacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inspeccion',
+            name='version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        AddIndexConcurrently(
+            model_name='inspeccion',
+            index=models.Index(fields=['version', 'id'], name='inspeccion_version'),
+        ),
+    ]
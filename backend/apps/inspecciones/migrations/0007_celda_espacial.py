@@ -0,0 +1,62 @@
+# Generated by Django 4.2.8 on 2026-10-18 16:02
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+# Código de Morton de la celda de 360 / 2**26 grados que contiene el punto; debe
+# cuantizar igual que apps.inspecciones.espacial.celda().
+TRIGGERS_SQL = """
+CREATE FUNCTION inspecciones_celda(lat double precision, lng double precision) RETURNS bigint AS $$
+DECLARE
+    x bigint := least(greatest(floor((lng + 180) / 360 * 67108864), 0), 67108863);
+    y bigint := least(greatest(floor((lat + 90) / 360 * 67108864), 0), 33554431);
+    codigo bigint := 0;
+BEGIN
+    FOR i IN 0..25 LOOP
+        codigo := codigo | (((x >> i) & 1) << (2 * i)) | (((y >> i) & 1) << (2 * i + 1));
+    END LOOP;
+    RETURN codigo;
+END
+$$ LANGUAGE plpgsql IMMUTABLE STRICT;
+
+CREATE FUNCTION inspecciones_inspeccion_celda() RETURNS trigger AS $$
+BEGIN
+    NEW.celda := inspecciones_celda(NEW.lat, NEW.lng);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER inspeccion_celda
+    BEFORE INSERT OR UPDATE OF lat, lng ON inspecciones_inspeccion
+    FOR EACH ROW EXECUTE FUNCTION inspecciones_inspeccion_celda();
+
+UPDATE inspecciones_inspeccion SET lat = lat WHERE lat IS NOT NULL AND lng IS NOT NULL;
+"""
+
+TRIGGERS_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS inspeccion_celda ON inspecciones_inspeccion;
+DROP FUNCTION IF EXISTS inspecciones_inspeccion_celda();
+DROP FUNCTION IF EXISTS inspecciones_celda(double precision, double precision);
+"""
+
+
+class Migration(migrations.Migration):
+    # El índice se crea sin bloquear las escrituras en tablas con datos
+    atomic = False
+
+    dependencies = [
+        ('inspecciones', '0006_version_sincronizacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inspeccion',
+            name='celda',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.RunSQL(TRIGGERS_SQL, reverse_sql=TRIGGERS_REVERSE_SQL),
+        AddIndexConcurrently(
+            model_name='inspeccion',
+            index=models.Index(fields=['celda'], name='inspeccion_celda'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 class Inspeccion(models.Model):
     RESULTADO_CHOICES = (
@@ -20,18 +22,43 @@ class Inspeccion(models.Model):
         limit_choices_to={'rol': 'trabajo_social'}
     )
     fecha_inspeccion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
     fecha_programada = models.DateField(null=True, blank=True)
     resultado = models.CharField(max_length=20, choices=RESULTADO_CHOICES, default='pendiente')
     notas = models.TextField(blank=True, null=True)
     direccion_visita = models.TextField()
     lat = models.FloatField(null=True, blank=True)
     lng = models.FloatField(null=True, blank=True)
+    # Celda de la cuadrícula espacial (trigger desde lat y lng); ver apps.inspecciones.espacial
+    celda = models.BigIntegerField(null=True, editable=False)
     fotos = models.JSONField(default=list, blank=True)  # Almacena URLs de fotos en Supabase Storage
+    # Transacción que modificó la fila por última vez (trigger); cursor de la sincronización
+    version = models.BigIntegerField(default=0, editable=False)
+    # Mantenido por un trigger de la base de datos (notas, dirección y título de la solicitud)
+    vector_busqueda = SearchVectorField(null=True, editable=False)
     
     class Meta:
         verbose_name = 'Inspección'
         verbose_name_plural = 'Inspecciones'
         ordering = ['-fecha_inspeccion']
+        # Índices para los listados de InspeccionViewSet en el orden de la paginación
+        indexes = [
+            GinIndex(fields=['vector_busqueda'], name='inspeccion_busqueda_gin'),
+            models.Index(fields=['-fecha_inspeccion', '-id'], name='inspeccion_fecha'),
+            models.Index(fields=['inspector', '-fecha_inspeccion', '-id'], name='inspeccion_inspector_fecha'),
+            models.Index(
+                fields=['-fecha_inspeccion', '-id'],
+                name='inspeccion_pendientes_fecha',
+                condition=models.Q(resultado='pendiente')
+            ),
+            models.Index(
+                fields=['-fecha_inspeccion', '-id'],
+                name='inspeccion_programadas_fecha',
+                condition=models.Q(fecha_programada__isnull=False)
+            ),
+            models.Index(fields=['version', 'id'], name='inspeccion_version'),
+            models.Index(fields=['celda'], name='inspeccion_celda'),
+        ]
     
     def __str__(self):
         return f"Inspección de {self.solicitud.titulo} - {self.get_resultado_display()}" 
\ No newline at end of file
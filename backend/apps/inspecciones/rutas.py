@@ -0,0 +1,218 @@
+"""
+Orden de visita de las inspecciones programadas de un día.
+
+Es un problema del viajante con camino abierto: se parte del punto de inicio (o de
+cualquier parada si no hay uno) y no se regresa. Se resuelve como un ciclo con un
+nodo ficticio a distancia cero de todos, fijo al comienzo del recorrido junto con
+el inicio; el tramo de regreso al ficticio no cuesta, así que el ciclo equivale al
+camino abierto.
+
+1. Recorrido inicial por vecino más cercano.
+2. Mejora local con 2-opt (invertir un tramo) y Or-opt (mover un tramo de hasta tres
+   paradas) hasta que ningún movimiento acorta el recorrido. Solo se prueban los
+   movimientos que crean una arista hacia uno de los VECINOS más cercanos de cada
+   parada, que son los únicos que suelen mejorar; así cada pasada es lineal en la
+   cantidad de paradas en lugar de cuadrática.
+
+Las distancias son en línea recta (haversine) y en kilómetros.
+"""
+import math
+
+# Radio medio de la Tierra en km
+RADIO_TIERRA = 6371.0088
+# Vecinos más cercanos que se consideran por parada en la mejora local
+VECINOS = 12
+# Mejoras menores que esto (km) no se aplican, para no ciclar por redondeo
+EPSILON = 1e-9
+
+
+def distancias(puntos):
+    """
+    Matriz de distancias haversine en km entre los puntos (lat, lng).
+    """
+    lat = [math.radians(p[0]) for p in puntos]
+    lng = [math.radians(p[1]) for p in puntos]
+    cos_lat = [math.cos(valor) for valor in lat]
+
+    n = len(puntos)
+    matriz = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        fila = matriz[i]
+        lat_i, lng_i, cos_i = lat[i], lng[i], cos_lat[i]
+        for j in range(i + 1, n):
+            a = math.sin((lat[j] - lat_i) / 2) ** 2 + cos_i * cos_lat[j] * math.sin((lng[j] - lng_i) / 2) ** 2
+            fila[j] = matriz[j][i] = 2 * RADIO_TIERRA * math.asin(min(1.0, math.sqrt(a)))
+    return matriz
+
+
+def planificar(paradas, inicio=None):
+    """
+    Orden de visita de las paradas (lista de (lat, lng)) desde `inicio` (lat, lng) o
+    None. Devuelve (orden, tramos): los índices de las paradas en orden de visita y
+    la distancia en km de cada una desde el punto anterior (la primera desde el
+    inicio, o 0 sin inicio).
+    """
+    n = len(paradas)
+    if n == 0:
+        return [], []
+
+    puntos = list(paradas) + ([inicio] if inicio is not None else [])
+    matriz = distancias(puntos)
+    # Nodo ficticio al final, a distancia cero de todos
+    for fila in matriz:
+        fila.append(0.0)
+    matriz.append([0.0] * (len(puntos) + 1))
+    ficticio = len(puntos)
+
+    if inicio is not None:
+        fijos = [ficticio, n]
+        primero = n
+    else:
+        fijos = [ficticio]
+        primero = _extremo(matriz, n)
+
+    recorrido = fijos + vecino_mas_cercano(matriz, primero, n, incluir_primero=inicio is None)
+    _Mejora(matriz, recorrido, len(fijos)).optimizar()
+
+    orden = recorrido[len(fijos):]
+    tramos = []
+    anterior = n if inicio is not None else None
+    for parada in orden:
+        tramos.append(matriz[anterior][parada] if anterior is not None else 0.0)
+        anterior = parada
+    return orden, tramos
+
+
+def longitud(matriz, orden):
+    return sum(matriz[a][b] for a, b in zip(orden, orden[1:]))
+
+
+def _extremo(matriz, n):
+    # Sin inicio se parte de la parada más alejada del resto, que suele ser un extremo
+    return max(range(n), key=lambda i: sum(matriz[i][:n]))
+
+
+def vecino_mas_cercano(matriz, primero, n, incluir_primero):
+    pendientes = set(range(n))
+    pendientes.discard(primero)
+    orden = [primero] if incluir_primero else []
+    actual = primero
+    while pendientes:
+        fila = matriz[actual]
+        actual = min(pendientes, key=fila.__getitem__)
+        pendientes.remove(actual)
+        orden.append(actual)
+    return orden
+
+
+class _Mejora:
+    """
+    2-opt y Or-opt sobre un ciclo cuyos primeros `fijos` nodos no se mueven.
+    """
+
+    def __init__(self, matriz, recorrido, fijos):
+        self.d = matriz
+        self.t = recorrido
+        self.fijos = fijos
+        self.n = len(recorrido)
+        self.pos = [0] * self.n
+        self._posiciones()
+        vecinos = min(VECINOS, self.n - 1)
+        self.vecinos = [
+            sorted((j for j in range(self.n) if j != i), key=matriz[i].__getitem__)[:vecinos]
+            for i in range(self.n)
+        ]
+
+    def _posiciones(self):
+        for indice, nodo in enumerate(self.t):
+            self.pos[nodo] = indice
+
+    def _siguiente(self, indice):
+        return self.t[(indice + 1) % self.n]
+
+    def optimizar(self):
+        if self.n - self.fijos < 3:
+            return
+        mejoro = True
+        while mejoro:
+            mejoro = self._dos_opt()
+            mejoro = self._or_opt() or mejoro
+
+    def _dos_opt(self):
+        d, t, pos = self.d, self.t, self.pos
+        alguna = False
+        mejoro = True
+        while mejoro:
+            mejoro = False
+            for i in range(self.fijos - 1, self.n):
+                a, b = t[i], self._siguiente(i)
+                d_ab = d[a][b]
+                for c in self.vecinos[a]:
+                    d_ac = d[a][c]
+                    # Vecinos ordenados: más allá de este no hay ganancia posible
+                    if d_ac >= d_ab:
+                        break
+                    j = pos[c]
+                    e = self._siguiente(j)
+                    if c == b or e == a:
+                        continue
+                    bajo, alto = (i, j) if i < j else (j, i)
+                    if bajo < self.fijos - 1:
+                        continue
+                    if d_ac + d[b][e] - d_ab - d[c][e] < -EPSILON:
+                        t[bajo + 1:alto + 1] = t[bajo + 1:alto + 1][::-1]
+                        for k in range(bajo + 1, alto + 1):
+                            pos[t[k]] = k
+                        mejoro = alguna = True
+                        break
+                if mejoro:
+                    break
+        return alguna
+
+    def _or_opt(self):
+        d = self.d
+        alguna = False
+        mejoro = True
+        while mejoro:
+            mejoro = False
+            for largo in (1, 2, 3):
+                for i in range(self.fijos, self.n - largo + 1):
+                    if self._mover_tramo(d, i, largo):
+                        mejoro = alguna = True
+                        break
+                if mejoro:
+                    break
+        return alguna
+
+    def _mover_tramo(self, d, i, largo):
+        t = self.t
+        tramo = t[i:i + largo]
+        primero, ultimo = tramo[0], tramo[-1]
+        anterior, siguiente = t[i - 1], self._siguiente(i + largo - 1)
+        ahorro = d[anterior][primero] + d[ultimo][siguiente] - d[anterior][siguiente]
+        if ahorro <= EPSILON:
+            return False
+
+        en_tramo = set(tramo)
+        for extremo in (primero, ultimo):
+            for c in self.vecinos[extremo]:
+                if c in en_tramo or c == anterior:
+                    continue
+                k = self.pos[c]
+                if k < self.fijos - 1:
+                    continue
+                cn = self._siguiente(k)
+                if cn in en_tramo:
+                    continue
+                directo = d[c][primero] + d[ultimo][cn]
+                invertido = d[c][ultimo] + d[primero][cn]
+                costo = min(directo, invertido) - d[c][cn]
+                if costo - ahorro < -EPSILON:
+                    if invertido < directo:
+                        tramo.reverse()
+                    resto = t[:i] + t[i + largo:]
+                    k = resto.index(c)
+                    t[:] = resto[:k + 1] + tramo + resto[k + 1:]
+                    self._posiciones()
+                    return True
+        return False
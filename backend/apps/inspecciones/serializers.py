@@ -10,9 +10,9 @@ class InspeccionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Inspeccion
         fields = ['id', 'solicitud', 'inspector', 'inspector_info', 'fecha_inspeccion', 
-                 'fecha_programada', 'resultado', 'resultado_display', 'notas', 
+                 'fecha_actualizacion', 'fecha_programada', 'resultado', 'resultado_display', 'notas', 
                  'direccion_visita', 'lat', 'lng', 'fotos']
-        read_only_fields = ['id', 'fecha_inspeccion', 'resultado_display']
+        read_only_fields = ['id', 'fecha_inspeccion', 'fecha_actualizacion', 'resultado_display']
 
 class InspeccionCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -1,10 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import InspeccionViewSet
+from core.asincrono import vista_asincrona
 
 router = DefaultRouter()
 router.register(r'', InspeccionViewSet)
 
 urlpatterns = [
+    # GET atendidos por el camino asíncrono
+    path('pendientes/', vista_asincrona(InspeccionViewSet, {'get': 'pendientes'})),
+    path('programadas/', vista_asincrona(InspeccionViewSet, {'get': 'programadas'})),
     path('', include(router.urls)),
 ] 
\ No newline at end of file
@@ -1,44 +1,96 @@
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 
+from . import espacial, rutas
+from .filters import FiltroEspacial, leer_punto
 from .models import Inspeccion
 from .serializers import (
     InspeccionSerializer,
     InspeccionCreateSerializer,
     InspeccionUpdateResultadoSerializer
 )
+from apps.solicitudes.models import Solicitud
 from apps.solicitudes.permissions import EsTrabajoSocial
+from apps.sincronizacion.mixins import SincronizacionMixin
+from core.campos import CamposParcialesMixin
+from core.condicional import ConsultaCondicionalMixin
+from core.exportacion import ExportacionMixin
+from core.filters import BusquedaTextoCompleto
+from core.pagination import ListadoPaginadoMixin
 
-class InspeccionViewSet(viewsets.ModelViewSet):
+class InspeccionViewSet(SincronizacionMixin, ConsultaCondicionalMixin, ExportacionMixin, CamposParcialesMixin, ListadoPaginadoMixin, viewsets.ModelViewSet):
     queryset = Inspeccion.objects.all()
     serializer_class = InspeccionSerializer
     permission_classes = [permissions.IsAuthenticated, EsTrabajoSocial]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['notas', 'direccion_visita', 'solicitud__titulo']
+    filter_backends = [BusquedaTextoCompleto, FiltroEspacial, filters.OrderingFilter]
     ordering_fields = ['fecha_inspeccion', 'fecha_programada', 'resultado']
+    # Máximo de paradas que se ordenan en una ruta
+    MAX_RUTA = 500
+    # Inspecciones que devuelve como máximo la búsqueda de las más cercanas
+    MAX_CERCANAS = 100
+    # Nivel de la cuadrícula del mapa de calor por defecto (celdas de 360 / 2**14 grados, unos 2.4 km)
+    NIVEL_CALOR = 14
+    # Celdas que devuelve como máximo el mapa de calor
+    MAX_CELDAS_CALOR = 10000
+    # Listados serializados desde .values() (core.valores), con el inspector unido
+    acciones_valores = ['list', 'pendientes', 'programadas']
+    columnas_exportacion = [
+        ('ID', 'id'),
+        ('Solicitud', 'solicitud_id'),
+        ('Título de la solicitud', 'solicitud__titulo'),
+        ('Ciudadano', 'solicitud__ciudadano__username'),
+        ('Inspector', 'inspector__username'),
+        ('Fecha programada', 'fecha_programada'),
+        ('Fecha de registro', 'fecha_inspeccion'),
+        ('Resultado', 'resultado'),
+        ('Dirección', 'direccion_visita'),
+        ('Latitud', 'lat'),
+        ('Longitud', 'lng'),
+        ('Notas', 'notas'),
+    ]
     
     def get_queryset(self):
         user = self.request.user
         
+        # Cargar el inspector en la misma consulta
+        queryset = Inspeccion.objects.select_related('inspector')
+        
         # Superusuarios ven todo
         if user.is_superuser:
-            return Inspeccion.objects.all()
+            return queryset
             
-        # Trabajo social ve sus propias inspecciones
+        # Trabajo social ve sus propias inspecciones y las de solicitudes aprobadas por
+        # representante. La condición sobre la solicitud va en una subconsulta para que
+        # el OR no obligue a unir las dos tablas y el listado pueda recorrer su índice.
         if user.rol == 'trabajo_social':
-            return Inspeccion.objects.filter(
+            por_aprobar = Solicitud.objects.filter(estado='aprobado_representante').values('pk')
+            return queryset.filter(
                 Q(inspector=user) | 
-                Q(solicitud__estado='aprobado_representante')
+                Q(solicitud__in=por_aprobar)
             )
             
         # Otros roles con restricciones
         if user.rol in ['representante', 'almacen', 'recepcion']:
             # Pueden ver inspecciones relacionadas a solicitudes que pueden ver
-            return Inspeccion.objects.all()
+            return queryset
             
-        return Inspeccion.objects.none()
+        return queryset.none()
+    
+    def alcance_eliminaciones(self, eliminaciones):
+        """
+        Las mismas reglas de get_queryset sobre los valores que tenían la inspección
+        y su solicitud.
+        """
+        user = self.request.user
+        if user.is_superuser or user.rol in ['representante', 'almacen', 'recepcion']:
+            return eliminaciones
+        if user.rol == 'trabajo_social':
+            return eliminaciones.filter(Q(usuario_id=user.pk) | Q(estado='aprobado_representante'))
+        return eliminaciones.none()
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -70,8 +122,7 @@ class InspeccionViewSet(viewsets.ModelViewSet):
         Listar inspecciones pendientes.
         """
         queryset = self.get_queryset().filter(resultado='pendiente')
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.listar_paginado(queryset)
         
     @action(detail=False, methods=['get'])
     def programadas(self, request):
@@ -79,5 +130,160 @@ class InspeccionViewSet(viewsets.ModelViewSet):
         Listar inspecciones con fecha programada.
         """
         queryset = self.get_queryset().filter(fecha_programada__isnull=False)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data) 
\ No newline at end of file
+        return self.listar_paginado(queryset)
+    
+    @action(detail=False, methods=['get'])
+    def ruta(self, request):
+        """
+        Orden de visita de las inspecciones pendientes programadas para un día.
+        Recibe fecha (AAAA-MM-DD, por defecto hoy), inspector (id, por defecto el usuario)
+        y opcionalmente el punto de partida en inicio_lat e inicio_lng. Las inspecciones
+        sin coordenadas se devuelven aparte en sin_ubicacion.
+        """
+        parametros = request.query_params
+        
+        fecha = timezone.localdate()
+        if parametros.get('fecha'):
+            try:
+                fecha = parse_date(parametros['fecha'])
+            except ValueError:
+                fecha = None
+            if fecha is None:
+                return Response(
+                    {"error": "La fecha debe tener formato AAAA-MM-DD"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        try:
+            inspector = int(parametros.get('inspector', request.user.pk))
+        except ValueError:
+            return Response({"error": "El inspector debe ser un id"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        inicio = None
+        if 'inicio_lat' in parametros or 'inicio_lng' in parametros:
+            try:
+                inicio = (float(parametros['inicio_lat']), float(parametros['inicio_lng']))
+            except (KeyError, ValueError):
+                inicio = None
+            if inicio is None or not (-90 <= inicio[0] <= 90 and -180 <= inicio[1] <= 180):
+                return Response(
+                    {"error": "El inicio requiere inicio_lat e inicio_lng válidos"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        inspecciones = list(self.get_queryset().filter(
+            inspector_id=inspector,
+            fecha_programada=fecha,
+            resultado='pendiente'
+        ).order_by('pk'))
+        con_ubicacion = [i for i in inspecciones if i.lat is not None and i.lng is not None]
+        sin_ubicacion = [i for i in inspecciones if i.lat is None or i.lng is None]
+        
+        if len(con_ubicacion) > self.MAX_RUTA:
+            return Response(
+                {"error": f"La ruta no puede tener más de {self.MAX_RUTA} paradas"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        orden, tramos = rutas.planificar([(i.lat, i.lng) for i in con_ubicacion], inicio)
+        visitas = [con_ubicacion[indice] for indice in orden]
+        datos = self.get_serializer(visitas + sin_ubicacion, many=True).data
+        
+        paradas = []
+        acumulado = 0.0
+        for numero, (tramo, inspeccion) in enumerate(zip(tramos, datos), start=1):
+            acumulado += tramo
+            paradas.append({
+                "orden": numero,
+                "distancia_km": round(tramo, 3),
+                "acumulado_km": round(acumulado, 3),
+                "inspeccion": inspeccion,
+            })
+        
+        return Response({
+            "fecha": fecha,
+            "inspector": inspector,
+            "inicio": {"lat": inicio[0], "lng": inicio[1]} if inicio else None,
+            "distancia_total_km": round(acumulado, 3),
+            "paradas": paradas,
+            "sin_ubicacion": datos[len(visitas):],
+        })
+    
+    @action(detail=False, methods=['get'])
+    def cercanas(self, request):
+        """
+        Las k inspecciones pendientes más cercanas a lat y lng (k por defecto 10), de
+        la más cercana a la más lejana, con su distancia en línea recta. Acepta los
+        mismos filtros que el listado (búsqueda, bbox, radio).
+        """
+        lat, lng = leer_punto(request.query_params)
+        try:
+            k = int(request.query_params.get('k', 10))
+        except ValueError:
+            k = 0
+        if not 1 <= k <= self.MAX_CERCANAS:
+            return Response(
+                {"error": f"k debe estar entre 1 y {self.MAX_CERCANAS}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.filter_queryset(self.get_queryset().filter(resultado='pendiente'))
+        inspecciones = espacial.cercanas(queryset, lat, lng, k)
+        datos = self.get_serializer(inspecciones, many=True).data
+        
+        return Response({
+            "origen": {"lat": lat, "lng": lng},
+            "cercanas": [
+                {"distancia_km": round(inspeccion.distancia_km, 3), "inspeccion": dato}
+                for inspeccion, dato in zip(inspecciones, datos)
+            ],
+        })
+    
+    @action(detail=False, methods=['get'])
+    def mapa_calor(self, request):
+        """
+        Cantidad de inspecciones por celda de la cuadrícula en lugar de los puntos.
+        nivel (1 a 26, por defecto 14) fija el lado de las celdas en 360 / 2**nivel
+        grados; acepta los mismos filtros que el listado (búsqueda, bbox, radio).
+        """
+        try:
+            nivel = int(request.query_params.get('nivel', self.NIVEL_CALOR))
+        except ValueError:
+            nivel = 0
+        if not 1 <= nivel <= espacial.BITS:
+            return Response(
+                {"error": f"nivel debe estar entre 1 y {espacial.BITS}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Las celdas de un nivel son los códigos de celda sin sus últimos bits
+        celdas = list(
+            self.filter_queryset(self.get_queryset())
+            .filter(celda__isnull=False)
+            .annotate(grupo=F('celda').bitrightshift(2 * (espacial.BITS - nivel)))
+            .values('grupo')
+            .annotate(cantidad=Count('pk'))
+            .order_by('grupo')[:self.MAX_CELDAS_CALOR + 1]
+        )
+        if len(celdas) > self.MAX_CELDAS_CALOR:
+            return Response(
+                {"error": f"El mapa tiene más de {self.MAX_CELDAS_CALOR} celdas; usa un nivel menor o un bbox"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        resultado = []
+        for fila in celdas:
+            lat, lng = espacial.centro(fila['grupo'], nivel)
+            resultado.append({
+                "celda": fila['grupo'],
+                "lat": lat,
+                "lng": lng,
+                "cantidad": fila['cantidad'],
+            })
+        
+        return Response({
+            "nivel": nivel,
+            "lado_grados": 360 / (1 << nivel),
+            "total": sum(fila['cantidad'] for fila in celdas),
+            "celdas": resultado,
+        })
@@ -0,0 +1,12 @@
+from django.contrib import admin
+from .models import Eliminacion, Purga
+
+@admin.register(Eliminacion)
+class EliminacionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'tabla', 'objeto_id', 'version', 'fecha')
+    list_filter = ('tabla',)
+    date_hierarchy = 'fecha'
+
+@admin.register(Purga)
+class PurgaAdmin(admin.ModelAdmin):
+    list_display = ('id', 'version', 'fecha')
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.sincronizacion.models import Eliminacion, Purga
+
+
+class Command(BaseCommand):
+    help = (
+        'Borra las eliminaciones registradas para la sincronización con más de --dias de '
+        'antigüedad. Los clientes con un cursor anterior reciben 410 y sincronizan desde 0.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=30,
+            help='Días que se conservan las eliminaciones: el tiempo que un cliente puede pasar sin sincronizar.'
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(days=options['dias'])
+        with transaction.atomic():
+            version = Eliminacion.objects.filter(fecha__lt=limite).aggregate(version=Max('version'))['version']
+            if version is None:
+                self.stdout.write(self.style.SUCCESS(f'Sin eliminaciones anteriores al {limite:%Y-%m-%d %H:%M}'))
+                return
+            # Por version y no por fecha: los cursores se comparan con la version
+            borradas, _ = Eliminacion.objects.filter(version__lte=version).delete()
+            Purga.objects.create(version=version)
+        self.stdout.write(self.style.SUCCESS(
+            f'Eliminaciones hasta la version {version} (anteriores al {limite:%Y-%m-%d %H:%M}): {borradas} borradas'
+        ))
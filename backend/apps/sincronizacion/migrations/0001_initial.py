@@ -0,0 +1,98 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:31
+
+from django.db import migrations, models
+
+TABLAS = ['solicitudes_solicitud', 'inspecciones_inspeccion', 'entregas_entrega', 'entregas_producto']
+
+# version guarda la transacción que modificó la fila; los borrados quedan en
+# sincronizacion_eliminacion con la transacción que los hizo.
+FUNCIONES_SQL = """
+CREATE FUNCTION sincronizacion_version() RETURNS trigger AS $$
+BEGIN
+    NEW.version := txid_current();
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION sincronizacion_eliminacion() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO sincronizacion_eliminacion (tabla, objeto_id, version, fecha)
+    SELECT TG_TABLE_NAME, viejas.id, txid_current(), now() FROM viejas;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+-- La visibilidad de inspecciones (trabajo social) depende del estado de la solicitud
+-- y la de entregas (ciudadano) de su ciudadano: al cambiar se marcan como modificadas.
+CREATE FUNCTION sincronizacion_solicitud_dependientes() RETURNS trigger AS $$
+BEGIN
+    UPDATE inspecciones_inspeccion AS i SET version = 0
+    FROM nuevas JOIN viejas ON viejas.id = nuevas.id
+    WHERE i.solicitud_id = nuevas.id AND nuevas.estado IS DISTINCT FROM viejas.estado;
+
+    UPDATE entregas_entrega AS e SET version = 0
+    FROM nuevas JOIN viejas ON viejas.id = nuevas.id
+    WHERE e.solicitud_id = nuevas.id AND nuevas.ciudadano_id IS DISTINCT FROM viejas.ciudadano_id;
+
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER solicitud_sincronizacion_dependientes
+    AFTER UPDATE ON solicitudes_solicitud
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION sincronizacion_solicitud_dependientes();
+"""
+
+FUNCIONES_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS solicitud_sincronizacion_dependientes ON solicitudes_solicitud;
+DROP FUNCTION IF EXISTS sincronizacion_solicitud_dependientes();
+DROP FUNCTION IF EXISTS sincronizacion_eliminacion();
+DROP FUNCTION IF EXISTS sincronizacion_version();
+"""
+
+TRIGGERS_SQL = '\n'.join(
+    f'CREATE TRIGGER {tabla}_version BEFORE INSERT OR UPDATE ON {tabla} '
+    f'FOR EACH ROW EXECUTE FUNCTION sincronizacion_version();\n'
+    f'CREATE TRIGGER {tabla}_eliminacion AFTER DELETE ON {tabla} '
+    f'REFERENCING OLD TABLE AS viejas FOR EACH STATEMENT EXECUTE FUNCTION sincronizacion_eliminacion();'
+    for tabla in TABLAS
+)
+
+TRIGGERS_REVERSE_SQL = '\n'.join(
+    f'DROP TRIGGER IF EXISTS {tabla}_version ON {tabla};\n'
+    f'DROP TRIGGER IF EXISTS {tabla}_eliminacion ON {tabla};'
+    for tabla in TABLAS
+)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('solicitudes', '0005_version_sincronizacion'),
+        ('inspecciones', '0006_version_sincronizacion'),
+        ('entregas', '0009_version_sincronizacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Eliminacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tabla', models.CharField(max_length=100)),
+                ('objeto_id', models.BigIntegerField()),
+                ('version', models.BigIntegerField()),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Eliminación',
+                'verbose_name_plural': 'Eliminaciones',
+                'ordering': ['version'],
+                'indexes': [models.Index(fields=['tabla', 'version'], name='eliminacion_tabla_version')],
+            },
+        ),
+        migrations.RunSQL(FUNCIONES_SQL, reverse_sql=FUNCIONES_REVERSE_SQL),
+        migrations.RunSQL(TRIGGERS_SQL, reverse_sql=TRIGGERS_REVERSE_SQL),
+    ]
@@ -0,0 +1,144 @@
+from django.db import migrations, models
+
+# Cada eliminación guarda los datos de los que depende la visibilidad de la fila
+# (ciudadano, usuario a cargo y estado de la solicitud), con los valores que tenía
+# antes de borrarse o de cambiarlos, para informarla solo a quien podía verla.
+FUNCIONES_SQL = """
+CREATE OR REPLACE FUNCTION sincronizacion_eliminacion() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'solicitudes_solicitud' THEN
+        INSERT INTO sincronizacion_eliminacion (tabla, objeto_id, version, fecha, ciudadano_id, usuario_id, estado)
+        SELECT TG_TABLE_NAME, v.id, txid_current(), now(), v.ciudadano_id, v.representante_id, v.estado
+        FROM viejas v;
+    ELSIF TG_TABLE_NAME = 'inspecciones_inspeccion' THEN
+        INSERT INTO sincronizacion_eliminacion (tabla, objeto_id, version, fecha, ciudadano_id, usuario_id, estado)
+        SELECT TG_TABLE_NAME, v.id, txid_current(), now(), s.ciudadano_id, v.inspector_id, s.estado
+        FROM viejas v LEFT JOIN solicitudes_solicitud s ON s.id = v.solicitud_id;
+    ELSIF TG_TABLE_NAME = 'entregas_entrega' THEN
+        INSERT INTO sincronizacion_eliminacion (tabla, objeto_id, version, fecha, ciudadano_id, usuario_id, estado)
+        SELECT TG_TABLE_NAME, v.id, txid_current(), now(), s.ciudadano_id, NULL, s.estado
+        FROM viejas v LEFT JOIN solicitudes_solicitud s ON s.id = v.solicitud_id;
+    ELSE
+        INSERT INTO sincronizacion_eliminacion (tabla, objeto_id, version, fecha)
+        SELECT TG_TABLE_NAME, v.id, txid_current(), now() FROM viejas v;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+-- Una fila que cambia de ciudadano, usuario a cargo o solicitud puede dejar de ser
+-- visible para quien la veía: se registra como eliminada con los valores anteriores
+-- (si sigue visible, llega además entre los cambios de la misma transacción).
+CREATE FUNCTION sincronizacion_salida() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'solicitudes_solicitud' THEN
+        INSERT INTO sincronizacion_eliminacion (tabla, objeto_id, version, fecha, ciudadano_id, usuario_id, estado)
+        SELECT TG_TABLE_NAME, v.id, txid_current(), now(), v.ciudadano_id, v.representante_id, v.estado
+        FROM viejas v JOIN nuevas n ON n.id = v.id
+        WHERE (n.ciudadano_id, n.representante_id, n.estado) IS DISTINCT FROM (v.ciudadano_id, v.representante_id, v.estado);
+    ELSIF TG_TABLE_NAME = 'inspecciones_inspeccion' THEN
+        INSERT INTO sincronizacion_eliminacion (tabla, objeto_id, version, fecha, ciudadano_id, usuario_id, estado)
+        SELECT TG_TABLE_NAME, v.id, txid_current(), now(), s.ciudadano_id, v.inspector_id, s.estado
+        FROM viejas v JOIN nuevas n ON n.id = v.id LEFT JOIN solicitudes_solicitud s ON s.id = v.solicitud_id
+        WHERE (n.inspector_id, n.solicitud_id) IS DISTINCT FROM (v.inspector_id, v.solicitud_id);
+    ELSIF TG_TABLE_NAME = 'entregas_entrega' THEN
+        INSERT INTO sincronizacion_eliminacion (tabla, objeto_id, version, fecha, ciudadano_id, usuario_id, estado)
+        SELECT TG_TABLE_NAME, v.id, txid_current(), now(), s.ciudadano_id, NULL, s.estado
+        FROM viejas v JOIN nuevas n ON n.id = v.id LEFT JOIN solicitudes_solicitud s ON s.id = v.solicitud_id
+        WHERE n.solicitud_id IS DISTINCT FROM v.solicitud_id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+-- Las inspecciones y entregas de una solicitud heredan su ciudadano y su estado
+CREATE OR REPLACE FUNCTION sincronizacion_solicitud_dependientes() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO sincronizacion_eliminacion (tabla, objeto_id, version, fecha, ciudadano_id, usuario_id, estado)
+    SELECT 'inspecciones_inspeccion', i.id, txid_current(), now(), viejas.ciudadano_id, i.inspector_id, viejas.estado
+    FROM nuevas JOIN viejas ON viejas.id = nuevas.id JOIN inspecciones_inspeccion i ON i.solicitud_id = nuevas.id
+    WHERE (nuevas.estado, nuevas.ciudadano_id) IS DISTINCT FROM (viejas.estado, viejas.ciudadano_id);
+
+    INSERT INTO sincronizacion_eliminacion (tabla, objeto_id, version, fecha, ciudadano_id, usuario_id, estado)
+    SELECT 'entregas_entrega', e.id, txid_current(), now(), viejas.ciudadano_id, NULL, viejas.estado
+    FROM nuevas JOIN viejas ON viejas.id = nuevas.id JOIN entregas_entrega e ON e.solicitud_id = nuevas.id
+    WHERE nuevas.ciudadano_id IS DISTINCT FROM viejas.ciudadano_id;
+
+    UPDATE inspecciones_inspeccion AS i SET version = 0
+    FROM nuevas JOIN viejas ON viejas.id = nuevas.id
+    WHERE i.solicitud_id = nuevas.id AND nuevas.estado IS DISTINCT FROM viejas.estado;
+
+    UPDATE entregas_entrega AS e SET version = 0
+    FROM nuevas JOIN viejas ON viejas.id = nuevas.id
+    WHERE e.solicitud_id = nuevas.id AND nuevas.ciudadano_id IS DISTINCT FROM viejas.ciudadano_id;
+
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+FUNCIONES_REVERSE_SQL = """
+CREATE OR REPLACE FUNCTION sincronizacion_eliminacion() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO sincronizacion_eliminacion (tabla, objeto_id, version, fecha)
+    SELECT TG_TABLE_NAME, viejas.id, txid_current(), now() FROM viejas;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sincronizacion_solicitud_dependientes() RETURNS trigger AS $$
+BEGIN
+    UPDATE inspecciones_inspeccion AS i SET version = 0
+    FROM nuevas JOIN viejas ON viejas.id = nuevas.id
+    WHERE i.solicitud_id = nuevas.id AND nuevas.estado IS DISTINCT FROM viejas.estado;
+
+    UPDATE entregas_entrega AS e SET version = 0
+    FROM nuevas JOIN viejas ON viejas.id = nuevas.id
+    WHERE e.solicitud_id = nuevas.id AND nuevas.ciudadano_id IS DISTINCT FROM viejas.ciudadano_id;
+
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP FUNCTION IF EXISTS sincronizacion_salida();
+"""
+
+TABLAS = ['solicitudes_solicitud', 'inspecciones_inspeccion', 'entregas_entrega']
+
+TRIGGERS_SQL = '\n'.join(
+    f'CREATE TRIGGER {tabla}_salida AFTER UPDATE ON {tabla} '
+    f'REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas FOR EACH STATEMENT EXECUTE FUNCTION sincronizacion_salida();'
+    for tabla in TABLAS
+)
+
+TRIGGERS_REVERSE_SQL = '\n'.join(
+    f'DROP TRIGGER IF EXISTS {tabla}_salida ON {tabla};'
+    for tabla in TABLAS
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sincronizacion', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eliminacion',
+            name='ciudadano_id',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='eliminacion',
+            name='usuario_id',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='eliminacion',
+            name='estado',
+            field=models.CharField(max_length=30, null=True),
+        ),
+        migrations.RunSQL(FUNCIONES_SQL, reverse_sql=FUNCIONES_REVERSE_SQL),
+        migrations.RunSQL(TRIGGERS_SQL, reverse_sql=TRIGGERS_REVERSE_SQL),
+    ]
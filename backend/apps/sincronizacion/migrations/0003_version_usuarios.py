@@ -0,0 +1,56 @@
+from django.db import migrations
+
+# Las solicitudes, inspecciones y entregas muestran los datos de sus usuarios
+# (ciudadano_info, inspector_info, ...): cuando cambian, las filas que los incluyen
+# se marcan como modificadas para que su version (ETag y sincronización) avance.
+FUNCIONES_SQL = """
+CREATE FUNCTION sincronizacion_usuario_dependientes() RETURNS trigger AS $$
+DECLARE
+    cambiados bigint[];
+BEGIN
+    -- Solo los campos que muestra UserSerializer (no last_login, password...)
+    SELECT array_agg(nuevas.id) INTO cambiados
+    FROM nuevas JOIN viejas ON viejas.id = nuevas.id
+    WHERE (nuevas.username, nuevas.email, nuevas.first_name, nuevas.last_name, nuevas.rol,
+           nuevas.cedula, nuevas.telefono, nuevas.direccion)
+          IS DISTINCT FROM
+          (viejas.username, viejas.email, viejas.first_name, viejas.last_name, viejas.rol,
+           viejas.cedula, viejas.telefono, viejas.direccion);
+
+    IF cambiados IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE solicitudes_solicitud SET version = 0
+    WHERE ciudadano_id = ANY(cambiados) OR creado_por_id = ANY(cambiados) OR representante_id = ANY(cambiados);
+
+    UPDATE inspecciones_inspeccion SET version = 0 WHERE inspector_id = ANY(cambiados);
+
+    UPDATE entregas_entrega SET version = 0 WHERE encargado_id = ANY(cambiados);
+
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER usuario_sincronizacion_dependientes
+    AFTER UPDATE ON users_user
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION sincronizacion_usuario_dependientes();
+"""
+
+FUNCIONES_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS usuario_sincronizacion_dependientes ON users_user;
+DROP FUNCTION IF EXISTS sincronizacion_usuario_dependientes();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sincronizacion', '0002_alcance_eliminacion'),
+        ('users', '0002_indices_listados'),
+    ]
+
+    operations = [
+        migrations.RunSQL(FUNCIONES_SQL, reverse_sql=FUNCIONES_REVERSE_SQL),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.8 on 2026-10-18 13:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sincronizacion', '0003_version_usuarios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Purga',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField()),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Purga de eliminaciones',
+                'verbose_name_plural': 'Purgas de eliminaciones',
+                'ordering': ['-version'],
+            },
+        ),
+    ]
@@ -0,0 +1,117 @@
+from django.db import connection
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Eliminacion, Purga
+
+
+def leer_cursor(valor):
+    """
+    Convierte el cursor '<version>' o '<version>.<id>' en (version, id).
+    """
+    version, _, pk = valor.partition('.')
+    version, pk = int(version), int(pk or 0)
+    if version < 0 or pk < 0:
+        raise ValueError(valor)
+    return version, pk
+
+
+class SincronizacionMixin:
+    """
+    Sincronización incremental del listado con ?updated_since=<cursor> (0 la primera vez).
+
+    Devuelve las filas visibles creadas o modificadas desde el cursor, los ids que el
+    cliente debe borrar (filas que podía ver y que se eliminaron o salieron del
+    alcance de su rol, ver alcance_eliminaciones) y el cursor para la siguiente
+    llamada. Las filas se recorren por (version, id) con su índice; version es la
+    transacción que escribió la fila y solo se entregan las de transacciones que ya
+    terminaron (anteriores al xmin del snapshot), de modo que una transacción larga
+    que confirma tarde no queda detrás del cursor del cliente.
+    Las eliminaciones se conservan un tiempo (purgar_eliminaciones): un cursor
+    anterior a la última purga recibe 410 y el cliente debe descartar su copia y
+    sincronizar desde 0. La búsqueda y el orden del listado no se aplican.
+    """
+    parametro_sincronizacion = 'updated_since'
+    limite_sincronizacion = 500
+    maximo_sincronizacion = 2000
+
+    def list(self, request, *args, **kwargs):
+        if self.parametro_sincronizacion not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        return self.sincronizar(request)
+
+    def _limite(self, request):
+        try:
+            limite = int(request.query_params.get('page_size', self.limite_sincronizacion))
+        except ValueError:
+            limite = self.limite_sincronizacion
+        return max(1, min(limite, self.maximo_sincronizacion))
+
+    def sincronizar(self, request):
+        cursor_cliente = request.query_params[self.parametro_sincronizacion]
+        try:
+            version, pk = leer_cursor(cursor_cliente)
+        except ValueError:
+            return Response(
+                {"error": "Cursor de sincronización inválido"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        limite = self._limite(request)
+        queryset = self.get_queryset()
+        modelo = queryset.model
+
+        # Toda transacción anterior al xmin ya terminó: sus filas no pueden cambiar de versión
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT txid_snapshot_xmin(txid_current_snapshot())')
+            horizonte = cursor.fetchone()[0]
+
+        cambios = list(
+            queryset.filter(version__gte=version, version__lt=horizonte)
+            .exclude(version=version, pk__lte=pk)
+            .order_by('version', 'pk')[:limite + 1]
+        )
+        hay_mas = len(cambios) > limite
+        cambios = cambios[:limite]
+
+        if hay_mas:
+            fin = cambios[-1].version
+            siguiente = f'{cambios[-1].version}.{cambios[-1].pk}'
+        elif horizonte > version:
+            fin = horizonte
+            siguiente = str(horizonte)
+        else:
+            fin = version
+            siguiente = cursor_cliente
+
+        # Filas borradas o que salieron del alcance, solo si este usuario podía verlas;
+        # las que siguen visibles llegan entre los cambios
+        eliminados = set(self.alcance_eliminaciones(Eliminacion.objects.filter(
+            tabla=modelo._meta.db_table,
+            version__gte=version,
+            version__lt=fin
+        )).values_list('objeto_id', flat=True))
+        eliminados.difference_update(obj.pk for obj in cambios)
+
+        # Después de leer las eliminaciones: una purga confirmada antes ya se ve aquí
+        if version and Purga.objects.filter(version__gte=version).exists():
+            return Response(
+                {"error": "El cursor es anterior a las eliminaciones conservadas; sincronice desde 0"},
+                status=status.HTTP_410_GONE
+            )
+
+        serializer = self.get_serializer(cambios, many=True)
+        return Response({
+            'cursor': siguiente,
+            'hay_mas': hay_mas,
+            'cambios': serializer.data,
+            'eliminados': sorted(eliminados),
+        })
+
+    def alcance_eliminaciones(self, eliminaciones):
+        """
+        Eliminaciones de filas que el usuario podía ver, según los valores guardados
+        en Eliminacion. Las vistas cuyo alcance depende del usuario lo redefinen junto
+        con get_queryset.
+        """
+        return eliminaciones
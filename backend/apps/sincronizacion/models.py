@@ -0,0 +1,47 @@
+from django.db import models
+
+class Eliminacion(models.Model):
+    """
+    Registro de una fila eliminada o que dejó de ser visible para quien la veía, para
+    informarlo a los clientes que sincronizan por cursor. Lo escriben triggers de la
+    base de datos.
+    """
+    tabla = models.CharField(max_length=100)
+    objeto_id = models.BigIntegerField()
+    # Transacción que eliminó la fila, comparable con el campo version de los modelos
+    version = models.BigIntegerField()
+    fecha = models.DateTimeField(auto_now_add=True)
+    # Valores de los que dependía la visibilidad de la fila: su ciudadano, el usuario
+    # a cargo (representante o inspector) y el estado de la solicitud
+    ciudadano_id = models.BigIntegerField(null=True)
+    usuario_id = models.BigIntegerField(null=True)
+    estado = models.CharField(max_length=30, null=True)
+    
+    class Meta:
+        verbose_name = 'Eliminación'
+        verbose_name_plural = 'Eliminaciones'
+        ordering = ['version']
+        indexes = [
+            models.Index(fields=['tabla', 'version'], name='eliminacion_tabla_version'),
+        ]
+    
+    def __str__(self):
+        return f"{self.tabla} {self.objeto_id}"
+
+
+class Purga(models.Model):
+    """
+    Purga de las eliminaciones (ver purgar_eliminaciones): se borraron las de
+    version hasta esta, así que un cursor de sincronización que no la supera ya no
+    recibiría todas las suyas y el cliente debe sincronizar desde cero.
+    """
+    version = models.BigIntegerField()
+    fecha = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Purga de eliminaciones'
+        verbose_name_plural = 'Purgas de eliminaciones'
+        ordering = ['-version']
+    
+    def __str__(self):
+        return f"Purga hasta {self.version}"
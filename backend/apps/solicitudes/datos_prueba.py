@@ -0,0 +1,139 @@
+"""
+Datos de prueba de los comandos de verificación y de medición (presupuesto_consultas,
+medir_paginacion, ...).
+
+sembrar() crea sus propios usuarios, uno por rol, y las solicitudes con sus
+inspecciones y entregas, de modo que cada rol vea al menos `cantidad` filas en cada
+listado aunque la base esté vacía. Los comandos la llaman dentro de una transacción
+que revierten al terminar: nada queda guardado ni se publica (los eventos y la
+invalidación de la caché esperan a la confirmación).
+"""
+import base64
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from apps.entregas.models import Entrega, Producto, ReservaStock
+from apps.inspecciones.models import Inspeccion
+from apps.users.models import User
+
+from .models import Solicitud
+
+# Vocabulario de los títulos y descripciones de sembrar_solicitudes()
+PALABRAS = [
+    'techo', 'zinc', 'bloques', 'cemento', 'ventanas', 'puertas', 'pintura', 'arena', 'varillas',
+    'tuberia', 'inodoro', 'lavamanos', 'colchon', 'estufa', 'refrigeradora', 'silla', 'ruedas',
+    'medicinas', 'alimentos', 'cocina', 'electricidad', 'cableado', 'piso', 'baldosas', 'madera',
+    'clavos', 'pared', 'vivienda', 'inundacion', 'incendio', 'familia', 'abuela', 'escuela', 'lluvia',
+]
+
+
+def sembrar(cantidad):
+    """
+    Usuarios de cada rol (y 'admin', un superusuario), `cantidad` solicitudes en cada
+    estado con una inspección y una entrega cada una y `cantidad` productos con stock
+    reservado por las entregas. Devuelve {rol: usuario}.
+    """
+    marca = uuid.uuid4().hex[:8]
+    usuarios = {
+        rol: User.objects.create(username=f'prueba-{marca}-{rol}', rol=rol, cedula=f'prueba-{marca}-{numero}')
+        for numero, (rol, _) in enumerate(User.ROLE_CHOICES)
+    }
+    usuarios['admin'] = User.objects.create(
+        username=f'prueba-{marca}-admin', rol='recepcion', is_superuser=True, is_staff=True)
+
+    solicitudes = Solicitud.objects.bulk_create([
+        Solicitud(
+            ciudadano=usuarios['ciudadano'], creado_por=usuarios['recepcion'],
+            representante=usuarios['representante'], estado=estado,
+            titulo=f'Solicitud de prueba {numero}', descripcion='Materiales para la vivienda',
+        )
+        for numero in range(cantidad)
+        for estado, _ in Solicitud.ESTADO_CHOICES
+    ])
+    hoy = timezone.localdate()
+    Inspeccion.objects.bulk_create([
+        Inspeccion(
+            solicitud=solicitud, inspector=usuarios['trabajo_social'], direccion_visita='Calle 50',
+            fecha_programada=hoy + timedelta(days=numero % 7),
+            lat=8.9 + numero / 10000, lng=-79.5 - numero / 10000,
+        )
+        for numero, solicitud in enumerate(solicitudes)
+    ])
+
+    productos = Producto.objects.bulk_create([
+        Producto(
+            nombre=f'Producto de prueba {numero}', codigo=f'prueba-{marca}-{numero}', unidad_medida='unidad',
+            stock_actual=len(solicitudes), stock_minimo=1,
+        )
+        for numero in range(cantidad)
+    ])
+    entregas = Entrega.objects.bulk_create([
+        Entrega(
+            solicitud=solicitud, encargado=usuarios['almacen'], fecha_programada=hoy + timedelta(days=numero % 7),
+            productos=[{'id': productos[numero % cantidad].pk, 'cantidad': 1}],
+        )
+        for numero, solicitud in enumerate(solicitudes)
+    ])
+    ReservaStock.objects.bulk_create([
+        ReservaStock(entrega=entrega, producto_id=entrega.productos[0]['id'], cantidad=1)
+        for entrega in entregas
+    ])
+    for producto in productos:
+        producto.stock_reservado = sum(entrega.productos[0]['id'] == producto.pk for entrega in entregas)
+    Producto.objects.bulk_update(productos, ['stock_reservado'])
+    return usuarios
+
+
+def sembrar_solicitudes(cantidad, ciudadanos, creado_por):
+    """
+    `cantidad` solicitudes insertadas con una sola sentencia (los triggers llenan
+    version y vector_busqueda), repartidas entre los ciudadanos (ids) y los estados,
+    con un título de tres palabras y una descripción de doce al azar de PALABRAS y
+    una fecha de creación distinta cada una. Para los volúmenes de las mediciones,
+    que no caben en bulk_create.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {Solicitud._meta.db_table} (
+                ciudadano_id, creado_por_id, titulo, descripcion, estado,
+                fecha_creacion, fecha_actualizacion, version
+            )
+            SELECT
+                p.ciudadanos[1 + n %% cardinality(p.ciudadanos)], %s,
+                (SELECT string_agg(p.palabras[1 + floor(random() * cardinality(p.palabras))::int + 0 * g], ' ')
+                 FROM generate_series(1, 3) AS g WHERE n > 0),
+                (SELECT string_agg(p.palabras[1 + floor(random() * cardinality(p.palabras))::int + 0 * g], ' ')
+                 FROM generate_series(1, 12) AS g WHERE n > 0),
+                p.estados[1 + n %% cardinality(p.estados)],
+                now() - n * interval '1 minute', now() - n * interval '1 minute', 0
+            FROM generate_series(1, %s) AS n,
+                 (SELECT %s::bigint[] AS ciudadanos, %s::text[] AS palabras, %s::text[] AS estados) AS p
+            ''',
+            [creado_por, cantidad, list(ciudadanos), PALABRAS, [estado for estado, _ in Solicitud.ESTADO_CHOICES]]
+        )
+
+
+def _base64(datos):
+    return base64.urlsafe_b64encode(datos).rstrip(b'=').decode('ascii')
+
+
+def token_de_prueba(supabase_uid, secreto):
+    """
+    Token de acceso HS256 como los que emite Supabase para el usuario, firmado con
+    `secreto` y válido por una hora.
+    """
+    encabezado = _base64(json.dumps({'alg': 'HS256', 'typ': 'JWT'}).encode())
+    datos = _base64(json.dumps(
+        {'sub': supabase_uid, 'aud': settings.JWT_AUDIENCE, 'exp': int(time.time()) + 3600}
+    ).encode())
+    firma = hmac.new(secreto.encode(), f'{encabezado}.{datos}'.encode('ascii'), hashlib.sha256).digest()
+    return f'{encabezado}.{datos}.{_base64(firma)}'
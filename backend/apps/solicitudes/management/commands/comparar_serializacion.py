@@ -0,0 +1,153 @@
+import datetime
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.entregas.models import Entrega
+from apps.entregas.views import EntregaViewSet
+from apps.inspecciones.models import Inspeccion
+from apps.inspecciones.views import InspeccionViewSet
+from apps.solicitudes.datos_prueba import sembrar
+from apps.solicitudes.models import Solicitud
+from apps.solicitudes.views import SolicitudViewSet
+from apps.users.models import User
+
+# Listados que se leen con .values() (acciones_valores), los roles que los ven y los
+# campos parciales y el orden que se piden en las variantes
+SOLICITUDES = (
+    SolicitudViewSet, ['admin', 'recepcion', 'representante', 'trabajo_social', 'almacen', 'ciudadano'],
+    'id,estado_display,ciudadano_info.username,representante_info', '-fecha_actualizacion',
+)
+INSPECCIONES = (InspeccionViewSet, ['trabajo_social'], 'id,resultado_display,inspector_info.rol,lat', 'fecha_programada')
+ENTREGAS = (EntregaViewSet, ['almacen'], 'id,completada,encargado_info.username,productos', '-fecha_programada')
+LISTADOS = [
+    ('/api/solicitudes/', *SOLICITUDES),
+    ('/api/inspecciones/', *INSPECCIONES),
+    ('/api/inspecciones/pendientes/', *INSPECCIONES),
+    ('/api/inspecciones/programadas/', *INSPECCIONES),
+    ('/api/entregas/', *ENTREGAS),
+    ('/api/entregas/pendientes/', *ENTREGAS),
+    ('/api/entregas/programadas/', *ENTREGAS),
+]
+
+# Variantes de cada listado: página, orden, campos parciales, flujo y búsqueda
+PARAMETROS = [
+    'page_size=200',
+    'page_size=7&ordering={orden}',
+    'page_size=50&fields={campos}',
+    'page_size=50&expand=',
+    'stream=1',
+    'page_size=50&search=ñandú',
+]
+
+ZONAS = ['America/Panama', 'UTC', 'Asia/Kolkata']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara, byte a byte, la respuesta de cada listado leído con .values() (core.valores) '
+        'con la del serializador del viewset, para cada rol, variante de parámetros y zona '
+        'horaria. Los datos de prueba se crean en una transacción que se revierte.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cantidad', type=int, default=20, help='Solicitudes de prueba por estado.')
+
+    def handle(self, *args, **options):
+        comparadas, diferencias = 0, []
+        # Sin caché de respuestas: la segunda lectura no debe salir de la primera
+        with override_settings(CACHE_RESPUESTAS_ALIAS='default'), transaction.atomic():
+            usuarios = sembrar(options['cantidad'])
+            self._casos_limite(usuarios)
+            for ruta, viewset, roles, campos, orden in LISTADOS:
+                for rol in roles:
+                    for parametros in PARAMETROS:
+                        parametros = parametros.format(campos=campos, orden=orden)
+                        for zona in ZONAS:
+                            with timezone.override(zona):
+                                valores = self._leer(viewset, f'{ruta}?{parametros}', usuarios[rol], True)
+                                serializador = self._leer(viewset, f'{ruta}?{parametros}', usuarios[rol], False)
+                            comparadas += 1
+                            if valores != serializador:
+                                diferencias.append((ruta, parametros, rol, zona, valores, serializador))
+            transaction.set_rollback(True)
+
+        for ruta, parametros, rol, zona, valores, serializador in diferencias[:10]:
+            posicion = next(
+                (i for i, (a, b) in enumerate(zip(valores, serializador)) if a != b), min(len(valores), len(serializador))
+            )
+            self.stdout.write(self.style.ERROR(
+                f'FALLA {ruta}?{parametros} ({rol}, {zona}) desde el byte {posicion}:\n'
+                f'  valores:      {valores[max(posicion - 80, 0):posicion + 120]!r}\n'
+                f'  serializador: {serializador[max(posicion - 80, 0):posicion + 120]!r}'
+            ))
+        self.stdout.write(f'{comparadas} respuestas comparadas, {len(diferencias)} con diferencias')
+        if diferencias:
+            raise CommandError('La lectura con .values() no coincide con el serializador')
+
+    def _leer(self, viewset, ruta, usuario, con_valores):
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        caches['default'].clear()
+        original = viewset.acciones_valores
+        if not con_valores:
+            viewset.acciones_valores = ()
+        try:
+            respuesta = cliente.get(ruta)
+        finally:
+            viewset.acciones_valores = original
+        if respuesta.status_code != 200:
+            raise CommandError(f'{ruta} ({usuario.rol}) respondió {respuesta.status_code}')
+        if respuesta.streaming:
+            return b''.join(respuesta.streaming_content)
+        return respuesta.content
+
+    def _casos_limite(self, usuarios):
+        """
+        Filas con lo que la conversión puede tratar distinto: relaciones y campos nulos,
+        textos con acentos, comillas y emojis, fechas con microsegundos y en el límite
+        del día, números sin decimales y JSON anidado.
+        """
+        sin_datos = User.objects.create(
+            username=f'{usuarios["ciudadano"].username}-ñandú', rol='ciudadano', email='',
+            first_name='Ñandú "Comillas" \\ 🚀', cedula=None, telefono=None, direccion=None,
+        )
+        solicitudes = [
+            Solicitud.objects.create(
+                ciudadano=sin_datos, creado_por=None, representante=None, estado='pendiente',
+                titulo='Techo de ñandú 🚀', descripcion='Línea 1\nLínea 2\t"citada"', notas_internas=None,
+            ),
+            Solicitud.objects.create(
+                ciudadano=usuarios['ciudadano'], creado_por=usuarios['recepcion'], representante=usuarios['representante'],
+                estado='aprobado_representante', titulo='ñandú con fecha', descripcion='',
+                fecha_aprobacion_representante=datetime.datetime(2024, 12, 31, 23, 59, 59, 999999, tzinfo=datetime.timezone.utc),
+                notas_internas='',
+            ),
+            Solicitud.objects.create(
+                ciudadano=usuarios['ciudadano'], representante=usuarios['representante'], estado='aprobado_social',
+                titulo='Entrega de ñandú', descripcion='Sin fecha programada',
+                fecha_aprobacion_representante=datetime.datetime(2025, 1, 1, 0, 0, tzinfo=datetime.timezone.utc),
+            ),
+        ]
+        Inspeccion.objects.create(
+            solicitud=solicitudes[1], inspector=usuarios['trabajo_social'], direccion_visita='Casa ñandú 🚀',
+            fecha_programada=None, lat=None, lng=None, notas=None, fotos=[],
+        )
+        Inspeccion.objects.create(
+            solicitud=solicitudes[1], inspector=usuarios['trabajo_social'], direccion_visita='Calle 50',
+            fecha_programada=datetime.date(2025, 2, 28), lat=9.0, lng=-79, resultado='aprobado',
+            notas='ñandú', fotos=[{'url': 'https://ejemplo.com/foto.jpg', 'ancho': 1.5}],
+        )
+        Entrega.objects.create(
+            solicitud=solicitudes[2], encargado=usuarios['almacen'], fecha_programada=None,
+            comentarios=None, firma_receptor=None, productos=[], evidencia_fotos=[],
+        )
+        Entrega.objects.create(
+            solicitud=solicitudes[2], encargado=usuarios['almacen'], fecha_programada=datetime.date(2025, 3, 1),
+            comentarios='ñandú 🚀', completada=True, productos=[{'id': 1, 'cantidad': 2, 'nota': None}],
+            evidencia_fotos=['https://ejemplo.com/a.jpg'],
+        )
@@ -0,0 +1,190 @@
+import asyncio
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.solicitudes.datos_prueba import token_de_prueba
+from apps.solicitudes.models import Solicitud
+from apps.users.models import User
+
+
+async def _leer_respuesta(lector):
+    """
+    Lee una respuesta HTTP/1.1 completa (con Content-Length o chunked) y devuelve
+    (código, mantener la conexión).
+    """
+    cabecera = await lector.readuntil(b'\r\n\r\n')
+    lineas = cabecera.decode('latin-1').split('\r\n')
+    codigo = int(lineas[0].split()[1])
+    encabezados = {}
+    for linea in lineas[1:]:
+        if ':' in linea:
+            nombre, valor = linea.split(':', 1)
+            encabezados[nombre.strip().lower()] = valor.strip().lower()
+
+    if 'content-length' in encabezados:
+        await lector.readexactly(int(encabezados['content-length']))
+    elif encabezados.get('transfer-encoding') == 'chunked':
+        while True:
+            largo = int((await lector.readuntil(b'\r\n')).split(b';')[0], 16)
+            await lector.readexactly(largo + 2)
+            if largo == 0:
+                break
+    return codigo, encabezados.get('connection') != 'close'
+
+
+async def _cliente(puerto, peticion, fin, latencias, errores):
+    """
+    Envía la petición en una conexión keep-alive hasta `fin`, reconectando si se cae.
+    """
+    lector = escritor = None
+    while time.monotonic() < fin:
+        try:
+            if escritor is None:
+                lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+            inicio = time.perf_counter()
+            escritor.write(peticion)
+            await escritor.drain()
+            codigo, mantener = await _leer_respuesta(lector)
+            latencias.append(time.perf_counter() - inicio)
+            if codigo != 200:
+                errores.append(codigo)
+            if not mantener:
+                escritor.close()
+                escritor = None
+        except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            errores.append('conexión')
+            escritor = None
+            await asyncio.sleep(0.05)
+    if escritor is not None:
+        escritor.close()
+
+
+async def _carga(puerto, ruta, token, concurrencia, duracion):
+    peticion = (
+        f'GET {ruta} HTTP/1.1\r\nHost: localhost\r\nAuthorization: Bearer {token}\r\n\r\n'
+    ).encode('ascii')
+    latencias = []
+    errores = []
+    fin = time.monotonic() + duracion
+    await asyncio.gather(*(
+        _cliente(puerto, peticion, fin, latencias, errores) for _ in range(concurrencia)
+    ))
+    return sorted(latencias), errores
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara peticiones por segundo y latencias p50/p99 de las lecturas de solicitudes '
+        'con gunicorn en modo wsgi (workers gthread, vistas síncronas) y en modo asgi '
+        '(workers de uvicorn, vistas asíncronas) a alta concurrencia. Arranca cada servidor '
+        'con gunicorn.conf.py sobre la base configurada y mide con los datos que ya '
+        'tiene; crea un superusuario temporal que se borra al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrencia', type=int, nargs='+', default=[50, 200])
+        parser.add_argument('--duracion', type=float, default=15, help='Segundos de medición por caso.')
+        parser.add_argument('--calentamiento', type=float, default=3)
+        parser.add_argument('--puerto', type=int, default=8765)
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--rutas', nargs='+', help='Por defecto el listado y el detalle de la última solicitud pendiente.')
+
+    def handle(self, *args, **options):
+        rutas = options['rutas']
+        if not rutas:
+            # El usuario de la medición es representante: puede ver el detalle de las pendientes
+            ultima = Solicitud.objects.filter(estado='pendiente').order_by('-pk').values_list('pk', flat=True).first()
+            if ultima is None:
+                raise CommandError('No hay solicitudes pendientes: la medición usa los datos existentes')
+            rutas = ['/api/solicitudes/?page_size=20', f'/api/solicitudes/{ultima}/']
+
+        secreto = settings.JWT_SECRET or secrets.token_hex(32)
+        marca = uuid.uuid4().hex[:8]
+        usuario = User.objects.create(
+            username=f'medicion-{marca}', cedula=f'medicion-{marca}', rol='representante',
+            is_superuser=True, is_staff=True, supabase_uid=str(uuid.uuid4()),
+        )
+        token = token_de_prueba(usuario.supabase_uid, secreto)
+
+        resultados = {}
+        try:
+            for modo in ('wsgi', 'asgi'):
+                with _Servidor(modo, secreto, options):
+                    for ruta in rutas:
+                        for concurrencia in options['concurrencia']:
+                            asyncio.run(_carga(options['puerto'], ruta, token, concurrencia, options['calentamiento']))
+                            latencias, errores = asyncio.run(
+                                _carga(options['puerto'], ruta, token, concurrencia, options['duracion'])
+                            )
+                            if not latencias:
+                                raise CommandError(f'{modo} {ruta}: ninguna respuesta ({errores[:5]})')
+
+                            por_segundo = len(latencias) / options['duracion']
+                            resultados[modo, ruta, concurrencia] = por_segundo
+                            self.stdout.write(
+                                f'{modo} {ruta} con {concurrencia} conexiones: {por_segundo:7.0f} peticiones/s, '
+                                f'p50 {1000 * latencias[len(latencias) // 2]:7.0f} ms, '
+                                f'p99 {1000 * latencias[int(len(latencias) * 0.99)]:7.0f} ms, '
+                                f'{len(errores)} errores {dict(Counter(errores)) if errores else ""}'
+                            )
+        finally:
+            usuario.delete()
+
+        for ruta in rutas:
+            for concurrencia in options['concurrencia']:
+                self.stdout.write(
+                    f'asgi / wsgi {ruta} con {concurrencia} conexiones: '
+                    f'{resultados["asgi", ruta, concurrencia] / resultados["wsgi", ruta, concurrencia]:.2f}x'
+                )
+
+
+class _Servidor:
+    """
+    gunicorn -c gunicorn.conf.py en un subproceso, mientras dura el bloque with.
+    """
+
+    def __init__(self, modo, secreto, options):
+        self.puerto = options['puerto']
+        self.entorno = dict(
+            os.environ, GUNICORN_MODO=modo, PORT=str(self.puerto),
+            WEB_CONCURRENCY=str(options['workers']), JWT_SECRET=secreto,
+        )
+
+    def __enter__(self):
+        self.salida = tempfile.TemporaryFile()
+        self.proceso = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+             '--log-level', 'warning', '--access-logfile', '/dev/null'],
+            cwd=settings.BASE_DIR, env=self.entorno, stdout=self.salida, stderr=subprocess.STDOUT,
+        )
+        limite = time.monotonic() + 60
+        while time.monotonic() < limite:
+            if self.proceso.poll() is not None:
+                self.salida.seek(0)
+                raise CommandError(f'gunicorn terminó al arrancar:\n{self.salida.read().decode()[-2000:]}')
+            try:
+                socket.create_connection(('127.0.0.1', self.puerto), timeout=1).close()
+                return self
+            except OSError:
+                time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise CommandError(f'gunicorn no abrió el puerto {self.puerto}')
+
+    def __exit__(self, *exc):
+        self.proceso.terminate()
+        try:
+            self.proceso.wait(timeout=40)
+        except subprocess.TimeoutExpired:
+            self.proceso.kill()
+            self.proceso.wait()
+        self.salida.close()
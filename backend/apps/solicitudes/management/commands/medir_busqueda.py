@@ -0,0 +1,92 @@
+import statistics
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework import filters
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from apps.solicitudes.datos_prueba import sembrar, sembrar_solicitudes
+from apps.solicitudes.models import Solicitud
+from apps.solicitudes.views import SolicitudViewSet
+
+# Los campos que recorría el SearchFilter de DRF antes de la búsqueda de texto completo
+CAMPOS_ICONTAINS = ['titulo', 'descripcion', 'ciudadano__username', 'ciudadano__first_name', 'ciudadano__last_name']
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide GET /api/solicitudes/?search= con la búsqueda de texto completo '
+        '(BusquedaTextoCompleto) frente al SearchFilter de DRF con icontains que usaba '
+        'antes la vista. Los datos de prueba se crean en una transacción que se revierte.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=1000000)
+        parser.add_argument(
+            '--terminos', nargs='+', default=['techo', 'cemento ventanas', 'refri', 'xilofono'],
+            help='Búsquedas a medir: una palabra frecuente, dos palabras, un prefijo y una que no aparece.'
+        )
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeticiones', type=int, default=10)
+
+    def handle(self, *args, **options):
+        backends = {
+            'texto completo': (SolicitudViewSet.filter_backends, getattr(SolicitudViewSet, 'search_fields', None)),
+            'icontains': ([filters.SearchFilter, filters.OrderingFilter], CAMPOS_ICONTAINS),
+        }
+        originales = backends['texto completo']
+
+        with override_settings(CACHE_RESPUESTAS_ALIAS='default'), transaction.atomic():
+            usuarios = sembrar(1)
+            comienzo = time.perf_counter()
+            sembrar_solicitudes(options['filas'], [usuarios['ciudadano'].pk], usuarios['recepcion'].pk)
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {Solicitud._meta.db_table}')
+            self.stdout.write(f'{options["filas"]} solicitudes creadas en {time.perf_counter() - comienzo:.1f} s')
+
+            cliente = APIClient()
+            cliente.force_authenticate(usuarios['admin'])
+            try:
+                for termino in options['terminos']:
+                    medianas = {}
+                    for nombre, (filter_backends, search_fields) in backends.items():
+                        SolicitudViewSet.filter_backends = filter_backends
+                        SolicitudViewSet.search_fields = search_fields
+                        coincidencias = self._contar(termino, filter_backends[0], search_fields)
+
+                        tiempos = []
+                        for _ in range(options['repeticiones']):
+                            caches['default'].clear()
+                            inicio = time.perf_counter()
+                            respuesta = cliente.get(
+                                '/api/solicitudes/', {'search': termino, 'page_size': options['page_size']}
+                            )
+                            tiempos.append(time.perf_counter() - inicio)
+                            if respuesta.status_code != 200:
+                                raise CommandError(f'{nombre} "{termino}": {respuesta.status_code}')
+
+                        medianas[nombre] = statistics.median(tiempos)
+                        self.stdout.write(
+                            f'"{termino}" {nombre:>14}: {coincidencias:8d} coincidencias, primera página '
+                            f'mediana {1000 * medianas[nombre]:8.1f} ms, máximo {1000 * max(tiempos):8.1f} ms'
+                        )
+                    self.stdout.write(
+                        f'"{termino}": icontains / texto completo {medianas["icontains"] / medianas["texto completo"]:.1f}x'
+                    )
+            finally:
+                SolicitudViewSet.filter_backends = originales[0]
+                if originales[1] is None:
+                    del SolicitudViewSet.search_fields
+            transaction.set_rollback(True)
+
+    def _contar(self, termino, backend, search_fields):
+        """
+        Cuántas solicitudes devuelve el filtro de búsqueda para el término.
+        """
+        vista = SolicitudViewSet(search_fields=search_fields)
+        request = Request(APIRequestFactory().get('/', {'search': termino}))
+        return backend().filter_queryset(request, Solicitud.objects.all(), vista).count()
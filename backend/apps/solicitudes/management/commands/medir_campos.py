@@ -0,0 +1,68 @@
+import statistics
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from apps.solicitudes.datos_prueba import sembrar
+from apps.solicitudes.models import Solicitud
+
+# Lecturas, el rol que las pide y los campos de una pantalla de la app móvil
+LECTURAS = [
+    ('/api/solicitudes/?page_size={tamano}', 'admin', 'id,titulo,estado,fecha_creacion'),
+    ('/api/inspecciones/?page_size={tamano}', 'trabajo_social', 'id,solicitud,fecha_programada,resultado'),
+    ('/api/entregas/?page_size={tamano}', 'almacen', 'id,solicitud,fecha_programada,completada'),
+    ('/api/solicitudes/{solicitud}/', 'recepcion', 'id,titulo,estado,fecha_creacion'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara tamaño de la respuesta, latencia y consultas de los listados y del detalle '
+        'completos frente a los mismos con ?expand= (solo los campos propios) y con ?fields= '
+        '(los campos de una pantalla móvil). Los datos de prueba se crean en una transacción '
+        'que se revierte.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cantidad', type=int, default=20, help='Solicitudes de prueba por estado.')
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeticiones', type=int, default=30)
+
+    def handle(self, *args, **options):
+        with override_settings(CACHE_RESPUESTAS_ALIAS='default'), transaction.atomic():
+            usuarios = sembrar(options['cantidad'])
+            solicitud = Solicitud.objects.filter(creado_por=usuarios['recepcion']).values_list('pk', flat=True).first()
+
+            for ruta, rol, campos in LECTURAS:
+                ruta = ruta.format(tamano=options['page_size'], solicitud=solicitud)
+                cliente = APIClient()
+                cliente.force_authenticate(usuarios[rol])
+
+                base = None
+                separador = '&' if '?' in ruta else '?'
+                for variante in ('', f'{separador}expand=', f'{separador}fields={campos}'):
+                    tiempos = []
+                    for _ in range(options['repeticiones']):
+                        caches['default'].clear()
+                        with CaptureQueriesContext(connection) as consultas:
+                            inicio = time.perf_counter()
+                            respuesta = cliente.get(ruta + variante)
+                            tiempos.append(time.perf_counter() - inicio)
+                        if respuesta.status_code != 200:
+                            raise CommandError(f'{ruta}{variante} ({rol}): {respuesta.status_code}')
+
+                    tamano = len(respuesta.content)
+                    mediana = statistics.median(tiempos)
+                    uniones = max(consulta['sql'].count(' JOIN ') for consulta in consultas.captured_queries)
+                    if base is None:
+                        base = (tamano, mediana)
+                    self.stdout.write(
+                        f'{ruta}{variante or " (completa)"}: {tamano / 1024:7.1f} KB '
+                        f'({tamano / base[0]:4.0%}), mediana {1000 * mediana:6.1f} ms ({mediana / base[1]:4.0%}), '
+                        f'{len(consultas)} consultas, {uniones} JOIN'
+                    )
+            transaction.set_rollback(True)
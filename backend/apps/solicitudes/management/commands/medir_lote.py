@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.solicitudes.datos_prueba import sembrar
+from apps.solicitudes.models import Solicitud
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide POST /api/solicitudes/crear_lote/ con N filas frente a N POST /api/solicitudes/ '
+        'de una solicitud. Todo ocurre en una transacción que se revierte, así que las N '
+        'peticiones individuales no pagan la confirmación de cada una: la diferencia real '
+        'es mayor que la medida.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanos', type=int, nargs='+', default=[10, 100, 500])
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            usuarios = sembrar(1)
+            cliente = APIClient()
+            cliente.force_authenticate(usuarios['recepcion'])
+
+            for tamano in options['tamanos']:
+                filas = [
+                    {
+                        'titulo': f'Solicitud de lote {numero}',
+                        'descripcion': 'Láminas de zinc para el techo',
+                        'ciudadano': usuarios['ciudadano'].pk,
+                    }
+                    for numero in range(tamano)
+                ]
+
+                antes = Solicitud.objects.count()
+                with CaptureQueriesContext(connection) as consultas:
+                    inicio = time.perf_counter()
+                    for fila in filas:
+                        respuesta = cliente.post('/api/solicitudes/', fila, format='json')
+                        if respuesta.status_code != 201:
+                            raise CommandError(f'POST individual: {respuesta.status_code} {respuesta.data}')
+                    individuales = time.perf_counter() - inicio
+                consultas_individuales = len(consultas)
+
+                with CaptureQueriesContext(connection) as consultas:
+                    inicio = time.perf_counter()
+                    respuesta = cliente.post('/api/solicitudes/crear_lote/', filas, format='json')
+                    lote = time.perf_counter() - inicio
+                if respuesta.status_code not in (200, 201) or Solicitud.objects.count() - antes != 2 * tamano:
+                    raise CommandError(f'crear_lote: {respuesta.status_code} {respuesta.data}')
+
+                self.stdout.write(
+                    f'{tamano:5d} solicitudes: {tamano} POST {1000 * individuales:8.1f} ms '
+                    f'({consultas_individuales} consultas), crear_lote {1000 * lote:7.1f} ms '
+                    f'({len(consultas)} consultas), {individuales / lote:.1f}x'
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,105 @@
+import statistics
+import time
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.pagination import Cursor
+from rest_framework.test import APIClient
+
+from apps.solicitudes.datos_prueba import sembrar, sembrar_solicitudes
+from apps.solicitudes.models import Solicitud
+from core.pagination import PaginacionCursor
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide la latencia del listado de solicitudes en páginas cada vez más profundas: '
+        'cada página se pide con el cursor que entregaría la anterior y se compara con la '
+        'misma página leída con LIMIT/OFFSET. Los datos de prueba se crean en una '
+        'transacción que se revierte.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--filas', type=int, default=500000,
+            help='Solicitudes de prueba; la página 10000 de 50 filas necesita 500000.'
+        )
+        parser.add_argument('--paginas', type=int, nargs='+', default=[1, 100, 1000, 10000])
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeticiones', type=int, default=20)
+
+    def handle(self, *args, **options):
+        tamano = options['page_size']
+        paginas = sorted(options['paginas'])
+        if (paginas[-1] - 1) * tamano >= options['filas']:
+            raise CommandError(f'La página {paginas[-1]} necesita más de {(paginas[-1] - 1) * tamano} filas')
+
+        medianas = {}
+        with override_settings(CACHE_RESPUESTAS_ALIAS='default'), transaction.atomic():
+            usuarios = sembrar(1)
+            comienzo = time.perf_counter()
+            sembrar_solicitudes(options['filas'], [usuarios['ciudadano'].pk], usuarios['recepcion'].pk)
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {Solicitud._meta.db_table}')
+            self.stdout.write(f'{options["filas"]} solicitudes creadas en {time.perf_counter() - comienzo:.1f} s')
+
+            paginador = PaginacionCursor()
+            orden = paginador._con_desempate(Solicitud._meta.ordering)
+            ordenadas = Solicitud.objects.order_by(*orden)
+            cliente = APIClient()
+            cliente.force_authenticate(usuarios['admin'])
+
+            for pagina in paginas:
+                desplazamiento = (pagina - 1) * tamano
+                ruta = f'/api/solicitudes/?page_size={tamano}'
+                if desplazamiento:
+                    # El cursor que devuelve la página anterior: la posición de su última fila
+                    anterior = ordenadas.values(*(campo.lstrip('-') for campo in orden))[desplazamiento - 1]
+                    paginador.base_url = f'http://testserver{ruta}'
+                    ruta = paginador.encode_cursor(
+                        Cursor(offset=0, reverse=False, position=paginador._get_position_from_instance(anterior, orden))
+                    )
+                primera = ordenadas.values_list('pk', flat=True)[desplazamiento]
+
+                peticiones = []
+                for _ in range(options['repeticiones']):
+                    caches['default'].clear()
+                    with CaptureQueriesContext(connection) as consultas:
+                        inicio = time.perf_counter()
+                        respuesta = cliente.get(ruta)
+                        peticiones.append(time.perf_counter() - inicio)
+                    if respuesta.status_code != 200 or respuesta.data['results'][0]['id'] != primera:
+                        raise CommandError(f'La página {pagina} no empieza en la solicitud {primera}')
+
+                # La consulta de la página, sola, frente a la misma página con OFFSET
+                pagina_sql = next(consulta['sql'] for consulta in consultas.captured_queries if 'LIMIT' in consulta['sql'])
+                offset_sql = str(ordenadas.select_related('ciudadano', 'creado_por', 'representante')[
+                    desplazamiento:desplazamiento + tamano].query)
+                con_cursor = self._medir(pagina_sql, options['repeticiones'])
+                con_offset = self._medir(offset_sql, options['repeticiones'])
+
+                medianas[pagina] = statistics.median(peticiones)
+                self.stdout.write(
+                    f'página {pagina:6d}: petición {1000 * medianas[pagina]:7.1f} ms; consulta con cursor '
+                    f'{1000 * con_cursor:7.1f} ms, con OFFSET {desplazamiento} {1000 * con_offset:7.1f} ms (medianas)'
+                )
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f'página {paginas[-1]} / página {paginas[0]} con cursor: {medianas[paginas[-1]] / medianas[paginas[0]]:.2f}x'
+        )
+
+    def _medir(self, sql, repeticiones):
+        """
+        Mediana en segundos de ejecutar la consulta y leer sus filas.
+        """
+        tiempos = []
+        with connection.cursor() as cursor:
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                cursor.execute(sql)
+                cursor.fetchall()
+                tiempos.append(time.perf_counter() - inicio)
+        return statistics.median(tiempos)
@@ -0,0 +1,112 @@
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.solicitudes.datos_prueba import sembrar, sembrar_solicitudes
+from apps.solicitudes.models import Solicitud
+from apps.solicitudes.views import SolicitudViewSet
+from core.renderers import JSONRendererRapido
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide memoria (pico de tracemalloc) y tiempo de GET /api/solicitudes/ con todas las '
+        'solicitudes: en una sola respuesta, como antes (sin paginación, renderizada con el '
+        'JSONRenderer de DRF y con JSONRendererRapido), y con ?stream=1. Compara además los '
+        'dos renderers sobre los mismos datos. Los datos de prueba se crean en una '
+        'transacción que se revierte.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=30000)
+        parser.add_argument('--repeticiones', type=int, default=3, help='Repeticiones de la comparación de renderers.')
+
+    def handle(self, *args, **options):
+        originales = (
+            SolicitudViewSet.pagination_class, SolicitudViewSet.renderer_classes, SolicitudViewSet.cache_dependencias
+        )
+        casos = [
+            ('completa, DRF', None, [JSONRenderer], ''),
+            ('completa, orjson', None, originales[1], ''),
+            ('?stream=1', originales[0], originales[1], '?stream=1'),
+        ]
+
+        with transaction.atomic():
+            usuarios = sembrar(1)
+            sembrar_solicitudes(options['filas'], [usuarios['ciudadano'].pk], usuarios['recepcion'].pk)
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {Solicitud._meta.db_table}')
+            total = Solicitud.objects.count()
+            cliente = APIClient()
+            cliente.force_authenticate(usuarios['admin'])
+
+            # Primera lectura sin medir: la carga inicial no se le cuenta al primer caso
+            self._leer(cliente, '/api/solicitudes/?stream=1')
+            tamanos = set()
+            datos = None
+            try:
+                # La respuesta completa no se guarda en la caché de respuestas
+                SolicitudViewSet.cache_dependencias = {}
+                for nombre, pagination_class, renderer_classes, parametros in casos:
+                    SolicitudViewSet.pagination_class = pagination_class
+                    SolicitudViewSet.renderer_classes = renderer_classes
+
+                    inicio = time.perf_counter()
+                    respuesta, tamano = self._leer(cliente, f'/api/solicitudes/{parametros}')
+                    duracion = time.perf_counter() - inicio
+                    if datos is None:
+                        datos = respuesta.data
+                    del respuesta
+
+                    tracemalloc.start()
+                    respuesta, _ = self._leer(cliente, f'/api/solicitudes/{parametros}')
+                    del respuesta
+                    pico = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+
+                    tamanos.add(tamano)
+                    self.stdout.write(
+                        f'{nombre:>17}: {total} solicitudes, {tamano / 2 ** 20:6.1f} MB en {duracion:6.2f} s '
+                        f'({total / duracion:7.0f} filas/s), pico de memoria {pico / 2 ** 20:7.1f} MB'
+                    )
+            finally:
+                (
+                    SolicitudViewSet.pagination_class, SolicitudViewSet.renderer_classes,
+                    SolicitudViewSet.cache_dependencias
+                ) = originales
+            transaction.set_rollback(True)
+
+        if len(tamanos) != 1 or len(datos) != total:
+            raise CommandError(f'Las respuestas no coinciden: {sorted(tamanos)} bytes, {len(datos)} de {total} filas')
+
+        tiempos = {}
+        for renderer in (JSONRenderer(), JSONRendererRapido()):
+            muestras = []
+            for _ in range(options['repeticiones']):
+                inicio = time.perf_counter()
+                renderer.render(datos)
+                muestras.append(time.perf_counter() - inicio)
+            tiempos[type(renderer).__name__] = statistics.median(muestras)
+        if JSONRenderer().render(datos) != JSONRendererRapido().render(datos):
+            raise CommandError('JSONRendererRapido no produce los mismos bytes que JSONRenderer')
+        self.stdout.write(
+            f'solo el renderer: JSONRenderer {1000 * tiempos["JSONRenderer"]:.0f} ms, '
+            f'JSONRendererRapido {1000 * tiempos["JSONRendererRapido"]:.0f} ms '
+            f'({tiempos["JSONRenderer"] / tiempos["JSONRendererRapido"]:.1f}x)'
+        )
+
+    def _leer(self, cliente, ruta):
+        """
+        Pide la ruta y consume todo el cuerpo; devuelve la respuesta y su tamaño en bytes.
+        """
+        respuesta = cliente.get(ruta)
+        if respuesta.status_code != 200:
+            raise CommandError(f'{ruta}: {respuesta.status_code}')
+        if respuesta.streaming:
+            return respuesta, sum(len(parte) for parte in respuesta.streaming_content)
+        return respuesta, len(respuesta.content)
@@ -0,0 +1,81 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from apps.solicitudes.datos_prueba import sembrar
+
+# Consultas máximas por petición de cada listado, sea cual sea el tamaño de la página:
+# la página con sus usuarios unidos, más la versión del listado para el ETag o, en la
+# sincronización, el snapshot y las eliminaciones. Una relación sin select_related
+# suma una consulta por fila y la cuenta deja de ser constante
+PRESUPUESTOS = {
+    '/api/solicitudes/': 2,
+    '/api/solicitudes/?updated_since=0': 3,
+    '/api/inspecciones/': 2,
+    '/api/inspecciones/pendientes/': 2,
+    '/api/inspecciones/programadas/': 2,
+    '/api/inspecciones/?updated_since=0': 3,
+    '/api/entregas/': 2,
+    '/api/entregas/pendientes/': 2,
+    '/api/entregas/programadas/': 2,
+    '/api/entregas/?updated_since=0': 3,
+    '/api/entregas/productos/': 1,
+    '/api/entregas/productos/disponibles/': 1,
+    '/api/users/by_role/?role=ciudadano': 1,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Cuenta las consultas de cada listado con cada rol y varios tamaños de página sobre '
+        'datos de prueba; falla si la cuenta crece con el tamaño (N+1) o pasa del presupuesto. '
+        'Los datos se crean en una transacción que se revierte.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanos', type=int, nargs='+', default=[5, 50])
+
+    def handle(self, *args, **options):
+        tamanos = sorted(options['tamanos'])
+        fallas = []
+        # Las respuestas no se leen de la caché compartida: se cuenta el listado completo
+        with override_settings(CACHE_RESPUESTAS_ALIAS='default'), transaction.atomic():
+            usuarios = sembrar(tamanos[-1])
+            for ruta, presupuesto in PRESUPUESTOS.items():
+                for rol, usuario in usuarios.items():
+                    cuentas = [self._contar(ruta, usuario, tamano) for tamano in tamanos]
+                    if None in cuentas:
+                        continue
+                    correcta = len(set(cuentas)) == 1 and cuentas[0] <= presupuesto
+                    if not correcta:
+                        fallas.append((ruta, rol))
+                    estilo = self.style.SUCCESS if correcta else self.style.ERROR
+                    self.stdout.write(estilo(
+                        f'{"OK   " if correcta else "FALLA"} {ruta} ({rol}): '
+                        + ', '.join(f'{cuenta} con {tamano}' for cuenta, tamano in zip(cuentas, tamanos))
+                        + f' (presupuesto {presupuesto})'
+                    ))
+            transaction.set_rollback(True)
+
+        if fallas:
+            raise CommandError(f'{len(fallas)} listados pasan del presupuesto de consultas')
+
+    def _contar(self, ruta, usuario, tamano):
+        """
+        Consultas de un GET de la ruta con page_size=tamano, o None si el rol no tiene acceso.
+        """
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        caches['default'].clear()
+        separador = '&' if '?' in ruta else '?'
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = cliente.get(f'{ruta}{separador}page_size={tamano}')
+            if respuesta.streaming:
+                b''.join(respuesta.streaming_content)
+        if respuesta.status_code == 403:
+            return None
+        if respuesta.status_code != 200:
+            raise CommandError(f'{ruta} ({usuario.rol}) respondió {respuesta.status_code}')
+        return len(consultas)
@@ -0,0 +1,155 @@
+import json
+import uuid
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from apps.entregas.models import Entrega
+from apps.inspecciones.models import Inspeccion
+from apps.solicitudes.datos_prueba import sembrar
+from apps.solicitudes.models import Solicitud
+from apps.users.models import User
+
+# Índices con los que cada rol puede leer la primera página de cada listado (ver los
+# índices de los modelos y los filtros de get_queryset); los roles que no aparecen no
+# tienen acceso al listado. Con LIMIT el planificador recorre el índice del orden y
+# filtra cuando los estados del rol no son raros (almacén ve las entregadas); el de
+# estado y fecha lo reemplaza cuando son pocas filas de la tabla
+INDICES = {
+    '/api/solicitudes/': {
+        'admin': 'solicitud_fecha',
+        'recepcion': 'solicitud_fecha',
+        'representante': 'solicitud_fecha',
+        'trabajo_social': ('solicitud_estado_fecha', 'solicitud_fecha'),
+        'almacen': ('solicitud_estado_fecha', 'solicitud_fecha'),
+        'ciudadano': 'solicitud_ciudadano_fecha',
+    },
+    '/api/inspecciones/': {'trabajo_social': 'inspeccion_fecha'},
+    '/api/inspecciones/pendientes/': {'trabajo_social': 'inspeccion_pendientes_fecha'},
+    '/api/inspecciones/programadas/': {'trabajo_social': 'inspeccion_programadas_fecha'},
+    '/api/entregas/': {'almacen': 'entrega_fecha'},
+    '/api/entregas/pendientes/': {'almacen': 'entrega_pendientes_fecha'},
+    '/api/entregas/programadas/': {'almacen': 'entrega_programadas_fecha'},
+    '/api/users/by_role/?role=trabajo_social': {'recepcion': 'user_rol_id'},
+}
+
+TABLAS = {
+    '/api/solicitudes/': 'solicitudes_solicitud',
+    '/api/inspecciones/': 'inspecciones_inspeccion',
+    '/api/entregas/': 'entregas_entrega',
+    '/api/users/': 'users_user',
+}
+
+
+def _nodos(plan):
+    yield plan
+    for hijo in plan.get('Plans', []):
+        yield from _nodos(hijo)
+
+
+class Command(BaseCommand):
+    help = (
+        'Comprueba con EXPLAIN que la primera página de cada listado se lee con el índice '
+        'previsto para cada rol, sin recorrer la tabla completa. Los datos de prueba se '
+        'crean en una transacción que se revierte.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cantidad', type=int, default=100,
+            help='Solicitudes de prueba por estado (cada una con su inspección y su entrega); '
+                 'se agregan 50 veces más solicitudes cerradas.'
+        )
+
+    def handle(self, *args, **options):
+        fallas = []
+        with override_settings(CACHE_RESPUESTAS_ALIAS='default'), transaction.atomic():
+            self._historial(options['cantidad'])
+            usuarios = sembrar(options['cantidad'])
+            with connection.cursor() as cursor:
+                # Estadísticas al día para que el plan sea el de una tabla con datos
+                for tabla in TABLAS.values():
+                    cursor.execute(f'ANALYZE {tabla}')
+
+            for ruta, indices in INDICES.items():
+                tabla = next(tabla for prefijo, tabla in TABLAS.items() if ruta.startswith(prefijo))
+                for rol, previstos in indices.items():
+                    previstos = previstos if isinstance(previstos, tuple) else (previstos,)
+                    nodos = self._plan(ruta, usuarios[rol], tabla)
+                    usados = sorted({nodo['Index Name'] for nodo in nodos if 'Index Name' in nodo})
+                    completa = any(
+                        nodo['Node Type'] == 'Seq Scan' and nodo.get('Relation Name') == tabla for nodo in nodos
+                    )
+                    correcta = any(indice in usados for indice in previstos) and not completa
+                    if not correcta:
+                        fallas.append((ruta, rol))
+                    estilo = self.style.SUCCESS if correcta else self.style.ERROR
+                    self.stdout.write(estilo(
+                        f'{"OK   " if correcta else "FALLA"} {ruta} ({rol}): '
+                        f'{", ".join(usados) or "sin índices"}{" y recorrido completo" if completa else ""} '
+                        f'(previsto {" o ".join(previstos)})'
+                    ))
+            transaction.set_rollback(True)
+
+        if fallas:
+            raise CommandError(f'{len(fallas)} listados no usan el índice previsto')
+
+    def _historial(self, cantidad):
+        """
+        Solicitudes cerradas de otros ciudadanos, con su inspección resuelta y su entrega
+        completada: como en producción, los filtros de cada rol dejan una parte pequeña
+        de la tabla y el plan elegido es el de esa proporción.
+        """
+        marca = uuid.uuid4().hex[:8]
+        ciudadanos = User.objects.bulk_create([
+            User(username=f'historial-{marca}-{numero}', rol='ciudadano') for numero in range(10 * cantidad)
+        ])
+        inspector = User.objects.create(username=f'historial-{marca}-inspector', rol='trabajo_social')
+        encargado = User.objects.create(username=f'historial-{marca}-encargado', rol='almacen')
+        cerradas = ['entregado', 'rechazado_representante', 'rechazado_social', 'rechazado']
+        solicitudes = Solicitud.objects.bulk_create([
+            Solicitud(
+                ciudadano=ciudadanos[numero % len(ciudadanos)], estado=cerradas[numero % len(cerradas)],
+                titulo=f'Solicitud cerrada {numero}', descripcion='Materiales para la vivienda',
+            )
+            for numero in range(50 * cantidad)
+        ])
+        Inspeccion.objects.bulk_create([
+            Inspeccion(
+                solicitud=solicitud, inspector=inspector, direccion_visita='Calle 50',
+                resultado='rechazado' if solicitud.estado == 'rechazado_social' else 'aprobado',
+            )
+            for solicitud in solicitudes if solicitud.estado != 'rechazado_representante'
+        ])
+        Entrega.objects.bulk_create([
+            Entrega(solicitud=solicitud, encargado=encargado, completada=True)
+            for solicitud in solicitudes if solicitud.estado == 'entregado'
+        ])
+
+    def _plan(self, ruta, usuario, tabla):
+        """
+        Nodos del plan de la consulta del listado que hace un GET de la ruta.
+        """
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        caches['default'].clear()
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = cliente.get(ruta)
+        if respuesta.status_code != 200:
+            raise CommandError(f'{ruta} ({usuario.rol}) respondió {respuesta.status_code}')
+
+        listado = [
+            consulta['sql'] for consulta in consultas.captured_queries
+            if f'FROM "{tabla}"' in consulta['sql'] and 'LIMIT' in consulta['sql']
+        ]
+        if not listado:
+            raise CommandError(f'No se encontró la consulta del listado de {ruta}')
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {listado[0]}')
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return list(_nodos(plan[0]['Plan']))
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:03
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import UnaccentExtension
+from django.db import migrations
+
+# Configuración de búsqueda en español que además ignora tildes
+CONFIGURACION_SQL = """
+CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = pg_catalog.spanish);
+ALTER TEXT SEARCH CONFIGURATION spanish_unaccent
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+"""
+
+# El vector se recalcula al insertar o al cambiar las columnas indexadas, y cuando
+# cambian los datos del ciudadano se marcan sus solicitudes para recalcularlas.
+TRIGGERS_SQL = """
+CREATE FUNCTION solicitudes_solicitud_vector_busqueda() RETURNS trigger AS $$
+BEGIN
+    NEW.vector_busqueda :=
+        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.titulo, '')), 'A') ||
+        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.descripcion, '')), 'B') ||
+        setweight(to_tsvector('spanish_unaccent', coalesce(
+            (SELECT concat_ws(' ', u.username, u.first_name, u.last_name)
+             FROM users_user u WHERE u.id = NEW.ciudadano_id), '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER solicitud_vector_busqueda
+    BEFORE INSERT OR UPDATE OF titulo, descripcion, ciudadano_id ON solicitudes_solicitud
+    FOR EACH ROW EXECUTE FUNCTION solicitudes_solicitud_vector_busqueda();
+
+CREATE FUNCTION solicitudes_ciudadano_vector_busqueda() RETURNS trigger AS $$
+BEGIN
+    UPDATE solicitudes_solicitud SET titulo = titulo WHERE ciudadano_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER ciudadano_vector_busqueda_solicitud
+    AFTER UPDATE OF username, first_name, last_name ON users_user
+    FOR EACH ROW
+    WHEN (OLD.username IS DISTINCT FROM NEW.username
+          OR OLD.first_name IS DISTINCT FROM NEW.first_name
+          OR OLD.last_name IS DISTINCT FROM NEW.last_name)
+    EXECUTE FUNCTION solicitudes_ciudadano_vector_busqueda();
+
+UPDATE solicitudes_solicitud SET titulo = titulo;
+"""
+
+TRIGGERS_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS ciudadano_vector_busqueda_solicitud ON users_user;
+DROP FUNCTION IF EXISTS solicitudes_ciudadano_vector_busqueda();
+DROP TRIGGER IF EXISTS solicitud_vector_busqueda ON solicitudes_solicitud;
+DROP FUNCTION IF EXISTS solicitudes_solicitud_vector_busqueda();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitudes', '0002_initial'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        migrations.RunSQL(
+            CONFIGURACION_SQL,
+            reverse_sql='DROP TEXT SEARCH CONFIGURATION IF EXISTS spanish_unaccent;',
+        ),
+        migrations.AddField(
+            model_name='solicitud',
+            name='vector_busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='solicitud',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['vector_busqueda'], name='solicitud_busqueda_gin'),
+        ),
+        migrations.RunSQL(TRIGGERS_SQL, reverse_sql=TRIGGERS_REVERSE_SQL),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:19
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Los índices se crean sin bloquear las escrituras en tablas con datos
+    atomic = False
+
+    dependencies = [
+        ('solicitudes', '0003_busqueda_texto_completo'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='solicitud',
+            index=models.Index(fields=['-fecha_creacion', '-id'], name='solicitud_fecha'),
+        ),
+        AddIndexConcurrently(
+            model_name='solicitud',
+            index=models.Index(fields=['estado', '-fecha_creacion', '-id'], name='solicitud_estado_fecha'),
+        ),
+        AddIndexConcurrently(
+            model_name='solicitud',
+            index=models.Index(fields=['ciudadano', '-fecha_creacion', '-id'], name='solicitud_ciudadano_fecha'),
+        ),
+        AddIndexConcurrently(
+            model_name='solicitud',
+            index=models.Index(fields=['representante', '-fecha_creacion', '-id'], name='solicitud_repr_fecha'),
+        ),
+    ]
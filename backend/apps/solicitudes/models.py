@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 class Solicitud(models.Model):
     ESTADO_CHOICES = (
@@ -41,11 +43,25 @@ class Solicitud(models.Model):
         limit_choices_to={'rol': 'representante'}
     )
     notas_internas = models.TextField(blank=True, null=True)
+    # Transacción que modificó la fila por última vez (trigger); cursor de la sincronización
+    version = models.BigIntegerField(default=0, editable=False)
+    # Mantenido por un trigger de la base de datos (titulo, descripcion y datos del ciudadano)
+    vector_busqueda = SearchVectorField(null=True, editable=False)
     
     class Meta:
         verbose_name = 'Solicitud'
         verbose_name_plural = 'Solicitudes'
         ordering = ['-fecha_creacion']
+        # Los índices siguen los filtros de cada rol en SolicitudViewSet.get_queryset y
+        # terminan en el orden del listado (fecha_creacion, id) que usa la paginación
+        indexes = [
+            GinIndex(fields=['vector_busqueda'], name='solicitud_busqueda_gin'),
+            models.Index(fields=['-fecha_creacion', '-id'], name='solicitud_fecha'),
+            models.Index(fields=['estado', '-fecha_creacion', '-id'], name='solicitud_estado_fecha'),
+            models.Index(fields=['ciudadano', '-fecha_creacion', '-id'], name='solicitud_ciudadano_fecha'),
+            models.Index(fields=['representante', '-fecha_creacion', '-id'], name='solicitud_repr_fecha'),
+            models.Index(fields=['version', 'id'], name='solicitud_version'),
+        ]
     
     def __str__(self):
         return f"{self.titulo} - {self.ciudadano.username} - {self.get_estado_display()}" 
\ No newline at end of file
@@ -1,3 +1,4 @@
+from django.db.models import Q
 from rest_framework import permissions
 
 class EsRepresentante(permissions.BasePermission):
@@ -34,11 +35,11 @@ class EsCreadorOPuedeRevisar(permissions.BasePermission):
     """
     def has_object_permission(self, request, view, obj):
         # Si es el creador de la solicitud
-        if obj.creado_por == request.user:
+        if obj.creado_por_id == request.user.pk:
             return True
         
         # Si es el representante asignado
-        if obj.representante == request.user:
+        if obj.representante_id == request.user.pk:
             return True
         
         # Permisos basados en roles y estado de la solicitud
@@ -51,4 +52,21 @@ class EsCreadorOPuedeRevisar(permissions.BasePermission):
         if request.user.rol == 'almacen' and obj.estado == 'aprobado_social':
             return True
             
-        return False 
\ No newline at end of file
+        return False
+
+def filtro_puede_revisar(user):
+    """
+    Equivalente de EsCreadorOPuedeRevisar como filtro de queryset, para validar
+    muchas solicitudes en una sola consulta.
+    """
+    filtro = Q(creado_por=user) | Q(representante=user)
+    
+    estado = {
+        'representante': 'pendiente',
+        'trabajo_social': 'aprobado_representante',
+        'almacen': 'aprobado_social',
+    }.get(user.rol)
+    if estado:
+        filtro |= Q(estado=estado)
+    
+    return filtro
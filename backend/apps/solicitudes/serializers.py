@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from .models import Solicitud
 from apps.users.serializers import UserSerializer
+from apps.inspecciones.serializers import InspeccionSerializer
+from apps.entregas.serializers import EntregaSerializer
 from django.utils import timezone
 
 class SolicitudSerializer(serializers.ModelSerializer):
@@ -18,6 +20,17 @@ class SolicitudSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'fecha_creacion', 'fecha_actualizacion', 
                            'fecha_aprobacion_representante', 'estado_display']
 
+class SolicitudExpedienteSerializer(SolicitudSerializer):
+    """
+    Solicitud con sus inspecciones y entregas. La vista precarga las dos relaciones
+    (con el inspector y el encargado) para que no se consulten fila por fila.
+    """
+    inspecciones = InspeccionSerializer(many=True, read_only=True)
+    entregas = EntregaSerializer(many=True, read_only=True)
+    
+    class Meta(SolicitudSerializer.Meta):
+        fields = SolicitudSerializer.Meta.fields + ['inspecciones', 'entregas']
+
 class SolicitudCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Solicitud
@@ -29,6 +42,17 @@ class SolicitudCreateSerializer(serializers.ModelSerializer):
         validated_data['creado_por'] = self.context['request'].user
         return super().create(validated_data)
 
+class SolicitudLoteSerializer(serializers.ModelSerializer):
+    """
+    Valida una fila de la carga por lotes. El ciudadano se recibe como id y se
+    resuelve para todo el lote en una sola consulta desde la vista.
+    """
+    ciudadano = serializers.IntegerField()
+    
+    class Meta:
+        model = Solicitud
+        fields = ['titulo', 'descripcion', 'ciudadano']
+
 class SolicitudAprobacionRepresentanteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Solicitud
@@ -58,4 +82,26 @@ class SolicitudCambioEstadoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Solicitud
         fields = ['id', 'estado', 'notas_internas']
-        read_only_fields = ['id'] 
\ No newline at end of file
+        read_only_fields = ['id']
+
+class SolicitudTransicionLoteSerializer(serializers.Serializer):
+    """
+    Cambio de estado de varias solicitudes a la vez.
+    TRANSICIONES indica, para cada estado destino, los estados de origen válidos
+    y el rol que puede aplicarlo (None: cualquier usuario que pueda revisar la solicitud).
+    """
+    TRANSICIONES = {
+        'aprobado_representante': (['pendiente'], 'representante'),
+        'rechazado_representante': (['pendiente'], 'representante'),
+        'en_inspeccion': (['aprobado_representante', 'en_inspeccion'], 'trabajo_social'),
+        'aprobado_social': (['aprobado_representante', 'en_inspeccion'], 'trabajo_social'),
+        'rechazado_social': (['aprobado_representante', 'en_inspeccion'], 'trabajo_social'),
+        'en_entrega': (['aprobado_social'], 'almacen'),
+        'entregado': (['en_entrega'], 'almacen'),
+        'rechazado': ([estado for estado, _ in Solicitud.ESTADO_CHOICES if estado not in ['entregado', 'rechazado']], None),
+    }
+    
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
+    estado = serializers.ChoiceField(choices=list(TRANSICIONES))
+    notas_internas = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
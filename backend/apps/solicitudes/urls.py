@@ -1,10 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import SolicitudViewSet
+from core.asincrono import vista_asincrona
 
 router = DefaultRouter()
 router.register(r'', SolicitudViewSet)
 
 urlpatterns = [
+    # GET atendidos por el camino asíncrono; el resto de métodos pasa al viewset
+    path('', vista_asincrona(SolicitudViewSet, {'get': 'list', 'post': 'create'})),
+    path('<int:pk>/', vista_asincrona(SolicitudViewSet, {
+        'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'
+    })),
     path('', include(router.urls)),
 ] 
\ No newline at end of file
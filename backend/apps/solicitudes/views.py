@@ -1,13 +1,17 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db import transaction
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import BooleanField, ExpressionWrapper, Prefetch, Q
 
 from .models import Solicitud
 from .serializers import (
     SolicitudSerializer, 
+    SolicitudExpedienteSerializer,
     SolicitudCreateSerializer,
+    SolicitudLoteSerializer,
+    SolicitudTransicionLoteSerializer,
     SolicitudAprobacionRepresentanteSerializer,
     SolicitudCambioEstadoSerializer
 )
@@ -16,16 +20,47 @@ from .permissions import (
     EsTrabajoSocial,
     EsAlmacen,
     EsRecepcion,
-    EsCreadorOPuedeRevisar
+    EsCreadorOPuedeRevisar,
+    filtro_puede_revisar
 )
+from apps.cache import versiones
+from apps.cache.mixins import CacheRespuestasMixin
+from apps.entregas.models import Entrega
+from apps.eventos import publicacion
+from apps.inspecciones.models import Inspeccion
+from apps.sincronizacion.mixins import SincronizacionMixin
+from apps.users.models import User
+from core.campos import CamposParcialesMixin
+from core.condicional import ConsultaCondicionalMixin
+from core.exportacion import ExportacionMixin
+from core.filters import BusquedaTextoCompleto
+from core.pagination import ListadoPaginadoMixin
 
-class SolicitudViewSet(viewsets.ModelViewSet):
+class SolicitudViewSet(SincronizacionMixin, CacheRespuestasMixin, ConsultaCondicionalMixin, ExportacionMixin, CamposParcialesMixin, ListadoPaginadoMixin, viewsets.ModelViewSet):
     queryset = Solicitud.objects.all()
     serializer_class = SolicitudSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['titulo', 'descripcion', 'ciudadano__username', 'ciudadano__first_name', 'ciudadano__last_name']
+    filter_backends = [BusquedaTextoCompleto, filters.OrderingFilter]
     ordering_fields = ['fecha_creacion', 'fecha_actualizacion', 'estado']
+    # Máximo de solicitudes por petición en crear_lote
+    MAX_LOTE = 1000
+    # El listado incluye los datos de los usuarios relacionados
+    cache_dependencias = {'list': [Solicitud, User]}
+    # El listado se serializa desde .values() (core.valores), con los tres usuarios unidos
+    acciones_valores = ['list']
+    columnas_exportacion = [
+        ('ID', 'id'),
+        ('Título', 'titulo'),
+        ('Estado', 'estado'),
+        ('Ciudadano', 'ciudadano__username'),
+        ('Cédula', 'ciudadano__cedula'),
+        ('Creada por', 'creado_por__username'),
+        ('Representante', 'representante__username'),
+        ('Fecha de creación', 'fecha_creacion'),
+        ('Última actualización', 'fecha_actualizacion'),
+        ('Aprobación del representante', 'fecha_aprobacion_representante'),
+        ('Descripción', 'descripcion'),
+    ]
     
     def get_queryset(self):
         """
@@ -33,54 +68,92 @@ class SolicitudViewSet(viewsets.ModelViewSet):
         """
         user = self.request.user
         
+        # Cargar los usuarios relacionados en la misma consulta
+        queryset = Solicitud.objects.select_related('ciudadano', 'creado_por', 'representante')
+        
+        # El expediente trae las inspecciones y entregas con su usuario en una consulta cada una
+        if self.action == 'expediente':
+            queryset = queryset.prefetch_related(
+                Prefetch('inspecciones', queryset=Inspeccion.objects.select_related('inspector')),
+                Prefetch('entregas', queryset=Entrega.objects.select_related('encargado'))
+            )
+        
         # Superusuarios ven todo
         if user.is_superuser:
-            return Solicitud.objects.all()
+            return queryset
             
         # Filtrar por rol
         if user.rol == 'ciudadano':
             # Ciudadanos solo ven sus propias solicitudes
-            return Solicitud.objects.filter(ciudadano=user)
+            return queryset.filter(ciudadano=user)
             
         elif user.rol == 'recepcion':
             # Recepción ve todas las solicitudes
-            return Solicitud.objects.all()
+            return queryset
             
         elif user.rol == 'representante':
             # Representantes ven solicitudes pendientes o que ya aprobaron/rechazaron
-            return Solicitud.objects.filter(
+            return queryset.filter(
                 Q(estado='pendiente') | 
                 Q(representante=user)
             )
             
         elif user.rol == 'trabajo_social':
             # Trabajo social ve solicitudes aprobadas por representante o en proceso de inspección
-            return Solicitud.objects.filter(
-                Q(estado='aprobado_representante') | 
-                Q(estado='en_inspeccion')
-            )
+            return queryset.filter(estado__in=['aprobado_representante', 'en_inspeccion'])
             
         elif user.rol == 'almacen':
             # Almacén ve solicitudes aprobadas por trabajo social o en proceso de entrega
-            return Solicitud.objects.filter(
-                Q(estado='aprobado_social') | 
-                Q(estado='en_entrega') | 
-                Q(estado='entregado')
-            )
+            return queryset.filter(estado__in=['aprobado_social', 'en_entrega', 'entregado'])
             
-        return Solicitud.objects.none()
+        return queryset.none()
+    
+    def alcance_eliminaciones(self, eliminaciones):
+        """
+        Las mismas reglas de get_queryset sobre los valores que tenía la solicitud.
+        """
+        user = self.request.user
+        if user.is_superuser or user.rol == 'recepcion':
+            return eliminaciones
+        if user.rol == 'ciudadano':
+            return eliminaciones.filter(ciudadano_id=user.pk)
+        if user.rol == 'representante':
+            return eliminaciones.filter(Q(estado='pendiente') | Q(usuario_id=user.pk))
+        if user.rol == 'trabajo_social':
+            return eliminaciones.filter(estado__in=['aprobado_representante', 'en_inspeccion'])
+        if user.rol == 'almacen':
+            return eliminaciones.filter(estado__in=['aprobado_social', 'en_entrega', 'entregado'])
+        return eliminaciones.none()
+    
+    def alcance_cache(self):
+        """
+        Recepción, trabajo social y almacén ven el mismo listado dentro de su rol;
+        ciudadanos y representantes ven uno propio.
+        """
+        user = self.request.user
+        if user.is_superuser:
+            return 'superusuario'
+        if user.rol in ['recepcion', 'trabajo_social', 'almacen']:
+            return f'rol:{user.rol}'
+        return super().alcance_cache()
     
     def get_serializer_class(self):
         if self.action == 'create':
             return SolicitudCreateSerializer
+        if self.action == 'crear_lote':
+            return SolicitudLoteSerializer
+        if self.action == 'transicion_lote':
+            return SolicitudTransicionLoteSerializer
         if self.action == 'aprobar_representante':
             return SolicitudAprobacionRepresentanteSerializer
         if self.action in ['aprobar_social', 'rechazar']:
             return SolicitudCambioEstadoSerializer
+        if self.action == 'expediente':
+            return SolicitudExpedienteSerializer
         return SolicitudSerializer
     
     def get_permissions(self):
-        if self.action == 'create':
+        if self.action in ['create', 'crear_lote']:
             return [permissions.IsAuthenticated(), EsRecepcion()]
         elif self.action == 'aprobar_representante':
             return [permissions.IsAuthenticated(), EsRepresentante()]
@@ -88,9 +161,157 @@ class SolicitudViewSet(viewsets.ModelViewSet):
             return [permissions.IsAuthenticated(), EsTrabajoSocial()]
         elif self.action in ['entregar', 'marcar_entregado']:
             return [permissions.IsAuthenticated(), EsAlmacen()]
+        elif self.action == 'transicion_lote':
+            # El rol requerido depende del estado destino y se valida en la acción
+            return [permissions.IsAuthenticated()]
         
         return [permissions.IsAuthenticated(), EsCreadorOPuedeRevisar()]
     
+    @action(detail=False, methods=['post'])
+    def crear_lote(self, request):
+        """
+        Crear varias solicitudes a la vez (formularios en papel de jornadas comunitarias).
+        Recibe un arreglo de objetos con titulo, descripcion y ciudadano; las filas
+        válidas se crean y las inválidas se reportan con su número de fila.
+        """
+        filas = request.data
+        if not isinstance(filas, list) or len(filas) == 0:
+            return Response(
+                {"error": "Debe enviar un arreglo con al menos una solicitud"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if len(filas) > self.MAX_LOTE:
+            return Response(
+                {"error": f"El lote no puede tener más de {self.MAX_LOTE} solicitudes"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        validas = []
+        errores = []
+        for numero, fila in enumerate(filas, start=1):
+            serializer = self.get_serializer(data=fila)
+            if serializer.is_valid():
+                validas.append((numero, serializer.validated_data))
+            else:
+                errores.append({"fila": numero, "errores": serializer.errors})
+        
+        # Resolver todos los ciudadanos del lote en una sola consulta
+        ciudadanos = set(User.objects.filter(
+            pk__in={datos['ciudadano'] for _, datos in validas},
+            rol='ciudadano'
+        ).values_list('id', flat=True))
+        
+        numeros = []
+        nuevas = []
+        for numero, datos in validas:
+            if datos['ciudadano'] not in ciudadanos:
+                errores.append({"fila": numero, "errores": {"ciudadano": ["El ciudadano no existe"]}})
+                continue
+            numeros.append(numero)
+            nuevas.append(Solicitud(
+                titulo=datos['titulo'],
+                descripcion=datos['descripcion'],
+                ciudadano_id=datos['ciudadano'],
+                creado_por=request.user
+            ))
+        
+        # Los eventos de una transacción se publican juntos al confirmar
+        with transaction.atomic():
+            creadas = Solicitud.objects.bulk_create(nuevas)
+            # bulk_create no emite señales
+            versiones.invalidar(Solicitud)
+            for solicitud in creadas:
+                publicacion.solicitud(
+                    'solicitud.creada', solicitud.id, solicitud.estado, None, solicitud.ciudadano_id, None
+                )
+        
+        errores.sort(key=lambda error: error['fila'])
+        return Response(
+            {
+                "creadas": [{"fila": numero, "id": solicitud.id} for numero, solicitud in zip(numeros, creadas)],
+                "errores": errores,
+            },
+            status=status.HTTP_201_CREATED if creadas else status.HTTP_400_BAD_REQUEST
+        )
+    
+    @action(detail=False, methods=['post'])
+    def transicion_lote(self, request):
+        """
+        Cambiar de estado varias solicitudes a la vez.
+        Recibe ids, el estado destino y opcionalmente notas_internas. Los estados de
+        origen se validan con una sola consulta y el cambio se aplica con un solo
+        UPDATE; las solicitudes que no pueden cambiar se devuelven como omitidas.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        
+        estado = datos['estado']
+        origen, rol = SolicitudTransicionLoteSerializer.TRANSICIONES[estado]
+        
+        if rol is not None and request.user.rol != rol:
+            return Response(
+                {"error": "Su rol no puede aplicar este cambio de estado"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # update() no actualiza los campos auto_now
+        ahora = timezone.now()
+        cambios = {'estado': estado, 'fecha_actualizacion': ahora}
+        if 'notas_internas' in datos:
+            cambios['notas_internas'] = datos['notas_internas']
+        if rol == 'representante':
+            cambios.update(representante=request.user, fecha_aprobacion_representante=ahora)
+        
+        # Rechazar no depende del rol sino de los mismos criterios que EsCreadorOPuedeRevisar
+        permitido = Q(pk__isnull=False) if rol is not None else filtro_puede_revisar(request.user)
+        
+        ids = list(dict.fromkeys(datos['ids']))
+        aplicadas = []
+        omitidas = []
+        
+        with transaction.atomic():
+            filas = self.get_queryset().filter(pk__in=ids).select_for_update(of=('self',)).annotate(
+                permitido=ExpressionWrapper(permitido, output_field=BooleanField())
+            ).values_list('id', 'estado', 'permitido', 'ciudadano_id', 'representante_id')
+            
+            encontradas = set()
+            for solicitud_id, actual, puede, ciudadano_id, representante_id in filas:
+                encontradas.add(solicitud_id)
+                if not puede:
+                    omitidas.append({"id": solicitud_id, "motivo": "sin_permiso", "estado": actual})
+                elif actual not in origen:
+                    omitidas.append({"id": solicitud_id, "motivo": "estado_no_valido", "estado": actual})
+                else:
+                    aplicadas.append(solicitud_id)
+                    # update() no emite señales: el evento se publica al confirmar
+                    publicacion.solicitud(
+                        'solicitud.estado', solicitud_id, estado, actual, ciudadano_id,
+                        request.user.pk if rol == 'representante' else representante_id
+                    )
+            
+            if aplicadas:
+                Solicitud.objects.filter(pk__in=aplicadas, estado__in=origen).update(**cambios)
+                versiones.invalidar(Solicitud)
+        
+        omitidas.extend(
+            {"id": solicitud_id, "motivo": "no_encontrada"}
+            for solicitud_id in ids if solicitud_id not in encontradas
+        )
+        
+        return Response({"estado": estado, "aplicadas": aplicadas, "omitidas": omitidas})
+    
+    @action(detail=True, methods=['get'])
+    def expediente(self, request, pk=None):
+        """
+        Solicitud con todo su flujo (inspecciones y entregas) en una sola respuesta.
+        El acceso se valida una vez sobre la solicitud, con los mismos permisos que el detalle.
+        """
+        solicitud = self.get_object()
+        serializer = self.get_serializer(solicitud)
+        return Response(serializer.data)
+    
     @action(detail=True, methods=['post'])
     def aprobar_representante(self, request, pk=None):
         """
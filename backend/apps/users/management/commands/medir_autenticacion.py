@@ -0,0 +1,61 @@
+import secrets
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from apps.solicitudes.datos_prueba import sembrar, token_de_prueba
+from core.authentication import cache_usuarios
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide peticiones por segundo y consultas por petición de GET /api/users/me/ '
+        'autenticado con un token de Supabase (SupabaseJWTAuthentication) frente a la '
+        'cookie de sesión (SessionAuthentication). Si JWT_SECRET no está configurado se '
+        'usa uno temporal. Los datos de prueba se crean en una transacción que se revierte.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        secreto = settings.JWT_SECRET or secrets.token_hex(32)
+        with override_settings(JWT_SECRET=secreto), transaction.atomic():
+            usuario = sembrar(1)['recepcion']
+            usuario.supabase_uid = str(uuid.uuid4())
+            usuario.save(update_fields=['supabase_uid'])
+
+            con_token = APIClient()
+            con_token.credentials(HTTP_AUTHORIZATION=f'Bearer {token_de_prueba(usuario.supabase_uid, secreto)}')
+            con_sesion = APIClient()
+            con_sesion.force_login(usuario)
+
+            resultados = {}
+            try:
+                for nombre, cliente in (('token', con_token), ('sesión', con_sesion)):
+                    # La primera petición resuelve el usuario del token y llena la caché
+                    respuesta = cliente.get('/api/users/me/')
+                    if respuesta.status_code != 200 or respuesta.data['id'] != usuario.pk:
+                        raise CommandError(f'{nombre}: {respuesta.status_code} {respuesta.data}')
+
+                    with CaptureQueriesContext(connection) as consultas:
+                        inicio = time.perf_counter()
+                        for _ in range(options['peticiones']):
+                            cliente.get('/api/users/me/')
+                        duracion = time.perf_counter() - inicio
+
+                    resultados[nombre] = options['peticiones'] / duracion
+                    self.stdout.write(
+                        f'{nombre:>6}: {resultados[nombre]:7.0f} peticiones/s, '
+                        f'{len(consultas) / options["peticiones"]:.1f} consultas por petición'
+                    )
+            finally:
+                cache_usuarios.invalidar_usuario(usuario.pk)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'token / sesión: {resultados["token"] / resultados["sesión"]:.2f}x')
@@ -19,6 +19,10 @@ class User(AbstractUser):
     class Meta:
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
+        # Listado por rol (by_role) en el orden de la paginación
+        indexes = [
+            models.Index(fields=['rol', '-id'], name='user_rol_id'),
+        ]
     
     def __str__(self):
         return f"{self.username} - {self.get_rol_display()}" 
\ No newline at end of file
@@ -3,10 +3,18 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import User
 from .serializers import UserSerializer, UserCreateSerializer
+from apps.cache.mixins import CacheRespuestasMixin
+from core.campos import CamposParcialesMixin
+from core.pagination import ListadoPaginadoMixin
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(CacheRespuestasMixin, CamposParcialesMixin, ListadoPaginadoMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    cache_dependencias = {'by_role': [User]}
+    
+    def alcance_cache(self):
+        # El listado por rol no depende de quién lo consulta
+        return 'todos'
     
     def get_permissions(self):
         if self.action == 'create':
@@ -30,5 +38,4 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response({"error": "Debe especificar un rol"}, status=status.HTTP_400_BAD_REQUEST)
         
         users = User.objects.filter(rol=role)
-        serializer = self.get_serializer(users, many=True)
-        return Response(serializer.data) 
\ No newline at end of file
+        return self.listar_paginado(users) 
\ No newline at end of file
@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application() 
\ No newline at end of file
+django_application = get_asgi_application()
+
+# Las rutas de eventos en vivo (SSE y WebSocket) se atienden fuera del ciclo de Django
+from apps.eventos.asgi import AplicacionEventos  # noqa: E402
+
+application = AplicacionEventos(django_application) 
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Camino de lectura asíncrono para los GET más consultados.
+
+vista_asincrona() construye la vista de una ruta de un viewset: el GET se atiende en
+el event loop y lee con el ORM asíncrono, y los demás métodos pasan a la vista
+síncrona de DRF. Bajo ASGI Django da a cada petición su propio contexto de hilos;
+lo que bloquea (las consultas, la autenticación cuando consulta la base de datos)
+corre en el hilo de ese contexto, así que una consulta lenta detiene solo su
+petición y no al worker. Cada hilo usa su propia conexión a la base de datos, por lo
+que las lecturas simultáneas de un worker se limitan con
+settings.LECTURA_ASINCRONA_CONCURRENCIA; las demás esperan en el event loop sin
+ocupar hilo ni conexión.
+
+Las acciones reutilizan el código del viewset (get_queryset, filtros, serializadores
+y permisos). Con lectura_asincrona, listar_paginado devuelve una corrutina, por lo
+que las acciones de listado (pendientes, programadas...) no se duplican.
+"""
+import asyncio
+import inspect
+import weakref
+
+from asgiref.sync import SyncToAsync, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.http import Http404
+from rest_framework.response import Response
+
+
+# Un semáforo por event loop (un worker ASGI tiene uno solo)
+_limites = weakref.WeakKeyDictionary()
+
+
+def _limite():
+    loop = asyncio.get_running_loop()
+    if loop not in _limites:
+        _limites[loop] = asyncio.Semaphore(settings.LECTURA_ASINCRONA_CONCURRENCIA)
+    return _limites[loop]
+
+
+async def obtener_objeto(vista):
+    """
+    Equivalente asíncrono de GenericAPIView.get_object.
+    """
+    queryset = await sync_to_async(vista.filter_queryset)(vista.get_queryset())
+    lookup_url_kwarg = vista.lookup_url_kwarg or vista.lookup_field
+
+    try:
+        instancia = await queryset.aget(**{vista.lookup_field: vista.kwargs[lookup_url_kwarg]})
+    except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+        raise Http404
+
+    vista.check_object_permissions(vista.request, instancia)
+    return instancia
+
+
+async def _ejecutar(vista, accion, request, args, kwargs):
+    if accion == 'retrieve':
+        if hasattr(vista, 'aretrieve'):
+            return await vista.aretrieve(request, *args, **kwargs)
+        return Response(vista.get_serializer(await obtener_objeto(vista)).data)
+
+    if accion == 'list':
+        respuesta = vista.listar_paginado(vista.get_queryset())
+    else:
+        respuesta = getattr(vista, accion)(request, *args, **kwargs)
+
+    if inspect.isawaitable(respuesta):
+        respuesta = await respuesta
+    return respuesta
+
+
+async def _leer(viewset, acciones, request, args, kwargs):
+    # Mismos pasos que APIView.dispatch, con la acción ejecutada en el event loop
+    vista = viewset()
+    vista.action_map = acciones
+    # Como en ViewSet.as_view, para que el encabezado Allow liste los métodos de la ruta
+    for metodo, accion in acciones.items():
+        setattr(vista, metodo, getattr(vista, accion))
+    vista.lectura_asincrona = True
+    vista.args = args
+    vista.kwargs = kwargs
+    request = vista.initialize_request(request, *args, **kwargs)
+    vista.request = request
+    vista.headers = vista.default_response_headers
+
+    try:
+        # La autenticación puede consultar la base de datos (sesión, caché de usuarios fría)
+        await sync_to_async(vista.initial)(request, *args, **kwargs)
+        respuesta = await _ejecutar(vista, vista.action, request, args, kwargs)
+    except Exception as exc:
+        respuesta = vista.handle_exception(exc)
+
+    return vista.finalize_response(request, respuesta, *args, **kwargs)
+
+
+def _cerrar_conexiones():
+    # Una conexión dentro de atomic() pertenece a quien abrió la transacción
+    for conexion in connections.all(initialized_only=True):
+        if not conexion.in_atomic_block:
+            conexion.close()
+
+
+def vista_asincrona(viewset, acciones):
+    """
+    Vista de una ruta del viewset cuyo GET se atiende de forma asíncrona.
+    `acciones` es el mapa de métodos a acciones de la ruta, como en ViewSet.as_view.
+    """
+    sincrona = sync_to_async(viewset.as_view(acciones))
+    # La sincronización incremental (?updated_since) se atiende solo en el camino síncrono
+    parametro_sincrono = getattr(viewset, 'parametro_sincronizacion', None)
+
+    async def vista(request, *args, **kwargs):
+        if request.method != 'GET' or (acciones['get'] == 'list' and parametro_sincrono in request.GET):
+            return await sincrona(request, *args, **kwargs)
+        async with _limite():
+            try:
+                return await _leer(viewset, acciones, request, args, kwargs)
+            finally:
+                # Bajo ASGI el hilo de la petición no se reutiliza: su conexión se cierra
+                # dentro del límite. Fuera de ese contexto (WSGI, cliente de pruebas) las
+                # consultas corren en el hilo de quien llama y su conexión no se toca
+                if SyncToAsync.thread_sensitive_context.get(None) is not None:
+                    await sync_to_async(_cerrar_conexiones)()
+
+    # DRF aplica su propia verificación CSRF (como en APIView.as_view)
+    vista.csrf_exempt = True
+    return vista
@@ -0,0 +1,170 @@
+"""
+Autenticación con los tokens de acceso de Supabase.
+
+El token (HS256) se verifica localmente con settings.JWT_SECRET, sin consultar a
+Supabase, y su claim sub se asocia con User.supabase_uid. El usuario resuelto se
+guarda en una caché en memoria con límite de tamaño y expiración, que se invalida
+al guardar o eliminar el usuario; con la caché caliente una petición autenticada
+no hace ninguna consulta de autenticación a la base de datos.
+"""
+import base64
+import copy
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import authentication, exceptions
+
+from apps.users.models import User
+
+# Tolerancia en segundos para diferencias de reloj al validar la expiración
+MARGEN_EXPIRACION = 30
+
+
+class CacheUsuarios:
+    """
+    Caché LRU con expiración de los usuarios autenticados, segura entre hilos.
+    """
+
+    def __init__(self, maximo, ttl):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            usuario, vence = entrada
+            if vence < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return usuario
+
+    def guardar(self, clave, usuario):
+        with self._lock:
+            self._datos[clave] = (usuario, time.monotonic() + self.ttl)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def invalidar_usuario(self, usuario_id):
+        # Se busca por id porque el supabase_uid pudo haber cambiado
+        with self._lock:
+            for clave, (usuario, _) in list(self._datos.items()):
+                if usuario.pk == usuario_id:
+                    del self._datos[clave]
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+
+cache_usuarios = CacheUsuarios(settings.JWT_CACHE_USUARIOS_MAXIMO, settings.JWT_CACHE_USUARIOS_TTL)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_usuario_cacheado(sender, instance, **kwargs):
+    cache_usuarios.invalidar_usuario(instance.pk)
+
+
+def _decodificar(segmento):
+    return base64.urlsafe_b64decode(segmento + '=' * (-len(segmento) % 4))
+
+
+def verificar_token(token):
+    """
+    Verifica la firma, la expiración y la audiencia del token y devuelve sus claims.
+    """
+    if not settings.JWT_SECRET:
+        raise exceptions.AuthenticationFailed('La autenticación por token no está configurada')
+
+    try:
+        encabezado, datos, firma = token.split('.')
+        algoritmo = json.loads(_decodificar(encabezado)).get('alg')
+        claims = json.loads(_decodificar(datos))
+        firma = _decodificar(firma)
+        firmado = f'{encabezado}.{datos}'.encode('ascii')
+    except (ValueError, AttributeError):
+        raise exceptions.AuthenticationFailed('Token mal formado')
+
+    # Solo se acepta el algoritmo de Supabase, nunca el indicado libremente por el token
+    if algoritmo != 'HS256':
+        raise exceptions.AuthenticationFailed('Algoritmo de token no permitido')
+
+    esperada = hmac.new(settings.JWT_SECRET.encode(), firmado, hashlib.sha256).digest()
+    if not hmac.compare_digest(esperada, firma):
+        raise exceptions.AuthenticationFailed('Firma de token inválida')
+
+    if not isinstance(claims, dict):
+        raise exceptions.AuthenticationFailed('Token mal formado')
+
+    expiracion = claims.get('exp')
+    if not isinstance(expiracion, (int, float)) or expiracion + MARGEN_EXPIRACION < time.time():
+        raise exceptions.AuthenticationFailed('El token ha expirado')
+
+    if settings.JWT_AUDIENCE and claims.get('aud') != settings.JWT_AUDIENCE:
+        raise exceptions.AuthenticationFailed('Audiencia de token inválida')
+
+    return claims
+
+
+class SupabaseJWTAuthentication(authentication.BaseAuthentication):
+    """
+    Autentica peticiones con el encabezado Authorization: Bearer <token de Supabase>.
+    """
+    palabra_clave = b'bearer'
+
+    def authenticate(self, request):
+        partes = authentication.get_authorization_header(request).split()
+
+        if not partes or partes[0].lower() != self.palabra_clave:
+            return None
+
+        if len(partes) != 2:
+            raise exceptions.AuthenticationFailed('Encabezado Authorization inválido')
+
+        try:
+            token = partes[1].decode('ascii')
+        except UnicodeDecodeError:
+            raise exceptions.AuthenticationFailed('Token mal formado')
+
+        return self.autenticar_token(token)
+
+    def autenticar_token(self, token):
+        """
+        Devuelve (usuario, claims) del token; también lo usan las conexiones de eventos.
+        """
+        claims = verificar_token(token)
+
+        supabase_uid = claims.get('sub')
+        if not supabase_uid or not isinstance(supabase_uid, str):
+            raise exceptions.AuthenticationFailed('El token no identifica al usuario')
+
+        usuario = cache_usuarios.obtener(supabase_uid)
+        if usuario is None:
+            try:
+                usuario = User.objects.get(supabase_uid=supabase_uid)
+            except User.DoesNotExist:
+                raise exceptions.AuthenticationFailed('El usuario del token no está registrado')
+
+            if not usuario.is_active:
+                raise exceptions.AuthenticationFailed('Usuario inactivo')
+
+            cache_usuarios.guardar(supabase_uid, usuario)
+
+        # Cada petición recibe su propia copia para no compartir cambios entre hilos
+        return (copy.copy(usuario), claims)
+
+    def authenticate_header(self, request):
+        return 'Bearer'
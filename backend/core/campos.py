@@ -0,0 +1,189 @@
+"""
+Campos parciales en las lecturas: ?fields= y ?expand=.
+
+?fields=id,titulo,estado limita la respuesta a esos campos; con un punto se eligen
+campos de un bloque anidado (?fields=id,ciudadano_info.username). ?expand= nombra
+los bloques anidados (ciudadano_info, encargado_info...) que se incluyen completos.
+Si la petición usa alguno de los dos, los bloques anidados solo se incluyen cuando se
+piden, de modo que ?expand= vacío devuelve solo los campos propios. Sin ninguno de
+los dos la respuesta no cambia.
+
+Los campos se quitan del serializador antes de leer los datos y la consulta deja de
+unir (select_related) o precargar (prefetch_related) las relaciones de los bloques
+que no se piden; en los listados que se leen con .values() (core.valores) tampoco se
+seleccionan sus columnas.
+"""
+import functools
+
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from core import valores
+
+
+def leer_campos(valor):
+    """
+    Convierte 'id,ciudadano_info.username' en un árbol inmutable de nombres:
+    (('ciudadano_info', (('username', None),)), ('id', None)). None es el campo completo.
+    """
+    return _arbol([nombre.strip() for nombre in valor.split(',') if nombre.strip()])
+
+
+def _arbol(nombres):
+    arbol = {}
+    for nombre in nombres:
+        raiz, _, resto = nombre.partition('.')
+        if not resto:
+            arbol[raiz] = None
+        elif arbol.get(raiz, ()) is not None:
+            arbol.setdefault(raiz, []).append(resto)
+    return tuple(sorted((raiz, None if resto is None else _arbol(resto)) for raiz, resto in arbol.items()))
+
+
+def podar(serializer, poda):
+    """
+    Quita del serializador los campos que no pide la poda (campos, expandir).
+    """
+    campos, expandir = poda
+    _podar(getattr(serializer, 'child', serializer), campos, expandir, '')
+
+
+def _podar(serializer, campos, expandir, prefijo):
+    disponibles = serializer.fields
+    campos = None if campos is None else dict(campos)
+
+    desconocidos = [nombre for nombre in (campos or {}) if nombre not in disponibles]
+    if desconocidos:
+        raise serializers.ValidationError({
+            'error': 'Campos desconocidos: ' + ', '.join(prefijo + nombre for nombre in desconocidos)
+        })
+    no_expandibles = [nombre for nombre in expandir if not _es_bloque(disponibles.get(nombre))]
+    if no_expandibles:
+        raise serializers.ValidationError({
+            'error': 'Campos que no se pueden expandir: ' + ', '.join(prefijo + nombre for nombre in no_expandibles)
+        })
+
+    for nombre, campo in list(disponibles.items()):
+        pedido = campos is not None and nombre in campos
+        if _es_bloque(campo):
+            if nombre in expandir or (pedido and campos[nombre] is None):
+                continue
+            if pedido:
+                _podar(getattr(campo, 'child', campo), campos[nombre], (), f'{prefijo}{nombre}.')
+            else:
+                del disponibles[nombre]
+        elif campos is not None and not pedido:
+            del disponibles[nombre]
+        elif pedido and campos[nombre] is not None:
+            raise serializers.ValidationError({
+                'error': f'El campo {prefijo}{nombre} no tiene subcampos'
+            })
+
+
+def _es_bloque(campo):
+    return isinstance(campo, serializers.BaseSerializer)
+
+
+def _relaciones_usadas(serializer):
+    # Relaciones cuyo objeto lee el serializador (los PrimaryKeyRelatedField solo usan el id)
+    usadas = set()
+    for campo in serializer.fields.values():
+        if campo.write_only or campo.source == '*':
+            continue
+        directo = isinstance(campo, serializers.PrimaryKeyRelatedField) and len(campo.source_attrs) == 1
+        if len(campo.source_attrs) > 1 or (not directo and isinstance(campo, (serializers.BaseSerializer, serializers.RelatedField))):
+            usadas.add(campo.source_attrs[0])
+    return frozenset(usadas)
+
+
+# Las podas vienen de la URL: las cachés por serializador y poda tienen un tamaño acotado
+@functools.lru_cache(maxsize=256)
+def relaciones_omitidas(serializer_class, poda):
+    """
+    Relaciones que el serializador completo lee y el podado ya no.
+    """
+    serializer = serializer_class()
+    podar(serializer, poda)
+    return _relaciones_usadas(serializer_class()) - _relaciones_usadas(serializer)
+
+
+@functools.lru_cache(maxsize=256)
+def lector(serializer_class, poda):
+    serializer = serializer_class()
+    podar(serializer, poda)
+    return valores.LectorValores(serializer)
+
+
+def _rutas(arbol, prefijo=''):
+    # {'a': {'b': {}}, 'c': {}} -> ['a__b', 'c']
+    rutas = []
+    for nombre, hijos in arbol.items():
+        rutas.extend(_rutas(hijos, f'{prefijo}{nombre}__') if hijos else [prefijo + nombre])
+    return rutas
+
+
+class CamposParcialesMixin:
+    """
+    ?fields= y ?expand= en las lecturas (GET) del viewset. Va antes de
+    ListadoPaginadoMixin para que los listados con .values() también se poden.
+    """
+    parametro_campos = 'fields'
+    parametro_expandir = 'expand'
+
+    def poda_campos(self):
+        """
+        (campos, expandir) pedidos en la URL, o None si la petición no los usa.
+        """
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        parametros = request.query_params
+        if self.parametro_campos not in parametros and self.parametro_expandir not in parametros:
+            return None
+
+        campos = leer_campos(parametros.get(self.parametro_campos, ''))
+        expandir = parametros.get(self.parametro_expandir, '').split(',')
+        expandir = tuple(sorted({nombre.strip() for nombre in expandir if nombre.strip()}))
+        return campos or None, expandir
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        poda = self.poda_campos()
+        if poda is not None:
+            podar(serializer, poda)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        # Los viewsets definen su propio get_queryset; el listado y get_object pasan por aquí
+        queryset = super().filter_queryset(queryset)
+        poda = self.poda_campos()
+        if poda is None:
+            return queryset
+        omitidas = relaciones_omitidas(self.get_serializer_class(), poda)
+        if not omitidas:
+            return queryset
+
+        # No se unen ni precargan las relaciones de los bloques que no se piden
+        if isinstance(queryset.query.select_related, dict):
+            rutas = _rutas(queryset.query.select_related)
+            conservar = [ruta for ruta in rutas if ruta.split('__')[0] not in omitidas]
+            if len(conservar) < len(rutas):
+                queryset = queryset.select_related(None)
+                if conservar:
+                    queryset = queryset.select_related(*conservar)
+
+        precargas = queryset._prefetch_related_lookups
+        conservar = [
+            precarga for precarga in precargas
+            if getattr(precarga, 'prefetch_to', precarga).split('__')[0] not in omitidas
+        ]
+        if len(conservar) < len(precargas):
+            queryset = queryset.prefetch_related(None).prefetch_related(*conservar)
+        return queryset
+
+    def lector_valores(self):
+        lector_completo = super().lector_valores()
+        poda = self.poda_campos()
+        if lector_completo is None or poda is None:
+            return lector_completo
+        return lector(self.get_serializer_class(), poda)
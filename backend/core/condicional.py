@@ -0,0 +1,117 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response
+from rest_framework.response import Response
+
+from core.asincrono import obtener_objeto
+
+
+class ConsultaCondicionalMixin:
+    """
+    GET condicional (ETag) para viewsets cuyo modelo tiene la columna version.
+
+    version es la transacción que escribió la fila por última vez (apps.sincronizacion);
+    los triggers también la avanzan cuando cambian los usuarios que la respuesta
+    incluye (ciudadano_info, inspector_info, ...). En el detalle el ETag sale de esa
+    versión y en los listados de un agregado (cantidad, suma de ids y suma y máximo de
+    las versiones) sobre el queryset filtrado, que cambia cuando una fila se modifica,
+    entra o sale del listado. La suma de las versiones es la que detecta una
+    modificación: las transacciones no se confirman en el orden de sus ids, y una
+    anterior que confirma tarde deja la versión máxima igual. No se envía
+    Last-Modified: fecha_actualizacion no cambia con los datos relacionados ni cuando
+    se borra una fila. Si el cliente ya tiene la versión se responde 304 sin ejecutar
+    el serializador.
+    """
+    campo_version = 'version'
+
+    def _etag(self, *partes):
+        # La representación depende también de la ruta completa (filtros, cursor) y del formato
+        partes = (self.request.get_full_path(), self.request.accepted_media_type) + partes
+        return 'W/"%s"' % hashlib.sha1('|'.join(str(parte) for parte in partes).encode()).hexdigest()
+
+    def _responder_condicional(self, etag, generar):
+        respuesta = self._respuesta_previa(etag)
+        if respuesta is None:
+            respuesta = generar()
+        return self._con_validadores(respuesta, etag)
+
+    async def _aresponder_condicional(self, etag, generar):
+        respuesta = self._respuesta_previa(etag)
+        if respuesta is None:
+            respuesta = await generar()
+        return self._con_validadores(respuesta, etag)
+
+    def _respuesta_previa(self, etag):
+        # 304 (o 412) si el cliente ya tiene la versión; None si hay que generar la respuesta
+        return get_conditional_response(self.request, etag=etag)
+
+    def _con_validadores(self, respuesta, etag):
+        if 200 <= respuesta.status_code < 300 or respuesta.status_code == 304:
+            respuesta['ETag'] = etag
+        return respuesta
+
+    def version_listado(self, queryset):
+        """
+        Devuelve el etag del queryset ya filtrado.
+        """
+        version = queryset.order_by().aggregate(**self._agregados_version())
+        return self._etag(version['cantidad'], version['suma'], version['versiones'], version['ultima'])
+
+    async def aversion_listado(self, queryset):
+        version = await queryset.order_by().aaggregate(**self._agregados_version())
+        return self._etag(version['cantidad'], version['suma'], version['versiones'], version['ultima'])
+
+    def _agregados_version(self):
+        return {
+            'cantidad': Count('pk'), 'suma': Sum('pk'),
+            'versiones': Sum(self.campo_version), 'ultima': Max(self.campo_version),
+        }
+
+    def _etag_instancia(self, instance):
+        return self._etag(instance.pk, getattr(instance, self.campo_version))
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+
+        return self._responder_condicional(
+            self._etag_instancia(instance),
+            lambda: Response(self.get_serializer(instance).data)
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await obtener_objeto(self)
+
+        async def generar():
+            return Response(self.get_serializer(instance).data)
+
+        return await self._aresponder_condicional(self._etag_instancia(instance), generar)
+
+    def list(self, request, *args, **kwargs):
+        etag = self.version_listado(self.filter_queryset(self.get_queryset()))
+
+        return self._responder_condicional(
+            etag,
+            lambda: super(ConsultaCondicionalMixin, self).list(request, *args, **kwargs)
+        )
+
+    def listar_paginado(self, queryset):
+        if getattr(self, 'lectura_asincrona', False):
+            return self.alistar_paginado(queryset)
+
+        etag = self.version_listado(self.filter_queryset(queryset))
+
+        return self._responder_condicional(
+            etag,
+            lambda: super(ConsultaCondicionalMixin, self).listar_paginado(queryset)
+        )
+
+    async def alistar_paginado(self, queryset):
+        # Los filtros pueden consultar la base de datos (búsqueda de texto completo)
+        etag = await self.aversion_listado(await sync_to_async(self.filter_queryset)(queryset))
+
+        return await self._aresponder_condicional(
+            etag,
+            lambda: super(ConsultaCondicionalMixin, self).alistar_paginado(queryset)
+        )
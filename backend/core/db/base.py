@@ -0,0 +1,35 @@
+"""
+Backend de PostgreSQL que toma las conexiones del pool del proceso (ver pool.py).
+
+Se configura con ENGINE 'core.db' y las opciones del pool en DATABASES[...]['POOL'].
+"""
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from .pool import PoolAgotado, obtener_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        self.pool = obtener_pool(
+            f"{self.alias}:{conn_params.get('dbname') or conn_params.get('database')}",
+            conn_params,
+            {clave.lower(): valor for clave, valor in self.settings_dict.get('POOL', {}).items()}
+        )
+        try:
+            conexion = self.pool.tomar(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        except PoolAgotado as exc:
+            raise self.Database.OperationalError(str(exc)) from exc
+
+        # Lo asigna get_new_connection solo cuando abre una conexión nueva
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        return conexion
+
+    def _close(self):
+        # Cerrar la conexión de Django la devuelve al pool
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.devolver(self.connection)
@@ -0,0 +1,230 @@
+"""
+Pool de conexiones a PostgreSQL compartido por los hilos de un proceso.
+
+Django 4.2 abre una conexión por hilo y la cierra al terminar cada petición
+(CONN_MAX_AGE=0); con Supabase eso es un handshake TCP + TLS + autenticación por
+petición. El backend core.db toma las conexiones de este pool y las devuelve al
+"cerrarlas", así que los hilos (gthread, o los de las vistas síncronas bajo ASGI)
+reutilizan un conjunto acotado de conexiones abiertas.
+
+- Se abren a demanda hasta `maximo`; si no hay libres se espera hasta `espera` segundos.
+- Una conexión libre por más de `verificar_tras` segundos se comprueba con SELECT 1
+  antes de entregarla; si falla se descarta y se usa otra.
+- Las conexiones con más de `vida_maxima` segundos se cierran al devolverlas o al
+  tomarlas, para repartir la carga tras un failover y liberar memoria del servidor.
+- Al devolverla se revierte cualquier transacción abierta. El estado de sesión (SET,
+  tablas temporales, locks de sesión) no se limpia: el código no debe dejarlo.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+
+class PoolAgotado(Exception):
+    pass
+
+
+class PoolConexiones:
+
+    def __init__(self, maximo=10, espera=10, vida_maxima=1800, verificar_tras=30):
+        self.maximo = maximo
+        self.espera = espera
+        self.vida_maxima = vida_maxima
+        self.verificar_tras = verificar_tras
+
+        self._cond = threading.Condition()
+        # Conexiones libres (conexión, creada, último uso); se reutiliza primero la última
+        self._libres = deque()
+        # id(conexión) -> momento de creación de las conexiones prestadas
+        self._prestadas = {}
+        self._abiertas = 0
+        self._esperando = 0
+
+        self.checkouts = 0
+        self.esperas = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+        self.timeouts = 0
+        self.creadas = 0
+        self.recicladas = 0
+        self.descartadas = 0
+
+    def tomar(self, conectar):
+        """
+        Presta una conexión; conectar() abre una nueva cuando hace falta.
+        """
+        inicio = time.monotonic()
+        espero = False
+
+        while True:
+            with self._cond:
+                candidata = None
+                while candidata is None:
+                    if self._libres:
+                        candidata = self._libres.pop()
+                    elif self._abiertas < self.maximo:
+                        self._abiertas += 1
+                        break
+                    else:
+                        restante = self.espera - (time.monotonic() - inicio)
+                        if restante <= 0:
+                            self.timeouts += 1
+                            raise PoolAgotado(
+                                f'No hay conexiones libres tras {self.espera} s (máximo {self.maximo})'
+                            )
+                        espero = True
+                        self._esperando += 1
+                        try:
+                            self._cond.wait(restante)
+                        finally:
+                            self._esperando -= 1
+
+            if candidata is None:
+                conexion, creada = self._crear(conectar), time.monotonic()
+            else:
+                conexion, creada, usada = candidata
+                if not self._sana(conexion, creada, usada):
+                    continue
+
+            with self._cond:
+                self._prestadas[id(conexion)] = creada
+                self.checkouts += 1
+                espera = time.monotonic() - inicio
+                if espero:
+                    self.esperas += 1
+                    self.espera_total += espera
+                    self.espera_maxima = max(self.espera_maxima, espera)
+            return conexion
+
+    def devolver(self, conexion):
+        with self._cond:
+            creada = self._prestadas.pop(id(conexion), None)
+        if creada is None:
+            # No pertenece al pool (p. ej. se reinició tras un fork)
+            conexion.close()
+            return
+
+        reutilizable = not conexion.closed and time.monotonic() - creada < self.vida_maxima
+        if reutilizable:
+            estado = conexion.info.transaction_status
+            try:
+                if estado != TRANSACTION_STATUS_IDLE:
+                    if estado != TRANSACTION_STATUS_INTRANS:
+                        raise ValueError(estado)
+                    conexion.rollback()
+            except Exception:
+                reutilizable = False
+
+        if not reutilizable:
+            self._cerrar(conexion, reciclada=not conexion.closed)
+            return
+
+        with self._cond:
+            self._libres.append((conexion, creada, time.monotonic()))
+            self._cond.notify()
+
+    def _crear(self, conectar):
+        try:
+            conexion = conectar()
+        except Exception:
+            with self._cond:
+                self._abiertas -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.creadas += 1
+        return conexion
+
+    def _sana(self, conexion, creada, usada):
+        ahora = time.monotonic()
+        if ahora - creada >= self.vida_maxima:
+            self._cerrar(conexion, reciclada=True)
+            return False
+        if conexion.closed:
+            self._cerrar(conexion)
+            return False
+        if ahora - usada >= self.verificar_tras:
+            try:
+                with conexion.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                if conexion.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                    conexion.rollback()
+            except Exception:
+                self._cerrar(conexion)
+                return False
+        return True
+
+    def _cerrar(self, conexion, reciclada=False):
+        try:
+            conexion.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._abiertas -= 1
+            if reciclada:
+                self.recicladas += 1
+            else:
+                self.descartadas += 1
+            self._cond.notify()
+
+    def cerrar_libres(self):
+        with self._cond:
+            libres, self._libres = list(self._libres), deque()
+        for conexion, _, _ in libres:
+            self._cerrar(conexion, reciclada=True)
+
+    def metricas(self):
+        with self._cond:
+            en_uso = len(self._prestadas)
+            return {
+                'maximo': self.maximo,
+                'abiertas': self._abiertas,
+                'en_uso': en_uso,
+                'libres': len(self._libres),
+                'esperando': self._esperando,
+                'utilizacion': round(en_uso / self.maximo, 3) if self.maximo else 0,
+                'checkouts': self.checkouts,
+                'esperas': self.esperas,
+                'espera_promedio_ms': round(1000 * self.espera_total / self.esperas, 2) if self.esperas else 0,
+                'espera_maxima_ms': round(1000 * self.espera_maxima, 2),
+                'timeouts': self.timeouts,
+                'creadas': self.creadas,
+                'recicladas': self.recicladas,
+                'descartadas': self.descartadas,
+            }
+
+
+# Pools del proceso por parámetros de conexión (la creación de la base de pruebas usa
+# otro nombre de base con el mismo alias, y no debe recibir conexiones de la principal)
+_pools = {}
+_pools_lock = threading.Lock()
+_pid = os.getpid()
+
+
+def obtener_pool(etiqueta, parametros, opciones):
+    global _pid
+    clave = tuple(sorted((nombre, str(valor)) for nombre, valor in parametros.items()))
+    with _pools_lock:
+        # Un proceso hijo (fork de gunicorn con preload) no usa las conexiones del padre
+        if _pid != os.getpid():
+            _pools.clear()
+            _pid = os.getpid()
+        if clave not in _pools:
+            _pools[clave] = (etiqueta, PoolConexiones(**opciones))
+        return _pools[clave][1]
+
+
+def metricas():
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {'pid': os.getpid(), 'pools': {etiqueta: pool.metricas() for etiqueta, pool in pools}}
+
+
+def cerrar_todos():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for _, pool in pools:
+        pool.cerrar_libres()
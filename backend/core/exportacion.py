@@ -0,0 +1,331 @@
+"""
+Exportación de listados a CSV o XLSX en streaming.
+
+GET .../exportar/?formato=csv|xlsx aplica el mismo filtrado por rol, búsqueda y orden
+que el listado y lee las filas con .values_list().iterator(), es decir, con un cursor
+del lado del servidor en PostgreSQL. Cada bloque de filas se escribe y se envía antes
+de leer el siguiente, así que la memoria no depende del número de filas.
+
+El XLSX se genera sin dependencias: las hojas usan cadenas en línea (sin tabla de
+cadenas compartidas, que obligaría a tener todas en memoria) y el ZIP se escribe
+hacia un flujo no posicionable, con descriptores de datos. Al llegar al límite de
+filas de Excel se continúa en una hoja nueva.
+
+En el CSV los textos que empiezan con =, +, -, @, tabulación o retorno de carro
+llevan un apóstrofo delante para que la hoja de cálculo no los evalúe como
+fórmulas; en el XLSX van como cadenas en línea, que nunca se evalúan.
+"""
+import csv
+import io
+import math
+import re
+import zipfile
+from datetime import date, datetime, time, timedelta
+from xml.sax.saxutils import escape
+
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from core.pagination import respuesta_en_flujo
+
+# Filas leídas del cursor y escritas por cada parte enviada
+BLOQUE = 2000
+# Filas por hoja de Excel, sin contar el encabezado
+FILAS_POR_HOJA = 1048575
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+class ExportacionMixin:
+    """
+    Agrega la acción exportar a un viewset. columnas_exportacion es una lista de
+    (encabezado, campo) con rutas de campo de values_list ('solicitud__titulo'); los
+    campos con choices se exportan con su etiqueta. expandir_exportacion, si se
+    define, es (campo JSON con una lista de objetos, [(encabezado, clave), ...]) y
+    genera una línea por elemento de la lista.
+    """
+    columnas_exportacion = []
+    expandir_exportacion = None
+    nombre_exportacion = None
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exportar el listado (con los mismos filtros y orden) a CSV o XLSX (?formato=).
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in FORMATOS:
+            return Response(
+                {"error": "El formato debe ser csv o xlsx"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # Mismo orden que el listado paginado
+        if hasattr(self.paginator, 'get_ordering'):
+            queryset = queryset.order_by(*self.paginator.get_ordering(request, queryset, self))
+
+        encabezados, filas = self._filas_exportacion(queryset)
+        partes = _csv(encabezados, filas) if formato == 'csv' else _xlsx(encabezados, filas)
+
+        nombre = self.nombre_exportacion or queryset.model._meta.verbose_name_plural.lower()
+        respuesta = respuesta_en_flujo(request, partes, content_type=FORMATOS[formato])
+        respuesta['Content-Disposition'] = (
+            f'attachment; filename="{nombre}-{timezone.localdate():%Y%m%d}.{formato}"'
+        )
+        return respuesta
+
+    def _filas_exportacion(self, queryset):
+        campos = [campo for _, campo in self.columnas_exportacion]
+        encabezados = [encabezado for encabezado, _ in self.columnas_exportacion]
+        etiquetas = [_etiquetas(queryset.model, campo) for campo in campos]
+
+        if self.expandir_exportacion:
+            campo_lista, subcolumnas = self.expandir_exportacion
+            campos = campos + [campo_lista]
+            etiquetas = etiquetas + [None]
+            encabezados = encabezados + [encabezado for encabezado, _ in subcolumnas]
+
+        def filas():
+            for fila in queryset.values_list(*campos).iterator(chunk_size=BLOQUE):
+                valores = [
+                    mapa.get(valor, valor) if mapa else valor
+                    for mapa, valor in zip(etiquetas, fila)
+                ]
+                if not self.expandir_exportacion:
+                    yield valores
+                    continue
+
+                # Una línea por elemento; sin elementos, una línea con las columnas vacías
+                elementos = valores.pop() or [{}]
+                for elemento in elementos:
+                    if not isinstance(elemento, dict):
+                        elemento = {}
+                    yield valores + [elemento.get(clave) for _, clave in subcolumnas]
+
+        return encabezados, filas()
+
+
+def _etiquetas(modelo, ruta):
+    """
+    {valor: etiqueta} del campo con choices al final de la ruta, o None.
+    """
+    campo = None
+    for nombre in ruta.split('__'):
+        campo = modelo._meta.get_field(nombre)
+        if campo.is_relation:
+            modelo = campo.related_model
+    if campo is not None and campo.choices:
+        return dict(campo.flatchoices)
+    return None
+
+
+def _bloques(filas):
+    bloque = []
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) == BLOQUE:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+# Inicios de celda que Excel y LibreOffice interpretan como fórmula al abrir un CSV
+_INICIOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, str):
+        # Un apóstrofo delante hace que el texto se muestre como texto y no se evalúe
+        return "'" + valor if valor.startswith(_INICIOS_FORMULA) else valor
+    if isinstance(valor, bool):
+        return 'Sí' if valor else 'No'
+    if isinstance(valor, datetime):
+        if timezone.is_aware(valor):
+            valor = timezone.localtime(valor)
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    return str(valor)
+
+
+def _csv(encabezados, filas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    # BOM para que Excel detecte UTF-8
+    buffer.write('\ufeff')
+    escritor.writerow(encabezados)
+
+    for bloque in _bloques(filas):
+        escritor.writerows([_texto(valor) for valor in fila] for fila in bloque)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+# --- XLSX ---
+
+_INVALIDOS_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+_EPOCA_EXCEL = datetime(1899, 12, 30)
+
+# Estilos: 0 general, 1 fecha, 2 fecha y hora
+_ESTILOS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="2"><numFmt numFmtId="164" formatCode="yyyy-mm-dd"/>'
+    '<numFmt numFmtId="165" formatCode="yyyy-mm-dd hh:mm:ss"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def _celda(valor, estilo=''):
+    if valor is None:
+        return '<c/>'
+    if isinstance(valor, bool):
+        valor = 'Sí' if valor else 'No'
+    elif isinstance(valor, float) and not math.isfinite(valor):
+        # NaN e infinito no son números válidos en una celda: se escriben como texto
+        valor = str(valor)
+    elif isinstance(valor, (int, float)):
+        return f'<c><v>{valor}</v></c>'
+    elif isinstance(valor, datetime):
+        if timezone.is_aware(valor):
+            valor = timezone.make_naive(valor)
+        return f'<c s="2"><v>{(valor - _EPOCA_EXCEL) / timedelta(days=1)}</v></c>'
+    elif isinstance(valor, date):
+        return f'<c s="1"><v>{(valor - _EPOCA_EXCEL.date()).days}</v></c>'
+    elif isinstance(valor, time):
+        valor = valor.isoformat()
+    texto = escape(_INVALIDOS_XML.sub('', str(valor)))
+    return f'<c t="inlineStr"{estilo}><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _fila(valores, estilo=''):
+    return '<row>' + ''.join(_celda(valor, estilo) for valor in valores) + '</row>'
+
+
+class _Salida:
+    """
+    Destino del ZIP sin posicionamiento: acumula lo escrito hasta que se envía.
+    """
+
+    def __init__(self):
+        self.partes = []
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos, self.partes = b''.join(self.partes), []
+        return datos
+
+
+def _xlsx(encabezados, filas):
+    salida = _Salida()
+    inicio_hoja = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" state="frozen"/>'
+        '</sheetView></sheetViews><sheetData>' + _fila(encabezados, ' s="3"')
+    ).encode()
+    fin_hoja = b'</sheetData></worksheet>'
+
+    with zipfile.ZipFile(salida, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as libro:
+        hojas = 0
+        hoja = None
+        en_hoja = FILAS_POR_HOJA
+
+        for bloque in _bloques(filas):
+            for fila in bloque:
+                if en_hoja == FILAS_POR_HOJA:
+                    if hoja is not None:
+                        hoja.write(fin_hoja)
+                        hoja.close()
+                    hojas += 1
+                    hoja = libro.open(f'xl/worksheets/sheet{hojas}.xml', 'w', force_zip64=True)
+                    hoja.write(inicio_hoja)
+                    en_hoja = 0
+                hoja.write(_fila(fila).encode())
+                en_hoja += 1
+            yield salida.vaciar()
+
+        if hoja is None:
+            hojas = 1
+            hoja = libro.open('xl/worksheets/sheet1.xml', 'w')
+            hoja.write(inicio_hoja)
+        hoja.write(fin_hoja)
+        hoja.close()
+
+        for nombre, contenido in _partes_libro(hojas):
+            libro.writestr(nombre, contenido)
+    yield salida.vaciar()
+
+
+def _partes_libro(hojas):
+    numeros = range(1, hojas + 1)
+    yield '[Content_Types].xml', (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        + ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{numero}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for numero in numeros
+        )
+        + '</Types>'
+    )
+    yield '_rels/.rels', (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/></Relationships>'
+    )
+    yield 'xl/workbook.xml', (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+        + ''.join(f'<sheet name="Hoja{numero}" sheetId="{numero}" r:id="rId{numero}"/>' for numero in numeros)
+        + '</sheets></workbook>'
+    )
+    yield 'xl/_rels/workbook.xml.rels', (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        + ''.join(
+            f'<Relationship Id="rId{numero}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{numero}.xml"/>'
+            for numero in numeros
+        )
+        + f'<Relationship Id="rId{hojas + 1}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/></Relationships>'
+    )
+    yield 'xl/styles.xml', _ESTILOS
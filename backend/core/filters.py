@@ -0,0 +1,60 @@
+import functools
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+from rest_framework import filters
+
+# Configuración de PostgreSQL creada en la migración 0003 de solicitudes
+CONFIGURACION_BUSQUEDA = 'spanish_unaccent'
+
+
+class BusquedaTextoCompleto(filters.SearchFilter):
+    """
+    Búsqueda de texto completo sobre el campo vector_busqueda del modelo.
+
+    Reemplaza al SearchFilter de DRF usando el mismo parámetro ?search=. Los
+    resultados se filtran con el índice GIN y se ordenan por relevancia, salvo
+    que el cliente pida otro orden con OrderingFilter. Si todas las palabras son
+    palabras vacías ("de", "la"...) la consulta no tiene lexemas y no se filtra.
+
+    Consulta la base de datos para saber si la búsqueda tiene lexemas: en el camino
+    asíncrono se llama con sync_to_async.
+    """
+    campo_vector = 'vector_busqueda'
+
+    def get_search_text(self, request):
+        palabras = []
+        for termino in self.get_search_terms(request):
+            palabras.extend(re.findall(r'[^\W_]+', termino))
+
+        if not palabras:
+            return None
+
+        # Cada palabra se busca como prefijo para conservar el comportamiento de icontains
+        return ' & '.join(f'{palabra}:*' for palabra in palabras)
+
+    def filter_queryset(self, request, queryset, view):
+        texto = self.get_search_text(request)
+        if texto is None or not tiene_lexemas(queryset.db, texto):
+            return queryset
+
+        query = SearchQuery(texto, config=CONFIGURACION_BUSQUEDA, search_type='raw')
+        # ts_rank es real; en double precision el valor que vuelve al cursor de la
+        # paginación es exactamente el que se compara en la consulta siguiente
+        return queryset.filter(**{self.campo_vector: query}).annotate(
+            relevancia=Cast(SearchRank(F(self.campo_vector), query), FloatField())
+        ).order_by('-relevancia', '-pk')
+
+
+@functools.lru_cache(maxsize=1024)
+def tiene_lexemas(alias, texto):
+    """
+    Si la consulta de texto completo conserva algún término después de quitar las
+    palabras vacías; una consulta vacía no coincide con ningún registro.
+    """
+    with connections[alias].cursor() as cursor:
+        cursor.execute('SELECT numnode(to_tsquery(%s::regconfig, %s))', [CONFIGURACION_BUSQUEDA, texto])
+        return cursor.fetchone()[0] > 0
@@ -0,0 +1,341 @@
+import datetime
+import decimal
+import json
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import FieldDoesNotExist
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.response import Response
+
+from core import valores
+from core.renderers import a_json
+
+
+class PaginacionCursor(CursorPagination):
+    """
+    Paginación por cursor (keyset) ordenada según el Meta.ordering de cada modelo.
+
+    Respeta el parámetro de OrderingFilter cuando el cliente lo envía. El cursor
+    guarda los valores de todos los campos del orden del último registro, incluida la
+    llave primaria de desempate, y cada página se obtiene comparando esa fila en lugar
+    de con un OFFSET: su costo no depende de la profundidad del recorrido y los
+    registros con la misma clave (o NULL) no se repiten ni se pierden.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    # Orden por defecto para modelos sin Meta.ordering (p. ej. User)
+    ordering = '-pk'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+
+        # Usar el orden solicitado a través de OrderingFilter si existe
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+
+        # Los resultados de la búsqueda de texto completo se recorren por relevancia
+        if not ordering and 'relevancia' in queryset.query.annotations:
+            ordering = ['-relevancia']
+
+        if not ordering:
+            ordering = queryset.model._meta.ordering or self.ordering
+
+        if isinstance(ordering, str):
+            ordering = [ordering]
+
+        return self._con_desempate(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        consulta = self._preparar_pagina(queryset, request, view)
+        if consulta is None:
+            return None
+        return self._completar_pagina(list(consulta))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Igual que paginate_queryset, pero lee la página con el ORM asíncrono.
+        """
+        consulta = self._preparar_pagina(queryset, request, view)
+        if consulta is None:
+            return None
+        return self._completar_pagina([instancia async for instancia in consulta])
+
+    def _preparar_pagina(self, queryset, request, view):
+        """
+        Primera mitad de CursorPagination.paginate_queryset: decodifica el cursor y
+        devuelve la consulta de la página (con un registro extra), sin ejecutarla.
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (reverse, current_position) = (False, None)
+        else:
+            (reverse, current_position) = (self.cursor.reverse, self.cursor.position)
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self._despues_de(queryset, ordering, self._leer_posicion(current_position)))
+
+        self._posicion = (reverse, current_position)
+        return queryset[:self.page_size + 1]
+
+    def _leer_posicion(self, posicion):
+        try:
+            valores = json.loads(posicion)
+        except ValueError:
+            valores = None
+        if not isinstance(valores, list) or len(valores) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return valores
+
+    def _get_position_from_instance(self, instance, ordering):
+        # La posición es la fila completa de la clave de orden (termina en la llave
+        # primaria), así que es única y el cursor nunca necesita un desplazamiento
+        valores = [
+            instance[campo.lstrip('-')] if isinstance(instance, dict) else getattr(instance, campo.lstrip('-'))
+            for campo in ordering
+        ]
+        return json.dumps(valores, default=_valor_cursor, separators=(',', ':'))
+
+    def _despues_de(self, queryset, ordering, posicion):
+        """
+        Q con los registros que van después de la posición en el orden dado: la fila
+        (campo1, ..., pk) se compara campo por campo, con los NULL como el valor más
+        grande (al final en orden ascendente y al principio en descendente, como en
+        PostgreSQL).
+        """
+        condicion = None
+        for campo, valor in reversed(list(zip(ordering, posicion))):
+            nombre = campo.lstrip('-')
+            mayor = self._estrictamente_despues(queryset, nombre, valor, campo.startswith('-'))
+            igual = Q(**{nombre + '__isnull': True}) if valor is None else Q(**{nombre: valor})
+            if condicion is None:
+                condicion = mayor
+            elif mayor is None:
+                condicion = igual & condicion
+            else:
+                condicion = mayor | (igual & condicion)
+
+        # Cota sobre el primer campo, redundante, para que el índice empiece en la posición
+        nombre, valor = ordering[0].lstrip('-'), posicion[0]
+        mayor = self._estrictamente_despues(queryset, nombre, valor, ordering[0].startswith('-'))
+        igual = Q(**{nombre + '__isnull': True}) if valor is None else Q(**{nombre: valor})
+        cota = igual if mayor is None else mayor | igual
+        return cota & condicion if condicion is not None else Q(pk__in=[])
+
+    def _estrictamente_despues(self, queryset, nombre, valor, descendente):
+        # None si ningún valor va después
+        nulos = self._acepta_nulos(queryset, nombre)
+        if descendente:
+            if valor is None:
+                return Q(**{nombre + '__isnull': False})
+            return Q(**{nombre + '__lt': valor})
+        if valor is None:
+            return None
+        mayor = Q(**{nombre + '__gt': valor})
+        return mayor | Q(**{nombre + '__isnull': True}) if nulos else mayor
+
+    def _acepta_nulos(self, queryset, nombre):
+        if nombre == 'pk':
+            return False
+        try:
+            return queryset.model._meta.get_field(nombre).null
+        except FieldDoesNotExist:
+            # Anotaciones: se consideran con posibles NULL
+            return True
+
+    def _completar_pagina(self, results):
+        """
+        Segunda mitad: calcula la página y los cursores a partir de los registros leídos.
+        """
+        reverse, current_position = self._posicion
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _con_desempate(self, ordering):
+        """
+        Agrega la llave primaria como desempate para que el orden sea total
+        y los registros con la misma clave no se repitan ni se pierdan entre páginas.
+        """
+        ordering = list(ordering)
+        campos = {campo.lstrip('-') for campo in ordering}
+        if not campos & {'pk', 'id'}:
+            descendente = ordering[0].startswith('-')
+            ordering.append('-pk' if descendente else 'pk')
+        return tuple(ordering)
+
+
+def _valor_cursor(valor):
+    if isinstance(valor, (datetime.date, datetime.time)):
+        return valor.isoformat()
+    if isinstance(valor, (decimal.Decimal, uuid.UUID)):
+        return str(valor)
+    raise TypeError(f'{type(valor).__name__} no se puede guardar en el cursor')
+
+
+class ListadoPaginadoMixin:
+    """
+    Permite que las acciones personalizadas de listado (@action detail=False)
+    filtren y paginen igual que la acción list del viewset.
+
+    Con ?stream=1 los listados devuelven todos los registros como un arreglo JSON
+    enviado por partes: la consulta se recorre con .iterator() en bloques y cada
+    bloque se serializa y envía antes de leer el siguiente, así que la memoria no
+    crece con el tamaño del resultado.
+    """
+    parametro_flujo = 'stream'
+    # Registros leídos y serializados por bloque en el modo de flujo
+    bloque_flujo = 500
+    # Acciones de listado que se serializan desde .values() (ver core.valores); su
+    # serializador debe ser de solo lectura y armarse con columnas del modelo
+    acciones_valores = ()
+
+    def en_flujo(self):
+        return self.request.query_params.get(self.parametro_flujo) in ('1', 'true')
+
+    def lector_valores(self):
+        if self.action in self.acciones_valores:
+            return valores.lector(self.get_serializer_class())
+        return None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.en_flujo():
+            return self.listar_en_flujo(queryset)
+        return self._listar(queryset)
+
+    def listar_paginado(self, queryset):
+        # En el camino de lectura asíncrono (core.asincrono) se devuelve una corrutina
+        if getattr(self, 'lectura_asincrona', False):
+            return self.alistar_paginado(queryset)
+
+        queryset = self.filter_queryset(queryset)
+        if self.en_flujo():
+            return self.listar_en_flujo(queryset)
+        return self._listar(queryset)
+
+    def _listar(self, queryset):
+        queryset, serializar = self._lectura(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializar(page))
+        return Response(serializar(queryset))
+
+    async def alistar_paginado(self, queryset):
+        # Los filtros pueden consultar la base de datos (búsqueda de texto completo)
+        queryset = await sync_to_async(self.filter_queryset)(queryset)
+        if self.en_flujo():
+            return self.listar_en_flujo(queryset)
+
+        queryset, serializar = self._lectura(queryset)
+        page = None
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+        if page is not None:
+            return self.get_paginated_response(serializar(page))
+        return Response(serializar([instancia async for instancia in queryset]))
+
+    def _lectura(self, queryset):
+        """
+        Consulta a ejecutar y función que serializa sus filas: las de .values() con el
+        lector de la acción, o instancias con el serializador del viewset.
+        """
+        lector = self.lector_valores()
+        if lector is None:
+            return queryset, lambda filas: self.get_serializer(filas, many=True).data
+
+        ordenamiento = ()
+        if hasattr(self.paginator, 'get_ordering'):
+            ordenamiento = self.paginator.get_ordering(self.request, queryset, self)
+        return lector.consulta(queryset, ordenamiento), lector.serializar
+
+    def listar_en_flujo(self, queryset):
+        # Mismo orden que el listado paginado
+        if hasattr(self.paginator, 'get_ordering'):
+            queryset = queryset.order_by(*self.paginator.get_ordering(self.request, queryset, self))
+
+        queryset, serializar = self._lectura(queryset)
+        return respuesta_en_flujo(
+            self.request, self._partes_flujo(queryset, serializar), content_type='application/json'
+        )
+
+    def _partes_flujo(self, queryset, serializar):
+        yield b'['
+        separador = b''
+        bloque = []
+        for instancia in queryset.iterator(chunk_size=self.bloque_flujo):
+            bloque.append(instancia)
+            if len(bloque) == self.bloque_flujo:
+                yield separador + self._serializar_bloque(bloque, serializar)
+                separador, bloque = b',', []
+        if bloque:
+            yield separador + self._serializar_bloque(bloque, serializar)
+        yield b']'
+
+    def _serializar_bloque(self, bloque, serializar):
+        # Elementos del arreglo sin los corchetes
+        return a_json(serializar(bloque))[1:-1]
+
+
+def respuesta_en_flujo(request, partes, **kwargs):
+    """
+    StreamingHttpResponse que envía las partes a medida que se generan.
+    """
+    # Bajo ASGI Django acumula un iterador síncrono completo antes de enviarlo; se
+    # entrega uno asíncrono que genera cada parte en el hilo de la petición
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        partes = _en_hilo(partes)
+    return StreamingHttpResponse(partes, **kwargs)
+
+
+async def _en_hilo(partes):
+    siguiente = sync_to_async(next)
+    while True:
+        parte = await siguiente(partes, None)
+        if parte is None:
+            return
+        yield parte
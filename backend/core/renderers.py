@@ -0,0 +1,34 @@
+"""
+Renderer JSON de la API basado en orjson.
+
+Produce el mismo JSON que rest_framework.renderers.JSONRenderer con la configuración
+por defecto (compacto, UTF-8 sin escapar): las fechas, Decimal, cadenas diferidas y
+demás tipos que orjson no serializa igual que DRF pasan por el JSONEncoder de DRF.
+"""
+import orjson
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+OPCIONES = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+_codificador = JSONEncoder()
+
+
+def a_json(datos, opciones=OPCIONES):
+    return orjson.dumps(datos, default=_codificador.default, option=opciones)
+
+
+class JSONRendererRapido(renderers.JSONRenderer):
+    """
+    JSONRenderer con orjson. orjson solo indenta con dos espacios, que se usan para
+    cualquier indentación pedida (?indent en el Accept o la API navegable).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        opciones = OPCIONES
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            opciones |= orjson.OPT_INDENT_2
+        return a_json(data, opciones)
@@ -21,6 +21,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -32,11 +33,15 @@ INSTALLED_APPS = [
     'apps.solicitudes',
     'apps.inspecciones',
     'apps.entregas',
+    'apps.dashboard',
+    'apps.sincronizacion',
+    'apps.eventos',
+    'apps.cache',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.WhiteNoiseAsincrono',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -71,12 +76,21 @@ WSGI_APPLICATION = 'core.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # PostgreSQL con pool de conexiones por proceso (core/db/pool.py)
+        'ENGINE': 'core.db',
         'NAME': config('SUPABASE_DB_NAME', default='postgres'),
         'USER': config('SUPABASE_DB_USER', default='postgres'),
         'PASSWORD': config('SUPABASE_DB_PASSWORD', default='postgres'),
         'HOST': config('SUPABASE_DB_HOST', default='localhost'),
         'PORT': config('SUPABASE_DB_PORT', default='5432'),
+        # Cerrar la conexión al terminar la petición la devuelve al pool
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAXIMO': config('DB_POOL_MAXIMO', default=20, cast=int),
+            'ESPERA': config('DB_POOL_ESPERA', default=10, cast=float),
+            'VIDA_MAXIMA': config('DB_POOL_VIDA_MAXIMA', default=1800, cast=int),
+            'VERIFICAR_TRAS': config('DB_POOL_VERIFICAR_TRAS', default=30, cast=int),
+        },
     }
 }
 
@@ -125,11 +139,18 @@ AUTH_USER_MODEL = 'users.User'
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'core.authentication.SupabaseJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.JSONRendererRapido',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.PaginacionCursor',
+    'PAGE_SIZE': 50,
 }
 
 # CORS settings
@@ -142,6 +163,48 @@ SUPABASE_URL = config('SUPABASE_URL')
 SUPABASE_KEY = config('SUPABASE_KEY')
 SUPABASE_SERVICE_KEY = config('SUPABASE_SERVICE_ROLE_KEY', default='')
 JWT_SECRET = config('JWT_SECRET', default='')
+JWT_AUDIENCE = config('JWT_AUDIENCE', default='authenticated')
+# Caché de usuarios autenticados por token (por proceso)
+JWT_CACHE_USUARIOS_TTL = config('JWT_CACHE_USUARIOS_TTL', default=60, cast=int)
+JWT_CACHE_USUARIOS_MAXIMO = config('JWT_CACHE_USUARIOS_MAXIMO', default=1000, cast=int)
+
+# Lecturas simultáneas por worker en el camino asíncrono (core.asincrono); cada una
+# ocupa un hilo y una conexión a la base de datos
+LECTURA_ASINCRONA_CONCURRENCIA = config('LECTURA_ASINCRONA_CONCURRENCIA', default=20, cast=int)
+
+# Tamaño máximo del arreglo JSON de la importación de productos, que se carga
+# completo en memoria; los archivos más grandes se envían como CSV en streaming
+IMPORTACION_JSON_MAXIMO = config('IMPORTACION_JSON_MAXIMO', default=10 * 1024 * 1024, cast=int)
+
+# Caché de respuestas de los listados más consultados (apps.cache). Por defecto en
+# memoria de cada proceso: las invalidaciones no llegan a los demás workers y una
+# entrada puede servirse hasta CACHE_RESPUESTAS_TTL segundos después de un cambio
+# hecho en otro. Con varios workers se usa un backend compartido, p. ej.
+# django.core.cache.backends.redis.RedisCache (requiere el paquete redis) con
+# CACHE_RESPUESTAS_UBICACION=redis://host:6379/1, o DatabaseCache con el nombre de
+# una tabla creada con manage.py createcachetable
+CACHE_RESPUESTAS_ALIAS = 'respuestas'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    CACHE_RESPUESTAS_ALIAS: {
+        'BACKEND': config('CACHE_RESPUESTAS_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_RESPUESTAS_UBICACION', default='respuestas'),
+        'TIMEOUT': config('CACHE_RESPUESTAS_TTL', default=300, cast=int),
+    },
+}
+
+# Eventos en vivo (SSE / WebSocket, solo con el servidor ASGI)
+# BrokerPostgres reparte entre workers y nodos con LISTEN/NOTIFY; BrokerMemoria solo
+# dentro de un proceso (desarrollo o un único worker: gunicorn.conf.py lo verifica)
+EVENTOS_BROKER = config('EVENTOS_BROKER', default='apps.eventos.broker.BrokerPostgres')
+EVENTOS_BROKER_OPCIONES = {
+    'historial': config('EVENTOS_HISTORIAL', default=500, cast=int),
+    'maximo_cola': config('EVENTOS_MAXIMO_COLA', default=100, cast=int),
+}
+# Segundos sin eventos tras los que se envía un comentario para mantener la conexión
+EVENTOS_LATIDO = config('EVENTOS_LATIDO', default=25, cast=int)
 
 # Spectacular API Documentation settings
 SPECTACULAR_SETTINGS = {
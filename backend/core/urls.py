@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
+from .views import MetricasCacheView, MetricasPoolView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     
@@ -10,6 +12,9 @@ urlpatterns = [
     path('api/solicitudes/', include('apps.solicitudes.urls')),
     path('api/inspecciones/', include('apps.inspecciones.urls')),
     path('api/entregas/', include('apps.entregas.urls')),
+    path('api/dashboard/', include('apps.dashboard.urls')),
+    path('api/metricas/pool/', MetricasPoolView.as_view(), name='metricas-pool'),
+    path('api/metricas/cache/', MetricasCacheView.as_view(), name='metricas-cache'),
     
     # API Documentation
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
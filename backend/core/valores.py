@@ -0,0 +1,178 @@
+"""
+Serialización de listados de solo lectura a partir de .values().
+
+Un ModelSerializer recorre sus campos por cada fila: obtiene cada atributo, instancia
+el serializador anidado de cada relación y arma un OrderedDict, y ese trabajo es la
+mayor parte del CPU de un listado. LectorValores analiza el serializador una sola vez
+y lo traduce a una consulta .values() con las columnas de las relaciones unidas por
+JOIN y, por cada campo, la conversión que haría to_representation (ninguna para los
+campos que ya vienen con su tipo de la base de datos, etiquetas de choices desde un
+diccionario). El resultado tiene las mismas claves, en el mismo orden y con los mismos
+valores que serializer.data.
+
+Solo se admiten serializadores cuyos campos salen de columnas del modelo: campos del
+modelo, PrimaryKeyRelatedField, get_<campo>_display, serializadores anidados de una
+relación ForeignKey/OneToOne y rutas con punto a través de relaciones obligatorias.
+Cualquier otro campo (SerializerMethodField, propiedades, relaciones múltiples) hace
+que el lector no se pueda construir.
+"""
+import functools
+import re
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import models
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# Campos de DRF cuyo to_representation devuelve sin cambios el valor que entrega la
+# base de datos para esos campos del modelo
+_SIN_CONVERSION = {
+    serializers.CharField: (models.CharField, models.TextField),
+    serializers.EmailField: (models.CharField,),
+    serializers.ChoiceField: (models.CharField,),
+    serializers.IntegerField: (models.IntegerField,),
+    serializers.BooleanField: (models.BooleanField,),
+}
+
+_DISPLAY = re.compile(r'get_(\w+)_display')
+
+# Conversión de las fechas con hora: DateTimeField.to_representation consulta la zona
+# horaria activa en cada valor, y eso es la mayor parte de su costo
+_FECHA_HORA = object()
+
+
+class LectorValores:
+    """
+    Versión compilada de un ModelSerializer para leer filas de .values().
+    """
+
+    def __init__(self, serializer):
+        self.serializer_class = type(serializer)
+        self.modelo = serializer.Meta.model
+        # Columnas de .values(), en el orden en que se encuentran
+        self.columnas = []
+        self._campos = self._compilar(serializer, self.modelo, '')
+
+    def consulta(self, queryset, ordenamiento=()):
+        """
+        Queryset de diccionarios con las columnas del serializador y las del
+        ordenamiento (la paginación por cursor lee su posición de la fila).
+        """
+        extra = [campo.lstrip('-') for campo in ordenamiento]
+        return queryset.values(*self.columnas, *(campo for campo in extra if campo not in self.columnas))
+
+    def serializar(self, filas):
+        # La zona horaria activa se resuelve una vez por llamada y no por cada fecha
+        zona = timezone.get_current_timezone()
+        return [self._convertir(fila, self._campos, zona) for fila in filas]
+
+    def _convertir(self, fila, campos, zona):
+        datos = {}
+        for nombre, clave, convertir, anidados in campos:
+            valor = fila[clave]
+            if valor is None:
+                datos[nombre] = None
+            elif anidados is not None:
+                datos[nombre] = self._convertir(fila, anidados, zona)
+            elif convertir is None:
+                datos[nombre] = valor
+            elif convertir is _FECHA_HORA:
+                # Como DateTimeField en ISO 8601: hora local y 'Z' en lugar de +00:00
+                valor = valor.astimezone(zona).isoformat()
+                datos[nombre] = valor[:-6] + 'Z' if valor.endswith('+00:00') else valor
+            else:
+                datos[nombre] = convertir(valor)
+        return datos
+
+    def _columna(self, ruta):
+        if ruta not in self.columnas:
+            self.columnas.append(ruta)
+        return ruta
+
+    def _compilar(self, serializer, modelo, prefijo):
+        # (nombre, columna, conversión, campos anidados) por cada campo legible
+        return [
+            (nombre, *self._campo(nombre, campo, modelo, prefijo))
+            for nombre, campo in serializer.fields.items()
+            if not campo.write_only
+        ]
+
+    def _campo(self, nombre, campo, modelo, prefijo):
+        if campo.source == '*' or isinstance(campo, (serializers.ListSerializer, serializers.ManyRelatedField)):
+            raise self._no_soportado(nombre)
+
+        # Las rutas con punto atraviesan relaciones que no pueden ser nulas
+        *relaciones, atributo = campo.source_attrs
+        for paso in relaciones:
+            relacion = self._campo_modelo(modelo, paso, nombre)
+            if not (relacion.many_to_one or relacion.one_to_one) or not relacion.concrete or relacion.null:
+                raise self._no_soportado(nombre)
+            prefijo, modelo = f'{prefijo}{paso}__', relacion.related_model
+
+        if isinstance(campo, serializers.ModelSerializer):
+            relacion = self._campo_modelo(modelo, atributo, nombre)
+            if not (relacion.many_to_one or relacion.one_to_one) or not relacion.concrete:
+                raise self._no_soportado(nombre)
+            if campo.Meta.model is not relacion.related_model:
+                raise self._no_soportado(nombre)
+            # Si la relación es nula el objeto anidado es None, como en el serializador
+            anidados = self._compilar(campo, relacion.related_model, f'{prefijo}{atributo}__')
+            return self._columna(prefijo + atributo), None, anidados
+
+        display = _DISPLAY.fullmatch(atributo)
+        if display:
+            campo_modelo = self._campo_modelo(modelo, display.group(1), nombre)
+            if not campo_modelo.choices:
+                raise self._no_soportado(nombre)
+            etiquetas = {valor: str(etiqueta) for valor, etiqueta in campo_modelo.flatchoices}
+            convertir = lambda valor: etiquetas[valor] if valor in etiquetas else str(valor)
+            return self._columna(prefijo + campo_modelo.name), convertir, None
+
+        campo_modelo = self._campo_modelo(modelo, atributo, nombre)
+        if isinstance(campo, serializers.PrimaryKeyRelatedField):
+            if not (campo_modelo.many_to_one or campo_modelo.one_to_one) or not campo_modelo.concrete:
+                raise self._no_soportado(nombre)
+            # .values('<relación>') entrega la llave primaria del objeto relacionado
+            convertir = campo.pk_field.to_representation if campo.pk_field is not None else None
+            return self._columna(prefijo + atributo), convertir, None
+
+        if campo_modelo.is_relation or not campo_modelo.concrete:
+            raise self._no_soportado(nombre)
+        if isinstance(campo_modelo, _SIN_CONVERSION.get(type(campo), ())):
+            convertir = None
+        elif self._fecha_hora_iso(campo, campo_modelo):
+            convertir = _FECHA_HORA
+        else:
+            convertir = campo.to_representation
+        return self._columna(prefijo + atributo), convertir, None
+
+    def _fecha_hora_iso(self, campo, campo_modelo):
+        # Con USE_TZ la base de datos entrega fechas con zona y el campo usa la activa
+        return (
+            type(campo) is serializers.DateTimeField
+            and isinstance(campo_modelo, models.DateTimeField)
+            and settings.USE_TZ
+            and not hasattr(campo, 'timezone')
+            and str(getattr(campo, 'format', api_settings.DATETIME_FORMAT)).lower() == ISO_8601
+        )
+
+    def _campo_modelo(self, modelo, atributo, nombre):
+        try:
+            return modelo._meta.get_field(atributo)
+        except FieldDoesNotExist:
+            raise self._no_soportado(nombre)
+
+    def _no_soportado(self, nombre):
+        return ImproperlyConfigured(
+            f'{self.serializer_class.__name__}.{nombre} no se puede leer desde .values()'
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def lector(serializer_class):
+    """
+    LectorValores de un serializador, construido una vez por proceso.
+    """
+    return LectorValores(serializer_class())
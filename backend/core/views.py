@@ -0,0 +1,28 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.cache import versiones
+from core.db import pool
+
+
+class MetricasPoolView(APIView):
+    """
+    Uso del pool de conexiones del proceso que atiende la petición (cada worker de
+    gunicorn tiene el suyo; el pid identifica cuál respondió).
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(pool.metricas())
+
+
+class MetricasCacheView(APIView):
+    """
+    Aciertos y fallos de la caché de respuestas por endpoint e invalidaciones por
+    modelo, del proceso que atiende la petición.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(versiones.metricas())
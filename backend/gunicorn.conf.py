@@ -0,0 +1,65 @@
+"""
+Configuración de gunicorn para producción: gunicorn -c gunicorn.conf.py
+
+GUNICORN_MODO=asgi (por defecto) usa workers de uvicorn: lecturas asíncronas y eventos
+en vivo. GUNICORN_MODO=wsgi usa workers gthread; los hilos de cada worker comparten el
+pool de conexiones del proceso (DB_POOL_MAXIMO debe cubrir GUNICORN_HILOS).
+"""
+import multiprocessing
+import os
+
+modo = os.environ.get('GUNICORN_MODO', 'asgi')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+if modo == 'wsgi':
+    wsgi_app = 'core.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_HILOS', 8))
+else:
+    wsgi_app = 'core.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+
+# Django se carga una vez en el maestro y los workers lo heredan al hacer fork
+preload_app = True
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Reinicia cada worker tras un número de peticiones para acotar el crecimiento de memoria
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    # El broker en memoria solo reparte dentro de un proceso: con varios workers cada
+    # conexión recibiría únicamente los eventos publicados en su propio worker
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    from django.conf import settings
+    from django.utils.module_loading import import_string
+    from apps.eventos.broker import BrokerMemoria
+    broker = import_string(settings.EVENTOS_BROKER)
+    if server.cfg.workers > 1 and broker is BrokerMemoria:
+        raise RuntimeError(
+            f'EVENTOS_BROKER={settings.EVENTOS_BROKER} no reparte eventos entre {server.cfg.workers} '
+            'workers: usar apps.eventos.broker.BrokerPostgres o WEB_CONCURRENCY=1'
+        )
+
+
+def pre_fork(server, worker):
+    # Si el maestro abrió conexiones al precargar, se cierran antes del fork para que
+    # ningún worker herede un socket compartido
+    from django.db import connections
+    from core.db import pool
+    connections.close_all()
+    pool.cerrar_todos()
+
+
+def worker_exit(server, worker):
+    from core.db import pool
+    pool.cerrar_todos()